@@ -1,18 +1,27 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
+import hmac
 import os
 import sys
+import json
+import time
 
 # Add current directory to path so imports work
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from utils.predictor import Predictor
-from utils.mapper import map_risk_to_visuals
-from utils.genai_client import genai_client
+from utils.mapper import map_risk_to_visuals, map_predictions_to_visuals
+from utils.genai_client import genai_client, REPORT_TEMPLATE_VERSION
+from utils.chat_sessions import SessionNotFound
 from utils.patient_service import PatientService
+from utils.report_cache import ReportCache
+from utils import metrics
+from utils.profiler import RequestProfiler
+from utils import bulk_scoring
 
 app = Flask(__name__)
-CORS(app)
+# Let the browser read the pagination and profile headers
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Profile-Id'])
 
 # Initialize Services
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,13 +32,176 @@ CSV_PATH = os.path.join(BASE_DIR, '../sample_patient_data_20_labeled.csv')
 if not os.path.exists(CSV_PATH):
     CSV_PATH = os.path.join(BASE_DIR, '../../sample_patient_data_20_labeled.csv')
 
-predictor = Predictor()
-DB_PATH = os.path.join(BASE_DIR, '../database/heart_viz.db')
-patient_service = PatientService(DB_PATH)
+# The model loads in the background so /health answers immediately;
+# prediction calls wait for it (CARDIOTWIN_MODEL_LOAD_WAIT seconds at most).
+# CARDIOTWIN_MODEL_BACKGROUND_LOAD=0 loads it during import instead.
+predictor = Predictor(background_load=os.environ.get('CARDIOTWIN_MODEL_BACKGROUND_LOAD', '1') != '0')
+DB_PATH = os.environ.get('CARDIOTWIN_DB_PATH', os.path.join(BASE_DIR, '../database/heart_viz.db'))
+# Each server worker keeps its own dashboard aggregates; gunicorn.conf.py sets
+# CARDIOTWIN_STATS_REFRESH_SECONDS so they pick up the other workers' writes
+patient_service = PatientService(
+    DB_PATH,
+    stats_refresh_seconds=float(os.environ.get('CARDIOTWIN_STATS_REFRESH_SECONDS', 0))
+)
+# Chat sessions are kept in SQLite so any server worker can continue them
+genai_client.sessions.attach(patient_service.db)
+# Repeat report requests are served from SQLite instead of the LLM
+report_cache = ReportCache(
+    patient_service.db,
+    max_bytes=int(os.environ.get('CARDIOTWIN_REPORT_CACHE_BYTES', 50 * 1024 * 1024))
+)
+
+def admin_allowed():
+    # Admin routes (and X-Profile) need X-Admin-Token to match
+    # CARDIOTWIN_ADMIN_TOKEN. Without a token they are closed, except on the
+    # debug development server (python app.py).
+    token = os.environ.get('CARDIOTWIN_ADMIN_TOKEN')
+    if not token:
+        return app.debug
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+REQUEST_SECONDS = metrics.registry.histogram(
+    'cardiotwin_http_request_seconds',
+    'Time to build each response, by route pattern, method and status (streamed bodies excluded)',
+    ['route', 'method', 'status']
+)
+_MAP_SECONDS = metrics.PREDICT_STAGE_SECONDS.labels(stage='visual_mapping')
+_SAVE_SECONDS = metrics.PREDICT_STAGE_SECONDS.labels(stage='db_write')
+
+# Per-request cProfile: X-Profile: 1 (admin token applies) or a random
+# CARDIOTWIN_PROFILE_SAMPLE_RATE fraction of all requests
+profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('CARDIOTWIN_PROFILE_SAMPLE_RATE', 0)),
+    ring_size=int(os.environ.get('CARDIOTWIN_PROFILE_RING_SIZE', 50)),
+    top_n=int(os.environ.get('CARDIOTWIN_PROFILE_TOP_N', 25))
+)
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.before_request
+def start_profile():
+    requested = request.headers.get('X-Profile', '').lower() in ('1', 'true', 'yes') and admin_allowed()
+    g.profile = profiler.start(requested=requested)
+
+def finish_profile(status):
+    handle = g.pop('profile', None)
+    if handle is None:
+        return None
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    return profiler.stop(handle, method=request.method, path=request.path, route=route, status=status)
+
+@app.after_request
+def attach_profile(response):
+    profile_id = finish_profile(response.status_code)
+    if profile_id is not None:
+        response.headers['X-Profile-Id'] = str(profile_id)
+    return response
+
+@app.teardown_request
+def abandon_profile(exc):
+    # after_request is skipped when a view raises; never leave the profiler running
+    finish_profile(500)
+
+@app.after_request
+def record_request(response):
+    start = g.get('request_start')
+    if start is not None:
+        # The rule pattern (/api/patient/<patient_id>), not the raw path, keeps the label set small
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route,
+                                method=request.method, status=response.status_code)
+    return response
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "service": "cardiotwin-backend"})
+    return jsonify({
+        "status": "healthy",
+        "service": "cardiotwin-backend",
+        "model": predictor.model_status,
+        "model_version": predictor.model_version
+    })
+
+def component_stats():
+    return {
+        "prediction_cache": predictor.cache.stats(),
+        "assessment_writer": patient_service.writer.stats() if patient_service.writer else None,
+        "genai_gateway": genai_client.gateway.stats(),
+        "report_cache": report_cache.stats(),
+        "chat_sessions": genai_client.sessions.stats()
+    }
+
+def component_samples():
+    # Numeric values from /api/metrics, as labelled gauge samples
+    for component, stats in component_stats().items():
+        for stat, value in (stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield {"component": component, "stat": stat}, value
+
+metrics.registry.gauge_function(
+    'cardiotwin_component_stat',
+    'Cache, queue and gateway counters as reported by /api/metrics',
+    component_samples
+)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify(component_stats())
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Latency histograms and component stats in Prometheus text format."""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    if not admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"profiler": profiler.stats(), "profiles": profiler.list()})
+
+@app.route('/api/admin/profiles/<int:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    entry = profiler.get(profile_id)
+    if entry is None:
+        return jsonify({"error": f"Unknown or expired profile: {profile_id}"}), 404
+    return jsonify(entry)
+
+@app.route('/api/admin/models', methods=['GET'])
+def list_models():
+    if not admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "serving": predictor.model_version,
+        "active": predictor.registry.active_version(),
+        "reload": predictor.reload_status,
+        "versions": predictor.registry.list_versions()
+    })
+
+@app.route('/api/admin/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    """Loads and warms the version in the background, then swaps it in. ?wait=1 blocks until done."""
+    if not admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    try:
+        manifest = predictor.registry.manifest(version)
+    except ValueError:
+        manifest = None
+    if manifest is None:
+        return jsonify({"error": f"Unknown model version: {version}"}), 404
+
+    wait = request.args.get('wait', '').lower() in ('1', 'true', 'yes')
+    status = predictor.activate(version, wait=wait)
+    if "error" in status:
+        return jsonify(status), 409 if status.get("state") == "loading" else 422
+    return jsonify(status), 200 if wait else 202
+
+def model_error_status():
+    # 503 tells load balancers to retry while the model is still loading
+    return 503 if predictor.model_status == "loading" else 500
 
 @app.route('/predict', methods=['POST'])
 def predict():
@@ -47,13 +219,17 @@ def predict():
         # 1. Get Prediction
         prediction = predictor.predict(features)
         if "error" in prediction:
-            return jsonify({"error": prediction["error"]}), 500
+            return jsonify({"error": prediction["error"]}), model_error_status()
             
         # 2. Map visuals
+        start = time.perf_counter()
         visuals = map_risk_to_visuals(prediction, age, features)
+        _MAP_SECONDS.observe(time.perf_counter() - start)
         
         # 3. Save to History
+        start = time.perf_counter()
         patient_service.save_assessment(features, prediction, visuals)
+        _SAVE_SECONDS.observe(time.perf_counter() - start)
         
         response = {
             "prediction": prediction,
@@ -68,6 +244,82 @@ def predict():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Scores a list of patients in one model call. Results are not written to history."""
+    try:
+        data = request.json
+        
+        # Accept {"patients": [...]} or a bare list
+        rows = data.get('patients', []) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not rows:
+            return jsonify({"error": "Expected a non-empty 'patients' list"}), 400
+            
+        # Each row may wrap its values in 'features' like /predict
+        features_list = [row.get('features', row) if isinstance(row, dict) else {} for row in rows]
+        
+        predictions = predictor.predict_batch(features_list)
+        if isinstance(predictions, dict) and "error" in predictions:
+            return jsonify({"error": predictions["error"]}), model_error_status()
+            
+        visuals = map_predictions_to_visuals(predictions, features_list)
+        results = [
+            {"prediction": prediction, "visuals": visual}
+            for prediction, visual in zip(predictions, visuals)
+        ]
+            
+        return jsonify({"count": len(results), "results": results})
+        
+    except Exception as e:
+        import traceback
+        print(f"Error processing batch request: {e}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Bulk scoring for cohort exports. The body is CSV (text/csv or ?format=csv)
+    or NDJSON, with raw export or database column names. It is read and
+    scored chunk by chunk and the results go back as NDJSON (one line per
+    input row, then a summary line), so memory stays flat for any file
+    size. Results are not written to history.
+    """
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+    chunk_size = max(1, min(request.args.get('chunk_size', default=1000, type=int), 10000))
+    
+    lines = bulk_scoring.iter_text_lines(request.stream)
+    if fmt == 'csv':
+        records = bulk_scoring.iter_csv_records(lines)
+    else:
+        records = bulk_scoring.iter_ndjson_records(lines)
+    
+    def generate():
+        start = time.perf_counter()
+        rows = errors = 0
+        try:
+            for chunk in bulk_scoring.iter_chunks(records, chunk_size):
+                results = bulk_scoring.score_chunk(predictor, chunk, start_index=rows)
+                rows += len(results)
+                errors += sum(1 for r in results if "error" in r)
+                yield ''.join(json.dumps(r) + '\n' for r in results)
+        except Exception as e:
+            print(f"Error while streaming predictions: {e}")
+            yield json.dumps({"error": str(e), "row": rows}) + '\n'
+        elapsed = time.perf_counter() - start
+        yield json.dumps({"summary": {
+            "rows": rows,
+            "errors": errors,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None
+        }}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/patients', methods=['GET'])
 def get_patients():
     try:
@@ -105,9 +357,26 @@ def get_patient_details(patient_id):
 @app.route('/api/history', methods=['GET'])
 def get_history():
     try:
-        limit = request.args.get('limit', default=50, type=int)
-        history = patient_service.get_history(limit)
-        return jsonify(history)
+        args = request.args
+        limit = args.get('limit', default=50, type=int)
+        include_payload = args.get('include_payload', 'true').lower() not in ('0', 'false', 'no')
+        page = patient_service.get_history_page(
+            limit=limit,
+            cursor=args.get('cursor'),
+            patient_id=args.get('patient_id'),
+            risk_level=args.get('risk_level'),
+            start=args.get('from'),
+            end=args.get('to'),
+            include_payload=include_payload
+        )
+        
+        # Body stays a plain list; the next page's cursor rides in a header
+        response = jsonify(page['items'])
+        if page['next_cursor']:
+            response.headers['X-Next-Cursor'] = page['next_cursor']
+        return response
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -154,25 +423,130 @@ def generate_report():
         if not patient_data or not prediction:
             return jsonify({"error": "Missing data"}), 400
             
+        key = ReportCache.make_key(patient_data, prediction, REPORT_TEMPLATE_VERSION)
+        report = report_cache.get(key)
+        if report is not None:
+            return jsonify({"report": report, "cached": True})
+            
         report = genai_client.generate_report(patient_data, prediction)
-        return jsonify({"report": report})
+        # Failures come back as "Error..." text; only real reports are kept
+        if not report.startswith("Error"):
+            report_cache.put(key, report, REPORT_TEMPLATE_VERSION)
+        return jsonify({"report": report, "cached": False})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_response(chunks, on_complete=None, done=None):
+    """
+    Streams text chunks as Server-Sent Events: `chunk` events carrying
+    {"text": ...}, then `done`, or `error` if generation failed. When the
+    client disconnects the server closes this generator, which closes
+    `chunks` and so cancels the upstream model call. on_complete gets the
+    full text after a stream that ran to the end.
+    """
+    def generate():
+        parts = []
+        try:
+            for text in chunks:
+                parts.append(text)
+                yield sse_event('chunk', {"text": text})
+        except Exception as e:
+            print(f"Error while streaming GenAI response: {e}")
+            yield sse_event('error', {"error": str(e)})
+            return
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+        if on_complete:
+            on_complete(''.join(parts))
+        yield sse_event('done', done or {})
+    
+    # No buffering by reverse proxies, or the first token waits for the last
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/generate-report/stream', methods=['POST'])
+def generate_report_stream():
+    """Same as /api/generate-report, with the text sent as it is generated (SSE)."""
+    data = request.json or {}
+    patient_data = data.get('patient_data')
+    prediction = data.get('prediction')
+    
+    if not patient_data or not prediction:
+        return jsonify({"error": "Missing data"}), 400
+        
+    key = ReportCache.make_key(patient_data, prediction, REPORT_TEMPLATE_VERSION)
+    report = report_cache.get(key)
+    if report is not None:
+        return sse_response(iter([report]), done={"cached": True})
+        
+    return sse_response(
+        genai_client.stream_report(patient_data, prediction),
+        on_complete=lambda text: report_cache.put(key, text, REPORT_TEMPLATE_VERSION),
+        done={"cached": False}
+    )
+
+def session_expired(e):
+    # The client resends patient_context and its history without session_id to start over
+    return jsonify({"error": str(e), "session_expired": True}), 404
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
+    """
+    One chat turn. The first request carries patient_context and gets a
+    session_id back; later ones send only that id and the new message.
+    """
     try:
         data = request.json
         message = data.get('message')
-        history = data.get('history', [])
+        session_id = data.get('session_id')
         patient_context = data.get('patient_context')
         mode = data.get('mode', 'patient') # Default to patient
+        # Older clients send the full history; it only seeds a new session
+        history = data.get('history') if not session_id else None
         
-        response = genai_client.chat(message, history, patient_context, mode)
-        return jsonify({"response": response})
+        session_id, response = genai_client.chat_turn(message, session_id, patient_context, mode, history)
+        return jsonify({"response": response, "session_id": session_id})
+    except SessionNotFound as e:
+        return session_expired(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Same as /api/chat, with the reply sent as it is generated (SSE); session_id comes in the done event."""
+    data = request.json or {}
+    message = data.get('message')
+    if not message:
+        return jsonify({"error": "Missing message"}), 400
+    session_id = data.get('session_id')
+    history = data.get('history') if not session_id else None
+    
+    try:
+        session_id, chunks = genai_client.stream_chat(
+            message, session_id, data.get('patient_context'), data.get('mode', 'patient'), history
+        )
+    except SessionNotFound as e:
+        return session_expired(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    return sse_response(chunks, done={"session_id": session_id})
+
+def shutdown_services():
+    """
+    Commits queued history rows and report-cache hits, closes pooled
+    connections and cancels queued LLM calls. Gunicorn calls it as each
+    worker exits.
+    """
+    genai_client.gateway.shutdown()
+    report_cache.flush_touches()
+    patient_service.close()
 
+# Development server; production serving is `gunicorn -c gunicorn.conf.py wsgi:app`
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
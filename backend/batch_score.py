@@ -0,0 +1,211 @@
+"""
+Offline batch scorer: runs the cardiotoxicity model over a whole cohort
+without going through Flask.
+
+Input is a CSV or Parquet export (raw or database column names) or the
+patients table itself; output is CSV, Parquet or NDJSON (picked by file
+extension) with the input columns plus prediction, risk_score and visuals.
+Rows are split into chunks and scored across a process pool; each worker
+loads the model once.
+
+Examples (from repo root):
+    python backend/batch_score.py risk.csv -o scored.csv --workers 4
+    python backend/batch_score.py --from-db -o scored_patients.parquet
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+# Add current dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import bulk_scoring
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, 'database', 'heart_viz.db')
+
+VISUAL_FIELDS = ['heart_rate', 'color', 'arrhythmia_type', 'contraction_intensity', 'hrv', 'risk_level', 'qtc', 'lvef']
+
+# Per-worker model, loaded once by _init_worker
+_predictor = None
+
+
+def _init_worker():
+    global _predictor
+    # Every row is scored once; a results cache would only cost memory
+    os.environ['CARDIOTWIN_PREDICTION_CACHE_SIZE'] = '0'
+    # Parallelism comes from the pool; keep each worker's model single-threaded
+    os.environ.setdefault('OMP_NUM_THREADS', '1')
+    from utils.predictor import Predictor
+    _predictor = Predictor()
+
+
+def _score(job):
+    start_index, records = job
+    return [_flatten(record, result) for record, result in
+            zip(records, bulk_scoring.score_chunk(_predictor, records, start_index))]
+
+
+def _flatten(record, result):
+    row = {k: v for k, v in record.items() if not k.startswith('_')}
+    prediction = result.get('prediction') or {}
+    visuals = result.get('visuals') or {}
+    row['prediction'] = prediction.get('class')
+    row['confidence'] = prediction.get('confidence')
+    row['risk_score'] = prediction.get('risk_score')
+    row['model_version'] = prediction.get('model_version')
+    for field in VISUAL_FIELDS:
+        row[f'visual_{field}'] = visuals.get(field)
+    row['error'] = result.get('error')
+    return row
+
+
+def read_csv(path, chunk_size):
+    with open(path, newline='') as f:
+        yield from bulk_scoring.iter_chunks(csv.DictReader(f), chunk_size)
+
+
+def read_parquet(path, chunk_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet input requires pyarrow (pip install pyarrow)")
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pylist()
+
+
+def read_patients_table(db_path, chunk_size):
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute("SELECT * FROM patients ORDER BY patient_id")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+class OutputWriter:
+    """Streams scored chunks to CSV, NDJSON or Parquet."""
+
+    def __init__(self, path):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        if self.ext not in ('.csv', '.ndjson', '.jsonl', '.parquet'):
+            sys.exit(f"Unsupported output format: {self.ext} (use .csv, .ndjson or .parquet)")
+        self._file = None
+        self._writer = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self.ext == '.parquet':
+            self._write_parquet(rows)
+        elif self.ext == '.csv':
+            if self._writer is None:
+                self._file = open(self.path, 'w', newline='')
+                self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0].keys()), extrasaction='ignore')
+                self._writer.writeheader()
+            self._writer.writerows(rows)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w')
+            self._file.writelines(json.dumps(r) + '\n' for r in rows)
+
+    def _write_parquet(self, rows):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow (pip install pyarrow)")
+        table = pa.Table.from_pylist(rows)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        if self.ext == '.parquet' and self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def run(chunks, output, workers, max_pending=None):
+    """
+    Scores chunks across workers processes and writes them to output in
+    input order. At most max_pending chunks (default 2 per worker) are read
+    ahead of the writer, so memory stays bounded whatever the input size.
+    """
+    writer = OutputWriter(output)
+    rows = errors = 0
+    start = time.perf_counter()
+    max_pending = max_pending or 2 * workers
+
+    def jobs():
+        index = 0
+        for chunk in chunks:
+            yield index, chunk
+            index += len(chunk)
+
+    def write(scored):
+        nonlocal rows, errors
+        writer.write(scored)
+        rows += len(scored)
+        errors += sum(1 for r in scored if r['error'])
+        elapsed = time.perf_counter() - start
+        print(f"\r  {rows} rows scored ({rows / elapsed:.0f} rows/s)", end='', file=sys.stderr)
+
+    with Pool(processes=workers, initializer=_init_worker) as pool:
+        # Not pool.imap: its feeder thread reads the whole input into the
+        # task queue. Results are collected oldest first to keep the order.
+        pending = deque()
+        for job in jobs():
+            pending.append(pool.apply_async(_score, (job,)))
+            if len(pending) >= max_pending:
+                write(pending.popleft().get())
+        while pending:
+            write(pending.popleft().get())
+    writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    print(f"Scored {rows} rows ({errors} errors) in {elapsed:.1f}s: {rows / elapsed if elapsed else 0:.0f} rows/s "
+          f"with {workers} workers -> {output}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score a cohort file or the patients table.")
+    parser.add_argument('input', nargs='?', help="CSV or Parquet file (omit with --from-db)")
+    parser.add_argument('-o', '--output', required=True, help="Output file: .csv, .ndjson or .parquet")
+    parser.add_argument('--from-db', action='store_true', help="Score the patients table instead of a file")
+    parser.add_argument('--db-path', default=os.environ.get('CARDIOTWIN_DB_PATH', DEFAULT_DB_PATH))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.from_db:
+        if args.input:
+            parser.error("give either an input file or --from-db, not both")
+        chunks = read_patients_table(args.db_path, args.chunk_size)
+    elif not args.input:
+        parser.error("an input file or --from-db is required")
+    elif args.input.lower().endswith('.parquet'):
+        chunks = read_parquet(args.input, args.chunk_size)
+    else:
+        chunks = read_csv(args.input, args.chunk_size)
+
+    run(chunks, args.output, max(1, args.workers))
+
+
+if __name__ == "__main__":
+    main()
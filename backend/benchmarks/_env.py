@@ -0,0 +1,20 @@
+"""
+Environment shared by the benchmark scripts. Call it after putting the
+backend on sys.path and before importing app or utils:
+
+    sys.path.append(BACKEND_DIR)
+    from benchmarks._env import use_bench_env
+    use_bench_env()
+
+Values already set in the environment win.
+"""
+import os
+import tempfile
+
+
+def use_bench_env(db_name='bench.db'):
+    # Keep the benchmark away from the real history database
+    if 'CARDIOTWIN_DB_PATH' not in os.environ:
+        os.environ['CARDIOTWIN_DB_PATH'] = os.path.join(tempfile.mkdtemp(), db_name)
+    # Load the model before timing starts
+    os.environ.setdefault('CARDIOTWIN_MODEL_BACKGROUND_LOAD', '0')
@@ -0,0 +1,86 @@
+"""
+Throughput of the single-row /predict path vs. the vectorized /predict/batch path
+(model and visuals mapping).
+
+Usage (from repo root):
+    python backend/benchmarks/bench_batch_predict.py --rows 1000
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.append(BACKEND_DIR)
+
+from benchmarks._env import use_bench_env
+use_bench_env()
+# Measure the model path itself, not prediction cache hits
+os.environ.setdefault('CARDIOTWIN_PREDICTION_CACHE_SIZE', '0')
+
+# risk*.csv uses the raw export column names
+CSV_TO_FEATURE = {
+    'age': 'age_years',
+    'sex': 'sex_binary',
+    'resting_hr': 'resting_heart_rate_bpm',
+    'systolic_bp': 'systolic_bp_mmHg',
+    'diastolic_bp': 'diastolic_bp_mmHg',
+    'hrv_rmssd': 'heart_rate_variability_rmssd',
+    'qtc_baseline': 'qtc_interval_ms',
+    'baseline_lvef': 'baseline_lvef_percent',
+    'num_cycles': 'chemo_cycles_count',
+    'dose_per_cycle': 'dose_per_cycle_mg_per_m2',
+    'cumulative_dose': 'cumulative_dose_mg_per_m2',
+}
+
+
+def load_rows(n):
+    with open(os.path.join(ROOT_DIR, 'risk.csv'), newline='') as f:
+        base = [{CSV_TO_FEATURE[k]: float(v) for k, v in row.items() if k in CSV_TO_FEATURE}
+                for row in csv.DictReader(f)]
+    return [base[i % len(base)] for i in range(n)]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def report(label, n, seconds):
+    print(f"{label:<34} {seconds * 1000:9.1f} ms  {n / seconds:12.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import app, predictor
+
+    rows = load_rows(args.rows)
+    client = app.test_client()
+    print(f"Scoring {len(rows)} rows\n")
+
+    t = timed(lambda: [predictor.predict(r) for r in rows])
+    report("Predictor.predict (loop)", len(rows), t)
+    t = timed(lambda: predictor.predict_batch(rows))
+    report("Predictor.predict_batch", len(rows), t)
+
+    from utils.mapper import map_risk_to_visuals, map_predictions_to_visuals
+    predictions = predictor.predict_batch(rows)
+    t = timed(lambda: [map_risk_to_visuals(p, r['age_years'], r) for p, r in zip(predictions, rows)])
+    report("map_risk_to_visuals (loop)", len(rows), t)
+    t = timed(lambda: map_predictions_to_visuals(predictions, rows))
+    report("map_predictions_to_visuals", len(rows), t)
+
+    t = timed(lambda: [client.post('/predict', json={"features": r}) for r in rows])
+    report("POST /predict (one per row)", len(rows), t)
+    t = timed(lambda: client.post('/predict/batch', json={"patients": rows}))
+    report("POST /predict/batch", len(rows), t)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Queries/sec through the threaded Flask server: connect-per-query vs. pooled connections.
+
+Drives GET /api/history and GET /api/patients, one query per request each,
+from several client threads against a werkzeug threaded server. (/api/stats
+is served from memory and no longer touches the database.)
+
+Usage (from repo root):
+    python backend/benchmarks/bench_db_pool.py --clients 8 --seconds 5
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks._env import use_bench_env
+use_bench_env()
+
+from utils.db_manager import DBManager
+
+class ConnectPerQueryDBManager(DBManager):
+    """The pre-pool behaviour: open and close a fresh connection for every statement."""
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def drive(base_url, path, clients, seconds):
+    count = [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        while time.perf_counter() < deadline:
+            with urllib.request.urlopen(base_url + path) as res:
+                json.load(res)
+            count[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(count) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    import logging
+    from werkzeug.serving import make_server
+    from app import app, patient_service
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    paths = ['/api/history?limit=50', '/api/patients']
+    pooled_db = patient_service.db
+
+    print(f"{args.clients} client threads, {args.seconds:.0f}s per run\n")
+    for label, db in (("connect-per-query", ConnectPerQueryDBManager(pooled_db.db_path)), ("pooled", pooled_db)):
+        patient_service.db = db
+        for path in paths:
+            qps = drive(base_url, path, args.clients, args.seconds)
+            print(f"{label:<18} GET {path:<22} {qps:8.0f} queries/s")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+p50/p99 latency of single-row scoring: DataFrame path vs. NumPy fast path.
+
+Measures Predictor.predict directly and end to end through POST /predict.
+
+Usage (from repo root):
+    python backend/benchmarks/bench_predict_latency.py --requests 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from benchmarks._env import use_bench_env
+use_bench_env()
+# Measure the model path itself, not prediction cache hits
+os.environ.setdefault('CARDIOTWIN_PREDICTION_CACHE_SIZE', '0')
+
+from benchmarks.bench_batch_predict import load_rows
+
+
+def latencies(fn, rows):
+    out = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        fn(row)
+        out[i] = time.perf_counter() - start
+    return out * 1000.0
+
+
+def report(label, ms):
+    p50, p99 = np.percentile(ms, [50, 99])
+    print(f"{label:<34} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    from app import app, predictor
+
+    rows = load_rows(args.requests)
+    client = app.test_client()
+    print(f"{len(rows)} single-row calls per mode\n")
+
+    for fast_path in (False, True):
+        predictor.fast_path = fast_path
+        mode = "fast path" if fast_path else "DataFrame"
+        latencies(predictor.predict, rows[:50])  # warm up
+        report(f"Predictor.predict [{mode}]", latencies(predictor.predict, rows))
+        report(f"POST /predict [{mode}]",
+               latencies(lambda r: client.post('/predict', json={"features": r}), rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+/api/stats latency on a large assessments table: original queries vs. indexed aggregation vs. running aggregates.
+
+Builds a throwaway database with --rows synthetic assessments spread over
+--days days, then times the four original get_stats queries without the
+new indexes, the indexed aggregation queries, the startup rebuild of the
+in-memory aggregates, and PatientService.get_stats / GET /api/stats.
+
+Usage (from repo root):
+    python backend/benchmarks/bench_stats.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+# Seeded below, so never the database named in the environment
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_stats.db')
+os.environ.setdefault('CARDIOTWIN_DB_PATH', DB_PATH)
+from benchmarks._env import use_bench_env
+use_bench_env()
+
+from utils.db_manager import DBManager
+from utils.assessment_writer import INSERT_ASSESSMENT
+
+INDEXES = ['idx_assessments_timestamp', 'idx_assessments_patient', 'idx_assessments_risk', 'idx_assessments_date']
+
+ORIGINAL_QUERIES = [
+    "SELECT COUNT(*) as count FROM patients",
+    "SELECT COUNT(*) as count FROM assessments WHERE risk_level = 'Critical'",
+    "SELECT AVG(risk_score) as avg_score FROM assessments",
+    """SELECT strftime('%m-%d', timestamp) as date, COUNT(*) as count
+       FROM assessments GROUP BY date ORDER BY date DESC LIMIT 7""",
+]
+
+
+def populate(db, rows, days):
+    rng = random.Random(42)
+    start = datetime.now() - timedelta(days=days)
+    span = days * 86400
+    levels = ['Safe', 'Warning', 'Critical']
+    payload = json.dumps({"age_years": 55, "baseline_lvef_percent": 60, "qtc_interval_ms": 420})
+    chunk = []
+    for i in range(rows):
+        ts = (start + timedelta(seconds=span * i / rows)).isoformat()
+        level = rng.choices(levels, weights=(70, 20, 10))[0]
+        chunk.append((f"AST-BENCH-{i:09d}", ts, f"P{rng.randint(1, 500):03d}", level,
+                      rng.random(), payload, json.dumps({"class": level})))
+        if len(chunk) == 50000:
+            db.execute_many(INSERT_ASSESSMENT, chunk)
+            chunk = []
+    if chunk:
+        db.execute_many(INSERT_ASSESSMENT, chunk)
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db = DBManager(DB_PATH)
+    print(f"Populating {args.rows} assessments over {args.days} days...")
+    start = time.perf_counter()
+    populate(db, args.rows, args.days)
+    print(f"  done in {time.perf_counter() - start:.1f}s\n")
+
+    for name in INDEXES:
+        db.execute_query(f"DROP INDEX IF EXISTS {name}", commit=True)
+    db.execute_query("ANALYZE", commit=True)
+    t = best_of(lambda: [db.execute_query(q) for q in ORIGINAL_QUERIES], args.repeat)
+    print(f"original 4 queries, no indexes        {t:9.1f} ms")
+
+    # Re-running the schema recreates the indexes
+    db = DBManager(DB_PATH)
+    db.execute_query("ANALYZE", commit=True)
+
+    from utils.stats_aggregator import REBUILD_SUMMARY_QUERY, REBUILD_DAYS_QUERY
+    t = best_of(lambda: [db.execute_query(q) for q in (REBUILD_SUMMARY_QUERY, REBUILD_DAYS_QUERY)], args.repeat)
+    print(f"single-pass aggregation (indexed)     {t:9.1f} ms")
+
+    from app import app, patient_service
+    patient_service.db = db
+    t = best_of(lambda: patient_service.stats.rebuild(db), 1)
+    print(f"DashboardStats.rebuild (startup)      {t:9.1f} ms")
+    t = best_of(patient_service.get_stats, args.repeat)
+    print(f"PatientService.get_stats (in-memory)  {t:9.3f} ms")
+    client = app.test_client()
+    t = best_of(lambda: client.get('/api/stats'), args.repeat)
+    print(f"GET /api/stats                        {t:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Memory and throughput of POST /predict/stream on a large CSV.
+
+Writes a synthetic cohort CSV (rows resampled from risk.csv) to a temp
+file, streams it through the endpoint in-process and consumes the NDJSON
+response line by line, sampling peak RSS along the way.
+
+Usage (from repo root):
+    python backend/benchmarks/bench_stream_scoring.py --rows 1000000
+"""
+import argparse
+import csv
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.append(BACKEND_DIR)
+
+from benchmarks._env import use_bench_env
+use_bench_env()
+os.environ.setdefault('CARDIOTWIN_PREDICTION_CACHE_SIZE', '0')
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def write_cohort(path, rows):
+    with open(os.path.join(ROOT_DIR, 'risk.csv'), newline='') as f:
+        reader = csv.DictReader(f)
+        header = reader.fieldnames
+        base = list(reader)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=header)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow(base[i % len(base)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    from app import app
+
+    path = os.path.join(tempfile.mkdtemp(), 'cohort.csv')
+    write_cohort(path, args.rows)
+    size_mb = os.path.getsize(path) / 1e6
+    baseline = peak_rss_mb()
+    print(f"{args.rows} rows, {size_mb:.1f} MB CSV; peak RSS before scoring {baseline:.0f} MB")
+
+    client = app.test_client()
+    start = time.perf_counter()
+    lines = 0
+    checkpoints = {args.rows // 4, args.rows // 2, 3 * args.rows // 4}
+    with open(path, 'rb') as f:
+        response = client.post(f'/predict/stream?format=csv&chunk_size={args.chunk_size}',
+                               input_stream=f, content_type='text/csv', buffered=False)
+        for data in response.response:
+            lines += data.count(b'\n')
+            for mark in sorted(checkpoints):
+                if lines >= mark:
+                    print(f"  {mark:>9} rows scored   peak RSS {peak_rss_mb():6.0f} MB")
+                    checkpoints.discard(mark)
+    elapsed = time.perf_counter() - start
+    print(f"  {lines - 1:>9} rows scored   peak RSS {peak_rss_mb():6.0f} MB")
+    print(f"\n{(lines - 1) / elapsed:.0f} rows/s end to end")
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
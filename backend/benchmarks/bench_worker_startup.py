@@ -0,0 +1,151 @@
+"""
+Cold start and memory of N model-serving worker processes, pickled model vs.
+memory-mapped flat artifacts.
+
+Each worker builds a Predictor and scores one row. By default every worker
+is a fresh interpreter (a Gunicorn worker without preload_app); --preload
+loads once in a parent and forks the workers instead. Reports the time until
+every worker is ready, summed RSS, and summed PSS (proportional set size:
+shared pages are split between the processes mapping them, so unlike RSS it
+adds up to real memory use). Linux only.
+
+Usage (from repo root):
+    python backend/export_flat_model.py   # once, for the flat format
+    python backend/benchmarks/bench_worker_startup.py --workers 1 4 16
+"""
+import argparse
+import contextlib
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+# Measure model loading, not the results cache
+os.environ.setdefault('CARDIOTWIN_PREDICTION_CACHE_SIZE', '0')
+
+SAMPLE = {'age_years': 65, 'sex_binary': 1, 'baseline_lvef_percent': 40, 'cumulative_dose_mg_per_m2': 360}
+
+
+def memory_kb(pid):
+    """(rss_kb, pss_kb) from /proc/<pid>/smaps_rollup."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0]] = int(parts[1])
+    return values.get('Rss:', 0), values.get('Pss:', 0)
+
+
+def build_predictor(model_format):
+    # Keep the Predictor's load messages off the READY channel
+    with contextlib.redirect_stdout(sys.stderr):
+        from utils.predictor import Predictor
+        predictor = Predictor(model_format=model_format)
+    if 'error' in predictor.predict(SAMPLE):
+        sys.exit("worker could not score a row")
+    return predictor
+
+
+def child(model_format):
+    build_predictor(model_format)
+    print("READY", flush=True)
+    # Stay alive (and mapped) until the parent has measured us
+    sys.stdin.read()
+
+
+def run_spawned(model_format, n):
+    start = time.perf_counter()
+    procs = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child', model_format],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(n)
+    ]
+    for p in procs:
+        if p.stdout.readline().strip() != 'READY':
+            raise RuntimeError("worker failed to start")
+    elapsed = time.perf_counter() - start
+    usage = [memory_kb(p.pid) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return elapsed, usage
+
+
+def preload_parent(model_format, n):
+    """Loads once, forks n workers, prints their memory and exits."""
+    predictor = build_predictor(model_format)
+    children = []
+    for _ in range(n):
+        ready_r, ready_w = os.pipe()
+        stop_r, stop_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(stop_w)
+            # Drop inherited ends of earlier workers' pipes so they see EOF
+            for _, other_ready_r, other_stop_w in children:
+                os.close(other_ready_r)
+                os.close(other_stop_w)
+            predictor.predict(SAMPLE)
+            os.write(ready_w, b'1')
+            os.read(stop_r, 1)
+            os._exit(0)
+        os.close(ready_w)
+        os.close(stop_r)
+        children.append((pid, ready_r, stop_w))
+    for _, ready_r, _ in children:
+        os.read(ready_r, 1)
+    # The preloaded parent stays resident under Gunicorn too
+    usage = [memory_kb(os.getpid())] + [memory_kb(pid) for pid, _, _ in children]
+    print("READY " + " ".join(f"{rss},{pss}" for rss, pss in usage), flush=True)
+    for pid, ready_r, stop_w in children:
+        os.close(stop_w)
+        os.close(ready_r)
+        os.waitpid(pid, 0)
+
+
+def run_preloaded(model_format, n):
+    # A fresh parent per run, so nothing imported by an earlier run is reused
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--preload-parent', model_format, str(n)],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline().split()
+    elapsed = time.perf_counter() - start
+    proc.wait()
+    if not line or line[0] != 'READY':
+        raise RuntimeError("preloaded workers failed to start")
+    return elapsed, [tuple(int(v) for v in pair.split(',')) for pair in line[1:]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--formats', nargs='+', default=['pickle', 'flat'])
+    parser.add_argument('--preload', action='store_true', help="Load once, then fork the workers")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--preload-parent', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child)
+    if args.preload_parent:
+        return preload_parent(args.preload_parent[0], int(args.preload_parent[1]))
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        sys.exit("needs Linux /proc/<pid>/smaps_rollup")
+
+    run = run_preloaded if args.preload else run_spawned
+    print(f"{'format':<8} {'workers':>7} {'ready in':>10} {'RSS total':>11} {'PSS total':>11} {'PSS/worker':>11}")
+    for model_format in args.formats:
+        for n in args.workers:
+            elapsed, usage = run(model_format, n)
+            rss = sum(u[0] for u in usage) / 1024
+            pss = sum(u[1] for u in usage) / 1024
+            print(f"{model_format:<8} {n:>7} {elapsed:>9.2f}s {rss:>9.0f}MB {pss:>9.0f}MB {pss / n:>9.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
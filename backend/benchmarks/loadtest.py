@@ -0,0 +1,429 @@
+"""
+Load test for the Flask API: synthetic patients, concurrent clients, per-endpoint throughput and p50/p95/p99, saved as JSON.
+
+Synthetic patients are drawn per risk class from multivariate normals
+fitted to the risk*.csv cohorts (clipped to each class's observed range,
+cumulative dose = cycles x dose per cycle), so feature correlations and
+the class mix match the training data. Each of --concurrency clients
+sends requests back to back (closed loop) for --duration seconds, picking
+the endpoint by the --mix weights:
+
+    predict   POST /predict with a synthetic patient
+    patient   GET  /api/patient/<id> for a stored patient
+    history   GET  /api/history (half of them filtered by patient)
+    stats     GET  /api/stats
+
+Targets:
+    --target inprocess  app.test_client() in this process (default): the
+                        app without a network stack or server threads
+    --target launch     starts the server with --server-cmd on a free port,
+                        against a throwaway database
+    --url URL           a server that is already running. /predict and
+                        /api/patient write to its history database.
+
+Results (config, git commit, per-endpoint numbers) are written as JSON to
+--output, by default backend/benchmarks/results/. --compare takes an
+earlier results file and prints the change per endpoint.
+
+Usage (from repo root):
+    python backend/benchmarks/loadtest.py --concurrency 8 --duration 30
+    python backend/benchmarks/loadtest.py --target launch --mix predict=1 --output before.json
+    python backend/benchmarks/loadtest.py --target launch --mix predict=1 --compare before.json
+"""
+import argparse
+import csv
+import glob
+import http.client
+import json
+import os
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.append(BACKEND_DIR)
+
+from benchmarks._env import use_bench_env
+from utils.feature_schema import CSV_COLUMN_MAP
+
+RISK_CSVS = sorted(glob.glob(os.path.join(ROOT_DIR, 'risk*.csv')))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+
+# Sampled jointly; cumulative_dose is derived from the last two
+SAMPLED_COLUMNS = [
+    'age', 'sex', 'resting_hr', 'systolic_bp', 'diastolic_bp', 'hrv_rmssd',
+    'qtc_baseline', 'baseline_lvef', 'num_cycles', 'dose_per_cycle'
+]
+INTEGER_COLUMNS = {'age', 'sex', 'num_cycles'}
+
+DEFAULT_MIX = 'predict=5,patient=2,history=2,stats=1'
+DEFAULT_SERVER_CMD = f'{sys.executable} -m flask --app app run --port {{port}} --no-reload --no-debugger --with-threads'
+
+# Compared metric -> True when higher is better
+COMPARED = {'throughput_rps': True, 'p50_ms': False, 'p95_ms': False, 'p99_ms': False}
+
+
+class PatientGenerator:
+    """Synthetic patients from per-class multivariate normals fitted to the risk*.csv cohorts."""
+
+    def __init__(self, csv_paths=RISK_CSVS, seed=42):
+        by_label = defaultdict(list)
+        for path in csv_paths:
+            with open(path, newline='') as f:
+                for row in csv.DictReader(f):
+                    by_label[row['risk_label']].append([float(row[c]) for c in SAMPLED_COLUMNS])
+        if not by_label:
+            raise ValueError("no risk*.csv rows to fit")
+
+        self.labels = sorted(by_label)
+        counts = np.array([len(by_label[l]) for l in self.labels], dtype=np.float64)
+        self.weights = counts / counts.sum()
+        self.classes = []
+        for label in self.labels:
+            data = np.asarray(by_label[label])
+            self.classes.append((data.mean(axis=0), np.cov(data, rowvar=False), data.min(axis=0), data.max(axis=0)))
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, n):
+        """n patients as dicts with database feature names."""
+        picks = self.rng.choice(len(self.labels), size=n, p=self.weights)
+        patients = []
+        for index in np.unique(picks):
+            mean, cov, lo, hi = self.classes[index]
+            draws = np.clip(self.rng.multivariate_normal(mean, cov, size=int((picks == index).sum())), lo, hi)
+            for draw in draws:
+                values = dict(zip(SAMPLED_COLUMNS, draw.tolist()))
+                for c in INTEGER_COLUMNS:
+                    values[c] = int(round(values[c]))
+                values['cumulative_dose'] = values['num_cycles'] * values['dose_per_cycle']
+                patients.append({CSV_COLUMN_MAP[k]: v for k, v in values.items()})
+        self.rng.shuffle(patients)
+        return patients
+
+
+class InProcessTarget:
+    name = 'inprocess'
+
+    def __init__(self):
+        use_bench_env('loadtest.db')
+        from app import app
+        self.app = app
+
+    def client(self):
+        test_client = self.app.test_client()
+        def request(method, path, body=None):
+            response = test_client.open(path, method=method, json=body)
+            return response.status_code, response.get_data()
+        return request
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    name = 'http'
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        parsed = urllib.parse.urlsplit(self.url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+
+    def client(self):
+        # One keep-alive connection per client thread; reopened after the server closes it
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        def request(method, path, body=None):
+            payload = json.dumps(body).encode() if body is not None else None
+            headers = {'Content-Type': 'application/json'} if payload is not None else {}
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                raise
+            return response.status, data
+        return request
+
+    def close(self):
+        pass
+
+
+class LaunchedTarget(HTTPTarget):
+    name = 'launch'
+
+    def __init__(self, server_cmd, startup_timeout=180):
+        port = free_port()
+        env = dict(os.environ)
+        env.setdefault('CARDIOTWIN_DB_PATH', os.path.join(tempfile.mkdtemp(), 'loadtest.db'))
+        self.proc = subprocess.Popen(shlex.split(server_cmd.format(port=port)), cwd=BACKEND_DIR, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        super().__init__(f'http://127.0.0.1:{port}')
+        self._wait_ready(startup_timeout)
+
+    def _wait_ready(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.proc.returncode}")
+            try:
+                with urllib.request.urlopen(self.url + '/health', timeout=2) as r:
+                    if json.load(r).get('model') == 'ready':
+                        return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.close()
+        raise RuntimeError("server did not become ready in time")
+
+    def close(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def history_path(rng, ctx):
+    if rng.random() < 0.5:
+        return f"/api/history?limit=50&patient_id={rng.choice(ctx['patient_ids'])}"
+    return '/api/history?limit=50'
+
+
+# endpoint -> rng, context -> (method, path, body)
+ENDPOINTS = {
+    'predict': lambda rng, ctx: ('POST', '/predict', {'features': rng.choice(ctx['patients'])}),
+    'patient': lambda rng, ctx: ('GET', f"/api/patient/{rng.choice(ctx['patient_ids'])}", None),
+    'history': lambda rng, ctx: ('GET', history_path(rng, ctx), None),
+    'stats': lambda rng, ctx: ('GET', '/api/stats', None),
+}
+
+
+def seed_patients(target, patients, prefix='LT'):
+    """Registers patients under fresh ids so /api/patient has something to read."""
+    request = target.client()
+    stamp = datetime.now().strftime('%H%M%S')
+    for i, patient in enumerate(patients):
+        status, _ = request('POST', '/api/register-patient', dict(patient, Patient_ID=f'{prefix}{stamp}-{i:05d}'))
+        if status >= 400:
+            raise RuntimeError(f"registering a patient failed with HTTP {status}")
+
+
+def stored_patient_ids(target):
+    status, body = target.client()('GET', '/api/patients')
+    if status >= 400:
+        raise RuntimeError(f"listing patients failed with HTTP {status}")
+    ids = [pid for group in json.loads(body).values() for pid in group]
+    if not ids:
+        raise RuntimeError("no patients stored on the target")
+    return ids
+
+
+def run_load(target, ctx, mix, concurrency, duration, warmup, seed):
+    """Returns ([(endpoint, latency_s, status)], measured_seconds); status 0 is a transport error."""
+    names, weights = list(mix), list(mix.values())
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    records = [[] for _ in range(concurrency)]
+
+    def worker(index):
+        request = target.client()
+        rng = random.Random(seed + index)
+        out = records[index]
+        while True:
+            name = rng.choices(names, weights)[0]
+            method, path, body = ENDPOINTS[name](rng, ctx)
+            t0 = time.perf_counter()
+            if t0 >= stop_at:
+                return
+            try:
+                status, _ = request(method, path, body)
+            except Exception:
+                status = 0
+            if t0 >= measure_from:
+                out.append((name, time.perf_counter() - t0, status))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Requests still in flight at stop_at count inside the window they started in
+    return [r for out in records for r in out], max(time.perf_counter(), stop_at) - measure_from
+
+
+def summarize(records, seconds):
+    groups = defaultdict(list)
+    for name, latency, status in records:
+        groups[name].append((latency, status))
+        groups['all'].append((latency, status))
+
+    summary = {}
+    for name, rows in sorted(groups.items()):
+        ms = np.array([r[0] for r in rows]) * 1000.0
+        statuses = defaultdict(int)
+        for _, status in rows:
+            statuses[str(status)] += 1
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        summary[name] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, status in rows if status == 0 or status >= 400),
+            "status_codes": dict(statuses),
+            "throughput_rps": round(len(rows) / seconds, 2),
+            "mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(ms.max()), 3)
+        }
+    return summary
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return {"commit": commit, "dirty": bool(dirty)}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def compare(current, meta, baseline, threshold):
+    """Prints the change per endpoint and returns the regressions beyond threshold (a fraction)."""
+    regressions = []
+    old_meta = baseline['meta']
+    print(f"\nCompared with {old_meta.get('git', {}).get('commit')} ({old_meta.get('timestamp')})")
+    for key in ('target', 'server_cmd', 'config', 'cpu_count'):
+        if old_meta.get(key) != meta.get(key):
+            print(f"  warning: {key} differs from the baseline run; the numbers are not like for like")
+    print(f"{'endpoint':<10} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>9}")
+    for name, stats in current.items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before[metric], stats[metric]
+            change = (new - old) / old if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, old, new))
+            print(f"{name:<10} {metric:<15} {old:>10.2f} {new:>10.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', choices=['inprocess', 'launch'], default='inprocess')
+    parser.add_argument('--url', help="Run against this server instead of --target")
+    parser.add_argument('--server-cmd', default=DEFAULT_SERVER_CMD,
+                        help="Command for --target launch, run in backend/; {port} is filled in")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help="Measured seconds")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Seconds of load before measuring")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="endpoint=weight,... from: " + ', '.join(ENDPOINTS))
+    parser.add_argument('--patients', type=int, default=2000, help="Synthetic patients to draw /predict bodies from")
+    parser.add_argument('--seed-patients', type=int, help="Patients to register first (default 200; 0 with --url)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Results JSON (default backend/benchmarks/results/loadtest-<commit>-<time>.json)")
+    parser.add_argument('--compare', help="Earlier results JSON to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit 1 when --compare finds a regression")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    generator = PatientGenerator(seed=args.seed)
+    patients = generator.sample(args.patients)
+
+    if args.url:
+        target = HTTPTarget(args.url)
+    elif args.target == 'launch':
+        print("Starting server...")
+        target = LaunchedTarget(args.server_cmd)
+    else:
+        target = InProcessTarget()
+
+    try:
+        seed_count = args.seed_patients if args.seed_patients is not None else (0 if args.url else 200)
+        if seed_count:
+            seed_patients(target, generator.sample(seed_count))
+        ctx = {"patients": patients, "patient_ids": stored_patient_ids(target)}
+
+        print(f"{target.name} target, {args.concurrency} clients, {args.warmup:g}s warm-up + {args.duration:g}s, mix {args.mix}")
+        records, seconds = run_load(target, ctx, mix, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        target.close()
+
+    results = summarize(records, seconds)
+    print(f"\n{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in results.items():
+        print(f"{name:<10} {s['requests']:>9} {s['errors']:>7} {s['throughput_rps']:>9.1f} "
+              f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}")
+
+    git = git_revision()
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec='seconds'),
+            "git": git,
+            "target": args.url or target.name,
+            "server_cmd": args.server_cmd if args.target == 'launch' and not args.url else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+                "mix": mix, "patients": args.patients, "seed_patients": seed_count, "seed": args.seed
+            }
+        },
+        "results": results
+    }
+    path = args.output
+    if not path:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(RESULTS_DIR, f"loadtest-{git['commit'] or 'nogit'}-{stamp}.json")
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nSaved {path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, output['meta'], json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Backend startup-time report: how long until /health answers, the model is
+ready and the first /predict returns, and where `import app` plus the model
+load spend their time, per package (from `python -X importtime`).
+
+The breakdown comes from a second run that loads the model synchronously
+(CARDIOTWIN_MODEL_BACKGROUND_LOAD=0), so every import nests under `app`
+instead of interleaving with the background loader's.
+
+Usage (from repo root):
+    python backend/benchmarks/startup_report.py
+    python backend/benchmarks/startup_report.py --top 25 --format flat
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Timed in a fresh interpreter; prints one JSON line
+MILESTONES = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {backend!r})
+import app as app_module
+t_import = time.perf_counter()
+client = app_module.app.test_client()
+health = client.get('/health').get_json()
+t_health = time.perf_counter()
+predictor = app_module.predictor
+while predictor.model_status == 'loading':
+    time.sleep(0.005)
+t_ready = time.perf_counter()
+client.post('/predict', json={{'features': {{'age_years': 50}}}})
+t_predict = time.perf_counter()
+sys.stdout.write('\nSTARTUP ' + json.dumps({{
+    'import_app': t_import - t0,
+    'health': t_health - t0,
+    'health_model_state': health.get('model'),
+    'model_ready': t_ready - t0,
+    'first_predict': t_predict - t0,
+    'model_status': predictor.model_status,
+    'lazy_genai_loaded': 'google.generativeai' in sys.modules,
+    'pandas_loaded': 'pandas' in sys.modules,
+}}) + '\n')
+"""
+
+# Run under -X importtime with the model loaded during import
+BREAKDOWN = r"""
+import sys
+sys.path.insert(0, {backend!r})
+import app
+app.predictor.predict({{'age_years': 50}})
+"""
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--format', choices=['pickle', 'flat'], help="CARDIOTWIN_MODEL_FORMAT for the run")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Keep the report away from the real history database
+    env.setdefault('CARDIOTWIN_DB_PATH', os.path.join(tempfile.mkdtemp(), 'startup.db'))
+    if args.format:
+        env['CARDIOTWIN_MODEL_FORMAT'] = args.format
+
+    proc = subprocess.run([sys.executable, '-c', MILESTONES.format(backend=BACKEND_DIR)],
+                          capture_output=True, text=True, env=env)
+    marker = [line for line in proc.stdout.splitlines() if line.startswith('STARTUP ')]
+    if proc.returncode != 0 or not marker:
+        print(proc.stderr[-2000:])
+        sys.exit("startup run failed")
+    timings = json.loads(marker[-1][len('STARTUP '):])
+
+    env['CARDIOTWIN_MODEL_BACKGROUND_LOAD'] = '0'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', BREAKDOWN.format(backend=BACKEND_DIR)],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        sys.exit("import-time run failed")
+    entries = parse_importtime(proc.stderr)
+
+    # Self time summed per top-level package adds up to the total import time
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split('.')[0]] += self_us
+    total_us = sum(by_package.values())
+
+    print("Startup milestones (seconds since `import app` began)")
+    for key in ('import_app', 'health', 'model_ready', 'first_predict'):
+        print(f"  {key:<15} {timings[key]:8.3f}")
+    print(f"  /health reported model={timings['health_model_state']}; "
+          f"google.generativeai loaded: {timings['lazy_genai_loaded']}, pandas loaded: {timings['pandas_loaded']}")
+
+    print(f"\nImport time by package (self time, model loaded during import; total {total_us / 1e6:.3f}s)")
+    for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {package:<28} {us / 1000:9.1f} ms  {us / total_us:6.1%}")
+
+    print("\nSlowest imports made directly by app.py and its utils (cumulative)")
+    app_index = next(i for i, e in enumerate(entries) if e[0] == 'app')
+    direct = [e for e in entries[:app_index] if e[3] == 1]
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"  {name:<40} {cumulative_us / 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
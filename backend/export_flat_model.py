@@ -0,0 +1,71 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+# Add current dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.flat_model import FlatTreeModel, flatten_model, check_parity
+from utils.model_registry import sha256_file
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, 'cardiotoxicity_model.pkl')
+OUT_DIR = os.path.join(BASE_DIR, 'backend', 'model', 'flat')
+PARITY_CSVS = ['risk.csv', 'risk2.csv', 'risk3.csv']
+
+# Model input order, as raw CSV column names
+CSV_FEATURES = [
+    'age', 'sex', 'resting_hr', 'systolic_bp', 'diastolic_bp', 'hrv_rmssd',
+    'qtc_baseline', 'baseline_lvef', 'num_cycles', 'dose_per_cycle', 'cumulative_dose'
+]
+
+def load_csv_matrix(path):
+    with open(path, newline='') as f:
+        return np.array([[float(row[c]) for c in CSV_FEATURES] for row in csv.DictReader(f)], dtype=np.float64)
+
+def export(model_path=MODEL_PATH, out_dir=OUT_DIR):
+    print(f"Loading model from {model_path}")
+    model = joblib.load(model_path)
+
+    flat = flatten_model(model)
+    # Lets the server tell this export apart from other model versions
+    flat.meta['source_sha256'] = sha256_file(model_path)
+    flat.save(out_dir)
+    print(f"Exported {flat.n_trees} trees / {len(flat.feature)} nodes to {out_dir}")
+
+    # Round-trip through disk so parity covers the saved artifact
+    flat = FlatTreeModel.load(out_dir)
+
+    for name in PARITY_CSVS:
+        path = os.path.join(BASE_DIR, name)
+        if not os.path.exists(path):
+            print(f"  {name}: not found, skipped")
+            continue
+        X = load_csv_matrix(path)
+        max_diff, agreement = check_parity(model, flat, X)
+        print(f"  {name}: {len(X)} rows, max |dp| = {max_diff:.2e}, class agreement = {agreement:.2%}")
+
+    X = load_csv_matrix(os.path.join(BASE_DIR, PARITY_CSVS[0]))
+    for label, rows in (("single row", X[:1]), (f"batch of {len(X)}", X)):
+        n = 200 if len(rows) == 1 else 5
+        start = time.perf_counter()
+        for _ in range(n):
+            model.predict_proba(rows)
+        t_model = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for _ in range(n):
+            flat.predict_proba(rows)
+        t_flat = (time.perf_counter() - start) / n
+        print(f"  {label}: predict_proba {t_model * 1000:.3f} ms, flat {t_flat * 1000:.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flatten the tree ensemble into NumPy arrays and check parity.")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--out', default=OUT_DIR)
+    args = parser.parse_args()
+    export(args.model, args.out)
@@ -0,0 +1,87 @@
+"""
+Gunicorn settings for production serving:
+
+    cd backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is imported once in the master (preload_app), so the model is loaded
+and the database schema applied before any worker exists. Workers are forked
+from it and share those pages copy-on-write; CARDIOTWIN_MODEL_FORMAT=flat
+keeps the shared model in a few large arrays that workers never write to.
+
+Environment:
+    PORT                            listen port (5000)
+    CARDIOTWIN_BIND                 full bind address, overrides PORT
+    CARDIOTWIN_WORKERS              worker processes (CPU count)
+    CARDIOTWIN_THREADS              threads per worker (4)
+    CARDIOTWIN_GRACEFUL_TIMEOUT     seconds a stopping worker gets to finish
+                                    its requests (30)
+    CARDIOTWIN_WORKER_TIMEOUT       seconds before a stuck worker is killed (60)
+    CARDIOTWIN_MAX_REQUESTS         recycle a worker after this many requests
+                                    (0 = never)
+
+A model activated through POST /api/admin/models/<v>/activate (or
+register_model.py --activate) is written to the registry's ACTIVE file.
+Every worker picks it up within CARDIOTWIN_MODEL_CHECK_SECONDS, and
+workers forked later load it before serving, instead of the master's copy.
+
+SIGTERM or SIGINT stops the server gracefully: workers stop accepting,
+finish in-flight requests, then commit the write-behind queue and close
+their connections before exiting. Chat sessions are stored in SQLite and
+shared by all workers; metrics and profiles are per worker.
+"""
+import gc
+import os
+
+bind = os.environ.get('CARDIOTWIN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('CARDIOTWIN_WORKERS', os.cpu_count() or 1))
+# Threads overlap SQLite and LLM waits inside each worker; SSE streams hold one
+threads = int(os.environ.get('CARDIOTWIN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+graceful_timeout = int(os.environ.get('CARDIOTWIN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('CARDIOTWIN_WORKER_TIMEOUT', 60))
+keepalive = 5
+max_requests = int(os.environ.get('CARDIOTWIN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+# Read by app.py when the master preloads it. The model must be in place
+# before fork: a background loader thread would not be copied into workers.
+os.environ['CARDIOTWIN_MODEL_BACKGROUND_LOAD'] = '0'
+if workers > 1:
+    # Dashboard aggregates are per worker; rebuild them from the shared
+    # database so every worker reports the others' assessments too
+    os.environ.setdefault('CARDIOTWIN_STATS_REFRESH_SECONDS', '5')
+
+
+def when_ready(server):
+    # Runs in the master after the preload, before the first fork
+    from app import patient_service
+
+    # Workers open their own SQLite connections; don't leave the master's
+    # open for them to inherit
+    patient_service.db.close()
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers don't write to (and so copy) shared pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"CardioTwin preloaded; starting {workers} worker(s) x {threads} thread(s)")
+
+
+def post_fork(server, worker):
+    # Threads started in the master don't survive the fork
+    from app import patient_service, predictor
+
+    patient_service.start_stats_refresher()
+    # The master holds the model ACTIVE named at preload; a version
+    # activated since then is loaded before this worker serves
+    status = predictor.sync_active(wait=True)
+    if status:
+        server.log.info(f"Worker {worker.pid}: model {status.get('version')} {status['state']}")
+
+
+def worker_exit(server, worker):
+    from app import shutdown_services
+
+    shutdown_services()
+    server.log.info(f"Worker {worker.pid}: history queue drained, connections closed")
@@ -0,0 +1,80 @@
+"""
+Adds a trained model to the versioned model registry.
+
+Usage (from repo root):
+    python backend/register_model.py cardiotoxicity_model.pkl --notes "retrained on risk3.csv"
+    python backend/register_model.py cardiotoxicity_model.pkl --version v2 --activate
+    python backend/register_model.py --list
+
+--activate marks the version ACTIVE on disk; running servers load it within
+CARDIOTWIN_MODEL_CHECK_SECONDS (and so does POST
+/api/admin/models/<version>/activate, which every worker follows).
+"""
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+
+# Add current dir to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.flat_model import flatten_model, check_parity
+from utils.model_registry import ModelRegistry, sha256_file
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.environ.get('CARDIOTWIN_MODEL_REGISTRY', os.path.join(BASE_DIR, 'model_registry'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Register a model version.")
+    parser.add_argument('model_path', nargs='?', help="Pickled model (joblib) to register")
+    parser.add_argument('--version', help="Version name (default: v<timestamp>)")
+    parser.add_argument('--notes', default='')
+    parser.add_argument('--activate', action='store_true', help="Mark the new version ACTIVE")
+    parser.add_argument('--no-flat', action='store_true', help="Skip the flattened-array export")
+    parser.add_argument('--list', action='store_true', help="List registered versions")
+    parser.add_argument('--registry', default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+
+    if args.list:
+        active = registry.active_version()
+        for m in registry.list_versions():
+            marker = '*' if m['version'] == active else ' '
+            print(f"{marker} {m['version']:<20} {m['sha256'][:12]}  {m['size']:>10} bytes  {m.get('notes', '')}")
+        return
+    if not args.model_path:
+        parser.error("model_path is required unless --list is given")
+
+    # Refuse files the service could not load
+    model = joblib.load(args.model_path)
+    if not hasattr(model, 'predict_proba'):
+        sys.exit(f"{args.model_path} has no predict_proba; not registering")
+
+    # Flattened arrays let workers memory-map the model (CARDIOTWIN_MODEL_FORMAT=flat)
+    flat = None
+    if not args.no_flat:
+        try:
+            flat = flatten_model(model)
+            flat.meta['source_sha256'] = sha256_file(args.model_path)
+            check_parity(model, flat, np.random.default_rng(0).uniform(0, 500, size=(200, flat.n_features)))
+        except Exception as e:
+            print(f"Flat export skipped: {e}")
+            flat = None
+
+    try:
+        manifest = registry.register(args.model_path, version=args.version, notes=args.notes, flat_model=flat)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Registered {manifest['version']} (sha256 {manifest['sha256'][:12]}) in {args.registry}")
+
+    if args.activate:
+        registry.set_active(manifest['version'])
+        print(f"Marked {manifest['version']} active")
+
+
+if __name__ == "__main__":
+    main()
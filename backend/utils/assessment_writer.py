@@ -0,0 +1,242 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import weakref
+
+# Marker telling the writer thread to commit what it has right away
+_FLUSH = object()
+_STOP = object()
+
+INSERT_ASSESSMENT = """
+    INSERT INTO assessments (
+        assessment_id, timestamp, patient_id, risk_level,
+        risk_score, input_data, prediction_details
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Writers not yet closed, drained at interpreter exit. Weak, so a writer
+# that is dropped without close() can still be collected.
+_open_writers = weakref.WeakSet()
+
+
+def _close_open_writers():
+    for writer in list(_open_writers):
+        writer.close()
+
+
+atexit.register(_close_open_writers)
+
+
+class AssessmentWriter:
+    """
+    Write-behind queue for assessment history rows.
+
+    Request threads submit ready-to-insert parameter tuples and return
+    immediately; a background thread drains the bounded queue and commits
+    rows in batched transactions through DBManager.execute_many. A batch is
+    committed when it reaches batch_size rows, when flush_interval seconds
+    have passed since its first row, on flush(), and on close()/interpreter
+    exit.
+
+    If the queue stays full for put_timeout seconds the row is written
+    synchronously instead of being dropped.
+
+    on_written(rows), if given, is called with the rows of each successful
+    commit, inside commit_lock together with the commit itself; rows that
+    fail are never passed to it.
+    """
+
+    def __init__(self, db, max_queue=10000, batch_size=256, flush_interval=0.25,
+                 put_timeout=1.0, insert_query=INSERT_ASSESSMENT, on_written=None, commit_lock=None):
+        self.db = db
+        self.on_written = on_written
+        self._commit_lock = commit_lock or threading.Lock()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.insert_query = insert_query
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        # Process whose queue this is: the creator, then the one running the thread
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.sync_writes = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+        _open_writers.add(self)
+
+    def submit(self, params):
+        """Queues one INSERT parameter tuple. Returns without touching the database."""
+        if self._closed:
+            self._write_sync([params])
+            return
+        self._ensure_started()
+        try:
+            self._queue.put(params, timeout=self.put_timeout)
+            with self._stats_lock:
+                self.enqueued += 1
+        except queue.Full:
+            with self._stats_lock:
+                self.sync_writes += 1
+            self._write_sync([params])
+
+    def flush(self, timeout=None):
+        """Blocks until every row submitted so far is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_FLUSH)
+        self._wait_drained(timeout)
+
+    def close(self, timeout=10.0):
+        """Commits everything still queued and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        _open_writers.discard(self)
+        if self._pid != os.getpid():
+            # Forked from the process that owns the queue: the queued rows
+            # are that process's copy and it commits them itself
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+        # Anything that raced in behind the stop marker
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _FLUSH and item is not _STOP:
+                leftovers.append(item)
+        if leftovers:
+            self._write_sync(leftovers)
+
+    def stats(self):
+        with self._stats_lock:
+            return self._stats()
+
+    def _stats(self):
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "sync_writes": self.sync_writes,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3)
+        }
+
+    def _ensure_started(self):
+        # Threads don't survive fork(); a forked worker starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="assessment-writer", daemon=True)
+            self._thread.start()
+
+    def _wait_drained(self, timeout):
+        done = threading.Event()
+
+        def waiter():
+            self._queue.join()
+            done.set()
+
+        threading.Thread(target=waiter, daemon=True).start()
+        done.wait(timeout)
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _FLUSH and item is not _STOP:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.batch_size:
+                    continue
+
+            # Size reached, interval elapsed, or an explicit flush/stop
+            if batch:
+                self._commit(batch)
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+            deadline = None
+
+            if item is _FLUSH or item is _STOP:
+                self._queue.task_done()
+            if item is _STOP:
+                return
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        with self._commit_lock:
+            ok = self.db.execute_many(self.insert_query, batch)
+            if ok:
+                self._notify(batch)
+        if ok:
+            with self._stats_lock:
+                self.written += len(batch)
+        else:
+            # One bad row shouldn't cost the whole batch
+            self._write_sync(batch)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        with self._stats_lock:
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+
+    def _write_sync(self, rows):
+        for params in rows:
+            with self._commit_lock:
+                ok = self.db.execute_query(self.insert_query, params, commit=True) is not None
+                if ok:
+                    self._notify([params])
+            with self._stats_lock:
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+
+    def _notify(self, rows):
+        if self.on_written is None:
+            return
+        try:
+            self.on_written(rows)
+        except Exception as e:
+            # The rows are committed; a failing callback must not stop the writer
+            print(f"AssessmentWriter: on_written failed: {e}")
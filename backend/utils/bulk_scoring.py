@@ -0,0 +1,83 @@
+import csv
+import json
+from itertools import islice
+
+from .feature_schema import normalize_record
+from .mapper import map_predictions_to_visuals
+
+
+def iter_text_lines(stream, encoding='utf-8'):
+    """Decodes a binary stream (e.g. request.stream) line by line without buffering it whole."""
+    for raw in stream:
+        yield raw.decode(encoding) if isinstance(raw, bytes) else raw
+
+
+def iter_csv_records(lines):
+    """CSV rows as dicts keyed by the header row."""
+    yield from csv.DictReader(lines)
+
+
+def iter_ndjson_records(lines):
+    """One JSON object per line; blank lines are skipped, bad lines become {'_error': ...}."""
+    for n, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {'_error': f"line {n}: invalid JSON ({e})"}
+            continue
+        if not isinstance(record, dict):
+            yield {'_error': f"line {n}: expected a JSON object"}
+            continue
+        # Accept the /predict body shape too
+        features = record.get('features')
+        yield features if isinstance(features, dict) else record
+
+
+def iter_chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_chunk(predictor, records, start_index=0):
+    """
+    Normalizes a chunk of raw records, scores it with one predict_batch call
+    and returns one result dict per record, in order.
+    """
+    results = [None] * len(records)
+    rows, positions = [], []
+    for i, record in enumerate(records):
+        if '_error' in record:
+            results[i] = {"row": start_index + i, "error": record['_error']}
+            continue
+        rows.append(normalize_record(record))
+        positions.append(i)
+
+    predictions = predictor.predict_batch(rows) if rows else []
+    if isinstance(predictions, dict):
+        # Whole-chunk failure (e.g. model not loaded)
+        predictions = [predictions] * len(rows)
+
+    scored = []
+    for i, features, prediction in zip(positions, rows, predictions):
+        results[i] = {
+            "row": start_index + i,
+            "patient_id": features.get('patient_id')
+        }
+        if "error" in prediction:
+            results[i]["error"] = prediction["error"]
+        else:
+            results[i]["prediction"] = prediction
+            scored.append((i, features, prediction))
+
+    # Visuals for the whole chunk in one vectorized pass
+    visuals = map_predictions_to_visuals([p for _, _, p in scored], [f for _, f, _ in scored])
+    for (i, _, _), visual in zip(scored, visuals):
+        results[i]["visuals"] = visual
+    return results
@@ -0,0 +1,216 @@
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# History entries at the start of every session that trimming keeps: the
+# system instruction and the model's acknowledgement
+PINNED_MESSAGES = 2
+
+LOAD_QUERY = "SELECT mode, patient_context, history, revision, expires_at FROM chat_sessions WHERE session_id = ?"
+
+SAVE_QUERY = """
+    INSERT OR REPLACE INTO chat_sessions (session_id, mode, patient_context, history, revision, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+DELETE_QUERY = "DELETE FROM chat_sessions WHERE session_id = ?"
+
+PRUNE_EXPIRED_QUERY = "DELETE FROM chat_sessions WHERE expires_at < ?"
+
+# Keeps the max_sessions sessions that expire last
+PRUNE_OLDEST_QUERY = """
+    DELETE FROM chat_sessions WHERE session_id IN (
+        SELECT session_id FROM chat_sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+    )
+"""
+
+
+def context_key(patient_context):
+    """
+    patient_context as the string sessions store and compare: clients send
+    a JSON string or an object, and an object is serialized with sorted keys.
+    """
+    if patient_context is None or isinstance(patient_context, str):
+        return patient_context
+    return json.dumps(patient_context, sort_keys=True, default=str)
+
+
+def history_to_json(history):
+    """Chat history (SDK Content objects or dicts) as JSON of {role, parts: [text]} entries."""
+    entries = []
+    for item in history:
+        if isinstance(item, dict):
+            role, parts = item.get('role'), item.get('parts', [])
+        else:
+            role, parts = item.role, item.parts
+        texts = []
+        for part in parts:
+            if isinstance(part, str):
+                texts.append(part)
+            elif isinstance(part, dict):
+                texts.append(part.get('text', ''))
+            else:
+                texts.append(getattr(part, 'text', ''))
+        entries.append({"role": role, "parts": texts})
+    return json.dumps(entries)
+
+
+class SessionNotFound(Exception):
+    """The session expired or was evicted and the client sent no context to start a new one."""
+
+
+class ChatSession:
+    """One conversation: the live SDK chat object and what its instruction was built from."""
+
+    def __init__(self, session_id, chat, mode, patient_context):
+        self.id = session_id
+        self.chat = chat
+        self.mode = mode
+        self.patient_context = patient_context
+        # Turns of one session run one at a time; their history must not interleave
+        self.lock = threading.Lock()
+        self.turns = 0
+        # Stored revision this chat object reflects (shared stores only)
+        self.revision = 0
+
+
+class ChatSessionStore:
+    """
+    Thread-safe LRU store with an idle TTL for chat sessions.
+
+    A session keeps its chat object between requests, so clients send only
+    the new message. Its history is the pinned instruction exchange plus
+    the last max_turns question/answer pairs; older turns roll off, which
+    keeps the prompt sent to the model bounded however long the chat runs.
+
+    Without a database, sessions live in this process only. With one
+    (attach()), every save writes the session to the chat_sessions table,
+    so any server worker can continue it. The chat objects held here are
+    then a cache: get() reuses one only while its revision matches the
+    stored row, and otherwise rebuilds it from the stored history.
+    Concurrent turns of one session in two processes are not merged; the
+    last one saved wins.
+    """
+
+    def __init__(self, max_sessions=512, ttl_seconds=1800, max_turns=8, db=None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.db = db
+        self._sessions = OrderedDict()  # id -> (expires_at, ChatSession)
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.trimmed = 0
+
+    @staticmethod
+    def new_id():
+        return secrets.token_urlsafe(16)
+
+    def attach(self, db):
+        """Shares sessions between processes through db (a DBManager)."""
+        self.db = db
+
+    def get(self, session_id, start_chat=None):
+        """
+        The session, or None if it is unknown or expired. With a database,
+        start_chat(history=...) builds the chat object for a session that
+        another process saved more recently than this one.
+        """
+        if self.db is not None:
+            return self._get_shared(session_id, start_chat)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at < now:
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            # Idle TTL: every use extends the session
+            self._sessions[session_id] = (now + self.ttl_seconds, session)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _get_shared(self, session_id, start_chat):
+        rows = self.db.execute_query(LOAD_QUERY, (session_id,))
+        if not rows or rows[0]['expires_at'] < time.time():
+            with self._lock:
+                if self._sessions.pop(session_id, None) is not None or rows:
+                    self.expirations += 1
+            return None
+        row = rows[0]
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            session = entry[1] if entry else None
+        if session is None or session.revision != row['revision']:
+            if start_chat is None:
+                return None
+            session = ChatSession(session_id, start_chat(history=json.loads(row['history'])),
+                                  row['mode'], row['patient_context'])
+            session.revision = row['revision']
+        self._cache(session)
+        return session
+
+    def _cache(self, session):
+        with self._lock:
+            self._sessions[session.id] = (time.monotonic() + self.ttl_seconds, session)
+            self._sessions.move_to_end(session.id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, session):
+        with self._lock:
+            self.created += 1
+        self._cache(session)
+        if self.db is not None:
+            self.save(session)
+            # New sessions are rare next to turns; tidy the table here
+            self.db.execute_query(PRUNE_EXPIRED_QUERY, (time.time(),), commit=True)
+            self.db.execute_query(PRUNE_OLDEST_QUERY, (self.max_sessions,), commit=True)
+
+    def save(self, session):
+        """Stores the session's current history. Call with session.lock held (or before it is shared)."""
+        if self.db is None:
+            return
+        session.revision += 1
+        self.db.execute_query(SAVE_QUERY, (
+            session.id, session.mode, session.patient_context, history_to_json(session.chat.history),
+            session.revision, time.time() + self.ttl_seconds
+        ), commit=True)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.db is not None:
+            self.db.execute_query(DELETE_QUERY, (session_id,), commit=True)
+
+    def trim(self, session):
+        """Drops the oldest turns beyond max_turns. Call with session.lock held."""
+        history = session.chat.history
+        keep = 2 * self.max_turns
+        if len(history) > PINNED_MESSAGES + keep:
+            session.chat.history = list(history[:PINNED_MESSAGES]) + list(history[len(history) - keep:])
+            with self._lock:
+                self.trimmed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "shared": self.db is not None,
+                "size": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_turns": self.max_turns,
+                "created": self.created,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "trimmed": self.trimmed
+            }
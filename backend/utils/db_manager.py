@@ -1,17 +1,104 @@
 import sqlite3
 import os
 import sys
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from .metrics import registry
+
+DB_QUERY_SECONDS = registry.histogram(
+    'cardiotwin_db_query_seconds',
+    'SQLite statement time including commit, by statement type',
+    ['operation']
+)
+DB_ERRORS = registry.counter('cardiotwin_db_errors_total', 'Failed SQLite statements', ['operation'])
+
+def _operation(query):
+    # SELECT / INSERT / UPDATE / ...: a label with a handful of values
+    words = query.split(None, 1)
+    return words[0].upper() if words else 'UNKNOWN'
 
 class DBManager:
-    def __init__(self, db_path):
+    # Connection tuning applied to every pooled connection
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-16000",  # ~16 MB page cache per connection
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+    )
+
+    def __init__(self, db_path, pool_size=8, cached_statements=256):
         self.db_path = db_path
+        # Idle connections kept for reuse; extra ones are opened on demand
+        # under load and closed when the pool is already full.
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._pid = os.getpid()
+        self._inherited = []
+        self._lock = threading.Lock()
         self._init_db()
 
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        # check_same_thread=False: a pooled connection is handed between
+        # request threads, but only ever used by one of them at a time.
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
         conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
         return conn
 
+    def _acquire(self):
+        if os.getpid() != self._pid:
+            self._reset_after_fork()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._get_connection()
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _reset_after_fork(self):
+        # SQLite connections must not cross fork(); keep the parent's
+        # references alive (closing them here would touch shared state)
+        # and start a fresh pool in this process.
+        with self._lock:
+            if os.getpid() == self._pid:
+                return
+            self._inherited.append(self._pool)
+            self._pool = queue.LifoQueue(maxsize=self.pool_size)
+            self._pid = os.getpid()
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out of the pool for the duration of the block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Closes all idle pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     def _init_db(self):
         # Create database and tables if they don't exist
         # Schema is in root/database/schema.sql
@@ -25,8 +112,8 @@ class DBManager:
         with open(schema_path, 'r') as f:
             schema = f.read()
 
-        conn = self._get_connection()
-        try:
+        with self.connection() as conn:
+            self._upgrade_schema(conn)
             conn.executescript(schema)
             conn.commit()
             
@@ -34,6 +121,8 @@ class DBManager:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as count FROM patients")
             count = cursor.fetchone()['count']
+            # Don't return the connection with an open read statement
+            cursor.close()
             
             if count == 0:
                 print("Database initialized. Seeding initial data...")
@@ -47,35 +136,49 @@ class DBManager:
                     print(f"Warning: Could not import migrate_data for seeding: {e}")
                 except Exception as e:
                     print(f"Error during auto-seeding: {e}")
-                    
-        finally:
-            conn.close()
+
+    def _upgrade_schema(self, conn):
+        """Brings databases created from an older schema.sql up to date."""
+        columns = [row['name'] for row in conn.execute("PRAGMA table_xinfo(assessments)")]
+        if columns and 'assessment_date' not in columns:
+            print("Upgrading assessments table: adding assessment_date column")
+            conn.execute(
+                "ALTER TABLE assessments ADD COLUMN assessment_date TEXT "
+                "GENERATED ALWAYS AS (substr(timestamp, 1, 10)) VIRTUAL"
+            )
+            conn.commit()
 
     def execute_query(self, query, params=(), commit=False):
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            if commit:
-                conn.commit()
-                return cursor.lastrowid
-            return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
-            print(f"Database Error: {e}")
-            return None
-        finally:
-            conn.close()
+        operation = _operation(query)
+        with self.connection() as conn:
+            start = time.perf_counter()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                if commit:
+                    conn.commit()
+                    return cursor.lastrowid
+                return [dict(row) for row in cursor.fetchall()]
+            except Exception as e:
+                print(f"Database Error: {e}")
+                DB_ERRORS.inc(operation=operation)
+                return None
+            finally:
+                DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
 
     def execute_many(self, query, params_list, commit=True):
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.executemany(query, params_list)
-            if commit:
-                conn.commit()
-            return True
-        except Exception as e:
-            print(f"Database Error: {e}")
-            return False
-        finally:
-            conn.close()
+        operation = _operation(query)
+        with self.connection() as conn:
+            start = time.perf_counter()
+            try:
+                cursor = conn.cursor()
+                cursor.executemany(query, params_list)
+                if commit:
+                    conn.commit()
+                return True
+            except Exception as e:
+                print(f"Database Error: {e}")
+                DB_ERRORS.inc(operation=operation)
+                return False
+            finally:
+                DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
@@ -0,0 +1,63 @@
+"""
+Column names shared by the model, the database and the CSV exports.
+
+Cohort exports (risk*.csv, sample_patient_data_20_labeled.csv) use short raw
+names such as 'age' or 'resting_hr'; the patients table and the model use
+the long names below.
+"""
+
+# Model input order
+FEATURE_NAMES = [
+    'age_years', 'sex_binary', 'resting_heart_rate_bpm',
+    'systolic_bp_mmHg', 'diastolic_bp_mmHg', 'heart_rate_variability_rmssd',
+    'qtc_interval_ms', 'baseline_lvef_percent', 'chemo_cycles_count',
+    'dose_per_cycle_mg_per_m2', 'cumulative_dose_mg_per_m2'
+]
+
+# Raw export column -> database / model column
+CSV_COLUMN_MAP = {
+    'Patient_ID': 'patient_id',
+    'age': 'age_years',
+    'sex': 'sex_binary',
+    'resting_hr': 'resting_heart_rate_bpm',
+    'systolic_bp': 'systolic_bp_mmHg',
+    'diastolic_bp': 'diastolic_bp_mmHg',
+    'hrv_rmssd': 'heart_rate_variability_rmssd',
+    'qtc_baseline': 'qtc_interval_ms',
+    'baseline_lvef': 'baseline_lvef_percent',
+    'num_cycles': 'chemo_cycles_count',
+    'dose_per_cycle': 'dose_per_cycle_mg_per_m2',
+    'cumulative_dose': 'cumulative_dose_mg_per_m2',
+    'risk_label': 'status_label'
+}
+
+# Export risk labels -> status_label values
+RISK_LABEL_MAP = {
+    'Low': 'Safe',
+    'Moderate': 'Warning',
+    'High': 'Critical'
+}
+
+
+def normalize_record(record):
+    """
+    Renames raw export columns to their database names and coerces model
+    features to float. Columns that already use the long name win over their
+    raw alias; unknown columns are passed through untouched. Feature values
+    that are empty or not numeric are dropped so the predictor's default
+    applies.
+    """
+    out = {}
+    for key, value in record.items():
+        name = CSV_COLUMN_MAP.get(key, key)
+        if name != key and name in record:
+            continue
+        out[name] = value
+
+    for name in FEATURE_NAMES:
+        if name in out:
+            try:
+                out[name] = float(out[name])
+            except (TypeError, ValueError):
+                del out[name]
+    return out
@@ -0,0 +1,321 @@
+import json
+import os
+import numpy as np
+
+# Missing-value handling codes, mirroring LightGBM's missing_type
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_CODES = {'None': MISSING_NONE, 'Zero': MISSING_ZERO, 'NaN': MISSING_NAN}
+
+# LightGBM treats |x| <= kZeroThreshold as zero
+_ZERO_THRESHOLD = 1e-35
+
+# Arrays written to / read from an export directory, one .npy each
+ARRAY_NAMES = [
+    'feature', 'threshold', 'left', 'right', 'value',
+    'default_left', 'missing_type', 'tree_roots', 'tree_class', 'classes'
+]
+
+# Lookup arrays derived from the ones above. They are saved too, so a
+# memory-mapped load shares them between processes instead of rebuilding
+# a private copy in each one.
+DERIVED_NAMES = ['_split_feature', '_children', '_roots', '_tree_to_class']
+
+
+class FlatTreeModel:
+    """
+    A tree ensemble flattened into contiguous NumPy arrays.
+
+    Every node of every tree lives in the same arrays, addressed by a global
+    node index:
+      feature       int32   split feature, -1 for leaves
+      threshold     float64 go left when x <= threshold
+      left, right   int32   child node indices (leaves point at themselves)
+      value         float64 (n_nodes, n_outputs) leaf output
+      default_left  bool    direction for missing values
+      missing_type  int8    MISSING_NONE / MISSING_ZERO / MISSING_NAN
+      tree_roots    int32   root node of each tree
+      tree_class    int32   output column each tree adds to (-1 = all columns)
+
+    predict_proba walks all trees for all rows at once, one tree level per
+    step, so it needs nothing beyond NumPy.
+    """
+
+    def __init__(self, arrays, meta):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.meta = meta
+        self.aggregation = meta['aggregation']
+        self.max_depth = int(meta['max_depth'])
+        self.input_dtype = np.dtype(meta.get('input_dtype', 'float64'))
+        self.n_features = int(meta['n_features'])
+        self.classes_ = self.classes
+
+        self._has_zero_missing = bool(np.any(self.missing_type == MISSING_ZERO))
+        if all(name in arrays for name in DERIVED_NAMES):
+            for name in DERIVED_NAMES:
+                setattr(self, name, arrays[name])
+            return
+
+        # Leaves read feature 0 and loop back to themselves, so every
+        # (row, tree) pair can take max_depth steps without branching
+        self._split_feature = np.maximum(self.feature, 0)
+        # Interleaved [left, right] pairs: next = _children[2 * node + went_right]
+        # (kept as intp so the per-level gathers need no index conversion)
+        self._children = np.column_stack((self.left, self.right)).ravel().astype(np.intp)
+        self._roots = self.tree_roots.astype(np.intp)
+
+        # (n_trees, n_outputs) 0/1 matrix summing each tree into its class
+        n_outputs = int(self.tree_class.max()) + 1 if len(self.tree_class) and self.tree_class.max() >= 0 else 1
+        self._tree_to_class = np.zeros((len(self.tree_roots), n_outputs))
+        routed = self.tree_class >= 0
+        self._tree_to_class[np.flatnonzero(routed), self.tree_class[routed]] = 1.0
+
+    @property
+    def n_trees(self):
+        return len(self.tree_roots)
+
+    def predict_raw(self, X):
+        """Sum (or mean) of leaf outputs per class, before the link function."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.input_dtype != np.float64:
+            # sklearn trees compare float32-cast inputs
+            X = X.astype(self.input_dtype).astype(np.float64)
+
+        n_rows = X.shape[0]
+        # Flat (row, tree) layout: one gather per array per tree level
+        nodes = np.tile(self._roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows, dtype=np.int64) * X.shape[1], self.n_trees)
+        X_flat = np.ascontiguousarray(X).ravel()
+        check_missing = self._has_zero_missing or bool(np.isnan(X_flat).any())
+
+        for _ in range(self.max_depth):
+            x = X_flat[row_base + self._split_feature[nodes]]
+            threshold = self.threshold[nodes]
+            go_left = x <= threshold
+
+            if check_missing:
+                missing_type = self.missing_type[nodes]
+                is_nan = np.isnan(x)
+                is_missing = np.where(
+                    missing_type == MISSING_NAN, is_nan,
+                    np.where(missing_type == MISSING_ZERO, is_nan | (np.abs(x) <= _ZERO_THRESHOLD), False)
+                )
+                # Without a missing type NaN is treated as 0
+                go_left = np.where(is_nan & (missing_type == MISSING_NONE), 0.0 <= threshold, go_left)
+                go_left = np.where(is_missing, self.default_left[nodes], go_left)
+
+            nodes = self._children[2 * nodes + ~go_left]
+
+        nodes = nodes.reshape(n_rows, self.n_trees)
+        leaf_values = self.value[nodes]  # (n_rows, n_trees, n_outputs)
+        if self.value.shape[1] == 1:
+            # One output per tree (LightGBM): route it to the tree's class column
+            return leaf_values[:, :, 0] @ self._tree_to_class
+
+        raw = leaf_values.sum(axis=1)
+        if self.aggregation == 'mean':
+            raw = raw / self.n_trees
+        return raw
+
+    def predict_proba(self, X):
+        raw = self.predict_raw(X)
+        if self.aggregation == 'softmax':
+            raw = raw - raw.max(axis=1, keepdims=True)
+            e = np.exp(raw)
+            return e / e.sum(axis=1, keepdims=True)
+        if self.aggregation == 'sigmoid':
+            p = 1.0 / (1.0 + np.exp(-raw[:, 0]))
+            return np.column_stack((1.0 - p, p))
+        # mean of per-tree class probabilities
+        return raw
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, out_dir):
+        """Writes each array (derived lookups included) as an uncompressed .npy plus meta.json."""
+        os.makedirs(out_dir, exist_ok=True)
+        for name in ARRAY_NAMES + DERIVED_NAMES:
+            np.save(os.path.join(out_dir, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    @classmethod
+    def load(cls, in_dir, mmap_mode=None):
+        """
+        Loads an export directory. With mmap_mode='r' the arrays are mapped
+        read-only instead of copied, so every process serving the same
+        artifact shares one copy through the OS page cache. Exports without
+        derived arrays still load; the lookups are then rebuilt in memory.
+        """
+        with open(os.path.join(in_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(in_dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAY_NAMES}
+        for name in DERIVED_NAMES:
+            path = os.path.join(in_dir, f"{name}.npy")
+            if os.path.exists(path):
+                arrays[name] = np.load(path, mmap_mode=mmap_mode)
+        return cls(arrays, meta)
+
+
+def flatten_model(model):
+    """Builds a FlatTreeModel from a fitted LGBMClassifier or sklearn forest."""
+    if hasattr(model, 'booster_'):
+        return _flatten_lightgbm(model)
+    if hasattr(model, 'estimators_'):
+        return _flatten_sklearn_forest(model)
+    raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+
+class _NodeBuffer:
+    def __init__(self, n_outputs):
+        self.n_outputs = n_outputs
+        self.feature, self.threshold = [], []
+        self.left, self.right = [], []
+        self.value, self.default_left, self.missing_type = [], [], []
+
+    def add(self):
+        self.feature.append(-1)
+        self.threshold.append(0.0)
+        self.left.append(len(self.left))
+        self.right.append(len(self.right))
+        self.value.append([0.0] * self.n_outputs)
+        self.default_left.append(True)
+        self.missing_type.append(MISSING_NONE)
+        return len(self.feature) - 1
+
+    def arrays(self):
+        return {
+            'feature': np.asarray(self.feature, dtype=np.int32),
+            'threshold': np.asarray(self.threshold, dtype=np.float64),
+            'left': np.asarray(self.left, dtype=np.int32),
+            'right': np.asarray(self.right, dtype=np.int32),
+            'value': np.asarray(self.value, dtype=np.float64).reshape(-1, self.n_outputs),
+            'default_left': np.asarray(self.default_left, dtype=bool),
+            'missing_type': np.asarray(self.missing_type, dtype=np.int8),
+        }
+
+
+def _flatten_lightgbm(model):
+    dump = model.booster_.dump_model()
+    n_classes = int(dump['num_class'])
+    per_iteration = int(dump['num_tree_per_iteration'])
+    objective = dump['objective'].split()[0]
+
+    if objective.startswith('multiclass'):
+        aggregation = 'softmax'
+    elif objective in ('binary', 'cross_entropy'):
+        aggregation = 'sigmoid'
+    else:
+        raise TypeError(f"Unsupported LightGBM objective: {objective}")
+    if dump.get('average_output'):
+        raise TypeError("LightGBM random-forest mode (average_output) is not supported")
+
+    tree_info = dump['tree_info']
+    best_iteration = getattr(model, 'best_iteration_', None) or 0
+    if best_iteration > 0:
+        tree_info = tree_info[:best_iteration * per_iteration]
+
+    buf = _NodeBuffer(1)
+    roots, tree_class, max_depth = [], [], 0
+
+    def build(node, depth):
+        nonlocal max_depth
+        max_depth = max(max_depth, depth)
+        idx = buf.add()
+        if 'leaf_value' in node:
+            buf.value[idx] = [float(node['leaf_value'])]
+            return idx
+        if node['decision_type'] != '<=':
+            raise TypeError("Categorical LightGBM splits are not supported")
+        buf.feature[idx] = int(node['split_feature'])
+        buf.threshold[idx] = float(node['threshold'])
+        buf.default_left[idx] = bool(node['default_left'])
+        buf.missing_type[idx] = _MISSING_CODES[node['missing_type']]
+        buf.left[idx] = build(node['left_child'], depth + 1)
+        buf.right[idx] = build(node['right_child'], depth + 1)
+        return idx
+
+    for tree in tree_info:
+        roots.append(build(tree['tree_structure'], 0))
+        tree_class.append(tree['tree_index'] % per_iteration)
+
+    arrays = buf.arrays()
+    arrays['tree_roots'] = np.asarray(roots, dtype=np.int32)
+    arrays['tree_class'] = np.asarray(tree_class, dtype=np.int32)
+    arrays['classes'] = np.asarray(model.classes_)
+    meta = {
+        'source': 'lightgbm',
+        'aggregation': aggregation,
+        'n_classes': n_classes,
+        'n_features': int(dump['max_feature_idx']) + 1,
+        'feature_names': dump['feature_names'],
+        'max_depth': max_depth,
+        'input_dtype': 'float64',
+    }
+    return FlatTreeModel(arrays, meta)
+
+
+def _flatten_sklearn_forest(model):
+    n_classes = len(model.classes_)
+    buf = _NodeBuffer(n_classes)
+    roots, max_depth = [], 0
+
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        offset = len(buf.feature)
+        # Leaf values as class probabilities, the same normalisation predict_proba uses
+        value = tree.value[:, 0, :]
+        totals = value.sum(axis=1, keepdims=True)
+        probs = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+        missing_left = getattr(tree, 'missing_go_to_left', None)
+
+        for i in range(tree.node_count):
+            idx = buf.add()
+            if tree.children_left[i] == -1:
+                buf.value[idx] = probs[i].tolist()
+                continue
+            buf.feature[idx] = int(tree.feature[i])
+            buf.threshold[idx] = float(tree.threshold[i])
+            buf.left[idx] = offset + int(tree.children_left[i])
+            buf.right[idx] = offset + int(tree.children_right[i])
+            buf.missing_type[idx] = MISSING_NAN
+            buf.default_left[idx] = bool(missing_left[i]) if missing_left is not None else True
+
+        roots.append(offset)
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    arrays = buf.arrays()
+    arrays['tree_roots'] = np.asarray(roots, dtype=np.int32)
+    arrays['tree_class'] = np.full(len(roots), -1, dtype=np.int32)
+    arrays['classes'] = np.asarray(model.classes_)
+    feature_names = getattr(model, 'feature_names_in_', None)
+    meta = {
+        'source': 'sklearn',
+        'aggregation': 'mean',
+        'n_classes': n_classes,
+        'n_features': int(model.n_features_in_),
+        'feature_names': list(feature_names) if feature_names is not None else [],
+        'max_depth': max_depth,
+        'input_dtype': 'float32',
+    }
+    return FlatTreeModel(arrays, meta)
+
+
+def check_parity(model, flat, X, atol=1e-9):
+    """
+    Compares flat.predict_proba with model.predict_proba on X.
+    Returns (max_abs_diff, class_agreement) and raises if the diff exceeds atol.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    agreement = float(np.mean(np.argmax(expected, axis=1) == np.argmax(actual, axis=1))) if len(X) else 1.0
+    if max_diff > atol:
+        raise AssertionError(f"Flat evaluator differs from predict_proba by {max_diff:.3e} (atol={atol})")
+    return max_diff, agreement
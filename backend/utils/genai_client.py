@@ -1,13 +1,92 @@
 import os
-import google.generativeai as genai
 
 import json
+import hashlib
+import time
+from contextlib import contextmanager
+
+from .genai_gateway import GenAIGateway
+from .metrics import registry
+from .chat_sessions import PINNED_MESSAGES, ChatSession, ChatSessionStore, SessionNotFound, context_key
+
+MODEL_NAME = 'gemini-3-flash-preview'
+# Bump whenever the report prompt changes so cached reports are not reused
+REPORT_TEMPLATE_VERSION = f'report-v1/{MODEL_NAME}'
+
+def _genai():
+    # The SDK takes about a second to import; load it on first use, not at startup
+    import google.generativeai as genai
+    return genai
+
+LLM_CALL_SECONDS = registry.histogram(
+    'cardiotwin_llm_call_seconds',
+    'GenAI SDK call time per attempt, by call kind and outcome',
+    ['kind', 'outcome']
+)
+LLM_FIRST_CHUNK_SECONDS = registry.histogram(
+    'cardiotwin_llm_first_chunk_seconds',
+    'Time from a streaming GenAI call to its first chunk',
+    ['kind']
+)
+
+@contextmanager
+def _timed_call(kind):
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+
+def _timed_stream(kind, start_stream):
+    """Yields the text of start_stream()'s chunks, timing the first chunk and the whole stream."""
+    start = time.perf_counter()
+    outcome = 'error'
+    first = True
+    try:
+        for chunk in start_stream():
+            if first:
+                LLM_FIRST_CHUNK_SECONDS.observe(time.perf_counter() - start, kind=kind)
+                first = False
+            yield _chunk_text(chunk)
+        outcome = 'ok'
+    except GeneratorExit:
+        outcome = 'cancelled'
+        raise
+    finally:
+        LLM_CALL_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+
+def _chunk_text(chunk):
+    # Chunks without text parts (e.g. a bare finish/safety chunk) raise on .text
+    try:
+        return chunk.text
+    except ValueError:
+        return ''
+
+def _call_key(*parts):
+    """Coalescing key: identical concurrent requests share one model call."""
+    return hashlib.blake2b(json.dumps(parts, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
 
 class GenAIClient:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, gateway=None):
         self.config_path = os.path.join(os.path.dirname(__file__), 'config.json')
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
         
+        # Bounded pool for the blocking SDK calls, with deadlines and retries
+        self.gateway = gateway or GenAIGateway(
+            max_workers=int(os.environ.get('CARDIOTWIN_GENAI_CONCURRENCY', 4)),
+            max_pending=int(os.environ.get('CARDIOTWIN_GENAI_MAX_PENDING', 16)),
+            timeout=float(os.environ.get('CARDIOTWIN_GENAI_TIMEOUT', 30)),
+            retries=int(os.environ.get('CARDIOTWIN_GENAI_RETRIES', 2))
+        )
+        # Server-side chat sessions, so each turn sends only the new message
+        self.sessions = ChatSessionStore(
+            max_sessions=int(os.environ.get('CARDIOTWIN_CHAT_SESSIONS', 512)),
+            ttl_seconds=float(os.environ.get('CARDIOTWIN_CHAT_SESSION_TTL', 1800)),
+            max_turns=int(os.environ.get('CARDIOTWIN_CHAT_MAX_TURNS', 8))
+        )
+        
         # Try loading from config.json if not found
         if not self.api_key:
             try:
@@ -20,10 +99,20 @@ class GenAIClient:
 
         if not self.api_key:
             print("Warning: GEMINI_API_KEY not found.")
-            self.model = None
-        else:
+        # Created on first access by the model property
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None and self.api_key:
+            genai = _genai()
             genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel('gemini-3-flash-preview')
+            self._model = genai.GenerativeModel(MODEL_NAME)
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
 
     def configure_key(self, api_key):
         self.api_key = api_key
@@ -34,13 +123,11 @@ class GenAIClient:
         except Exception as e:
             print(f"Error saving config: {e}")
             
+        genai = _genai()
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-3-flash-preview')
-
-    def generate_report(self, patient_data, prediction):
-        if not self.model:
-            return "Error: API Key not configured."
+        self.model = genai.GenerativeModel(MODEL_NAME)
 
+    def _report_prompt(self, patient_data, prediction):
         # Prepare specific data for prompt
         risk_class = prediction.get('class', 'Safe')
         # Use risk_score (0.0 to 1.0) and confidence (0.0 to 1.0)
@@ -91,21 +178,41 @@ class GenAIClient:
         ## 5. Disclaimer
         This is an AI-generated clinical decision support tool. It is NOT a substitute for professional medical judgment. Consult a qualified cardio-oncologist.
         """
-        
+        return prompt
+
+    def generate_report(self, patient_data, prediction):
+        if not self.model:
+            return "Error: API Key not configured."
+
+        prompt = self._report_prompt(patient_data, prediction)
+        model = self.model
+        def generate(prompt, timeout):
+            with _timed_call('report'):
+                return model.generate_content(prompt, request_options={"timeout": timeout}).text
+
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.gateway.call(generate, prompt, key=_call_key('report', prompt))
         except Exception as e:
             return f"Error generating report: {str(e)}"
 
-    def chat(self, message, history, patient_context, mode='patient'):
+    def stream_report(self, patient_data, prediction):
+        """
+        Yields the report text as the model produces it. Unlike
+        generate_report, failures are raised rather than returned as text.
+        """
         if not self.model:
-            return "Error: API Key not configured."
+            raise ValueError("API Key not configured.")
 
-        # Construct chat with context
-        # Gemini Pro supports chat history
-        chat = self.model.start_chat(history=history)
-        
+        prompt = self._report_prompt(patient_data, prediction)
+        model = self.model
+        def generate(prompt, timeout):
+            return _timed_stream('report', lambda: model.generate_content(
+                prompt, stream=True, request_options={"timeout": timeout}
+            ))
+
+        yield from self.gateway.stream(generate, prompt)
+
+    def _chat_instruction(self, patient_context, mode):
         system_base = f"""
         System: You are CardioTwin, a specialized AI assistant for Onco-Cardiology.
         
@@ -144,14 +251,116 @@ class GenAIClient:
                 5. Do not use any medical jargon.
 
              """
+        return system_instruction
+
+    def _chat_prompt(self, message, patient_context, mode):
+        # Injecting system instruction as the first part of the message to context-set for this turn
+        return f"{self._chat_instruction(patient_context, mode)}\n\nUser Question: {message}"
+
+    def _instruction_turn(self, patient_context, mode):
+        """The pinned opening exchange of a session's history."""
+        return [
+            {"role": "user", "parts": [self._chat_instruction(patient_context, mode)]},
+            {"role": "model", "parts": ["Understood."]}
+        ]
+
+    def _session(self, session_id, patient_context, mode, history=None):
+        """
+        The live session for session_id, or a new one. A session whose id
+        is unknown (expired or evicted) is only
+        replaced when the client resent its patient context; otherwise
+        SessionNotFound tells it to. A changed mode or context rewrites the
+        pinned instruction and keeps the conversation.
+        """
+        # One string form, so it can be stored and compared across workers
+        patient_context = context_key(patient_context)
+        session = self.sessions.get(session_id, self.model.start_chat) if session_id else None
+        if session is None:
+            if session_id and patient_context is None:
+                raise SessionNotFound("Chat session expired; resend the patient context to start a new one.")
+            chat = self.model.start_chat(history=self._instruction_turn(patient_context, mode) + list(history or []))
+            session = ChatSession(self.sessions.new_id(), chat, mode, patient_context)
+            with session.lock:
+                self.sessions.trim(session)
+            self.sessions.put(session)
+            return session
+
+        changed_context = patient_context is not None and patient_context != session.patient_context
+        if mode != session.mode or changed_context:
+            with session.lock:
+                session.mode = mode
+                if changed_context:
+                    session.patient_context = patient_context
+                conversation = list(session.chat.history[PINNED_MESSAGES:])
+                session.chat.history = self._instruction_turn(session.patient_context, mode) + conversation
+                self.sessions.save(session)
+        return session
+
+    def chat_turn(self, message, session_id=None, patient_context=None, mode='patient', history=None):
+        """
+        One turn of a server-side chat session; returns (session_id, reply).
+        The instruction is sent once, as the session's pinned opening
+        exchange, and only the last max_turns turns are kept after it.
+        history seeds a new session for clients that still send it.
+        Raises SessionNotFound as described in _session.
+        """
+        if not self.model:
+            return session_id, "Error: API Key not configured."
+
+        session = self._session(session_id, patient_context, mode, history)
+        def send(message, timeout):
+            with session.lock, _timed_call('chat'):
+                reply = session.chat.send_message(message, request_options={"timeout": timeout}).text
+                session.turns += 1
+                self.sessions.trim(session)
+                self.sessions.save(session)
+            return reply
+
+        try:
+            return session.id, self.gateway.call(send, message)
+        except Exception as e:
+            return session.id, f"Error in chat: {str(e)}"
+
+    def chat(self, message, history, patient_context, mode='patient'):
+        # Stateless variant of chat_turn: the caller sends the whole history
+        # and the instruction goes out again with every message
+        if not self.model:
+            return "Error: API Key not configured."
+
+        # Construct chat with context
+        # Gemini Pro supports chat history
+        chat = self.model.start_chat(history=history)
         
+        def send(full_prompt, timeout):
+            with _timed_call('chat'):
+                return chat.send_message(full_prompt, request_options={"timeout": timeout}).text
+
         try:
-            # Injecting system instruction as the first part of the message to context-set for this turn
-            full_prompt = f"{system_instruction}\n\nUser Question: {message}"
-            response = chat.send_message(full_prompt)
-            return response.text
+            full_prompt = self._chat_prompt(message, patient_context, mode)
+            return self.gateway.call(send, full_prompt, key=_call_key('chat', history, full_prompt))
         except Exception as e:
             return f"Error in chat: {str(e)}"
 
+    def stream_chat(self, message, session_id=None, patient_context=None, mode='patient', history=None):
+        """
+        Streaming chat_turn: returns (session_id, chunks), where chunks
+        yields the reply as it is produced and raises on failure.
+        """
+        if not self.model:
+            raise ValueError("API Key not configured.")
+
+        session = self._session(session_id, patient_context, mode, history)
+        def send(message, timeout):
+            # Held until the reply is complete or the stream is closed
+            with session.lock:
+                yield from _timed_stream('chat', lambda: session.chat.send_message(
+                    message, stream=True, request_options={"timeout": timeout}
+                ))
+                session.turns += 1
+                self.sessions.trim(session)
+                self.sessions.save(session)
+
+        return session.id, self.gateway.stream(send, message)
+
 # Singleton instance (optional, but good for sharing configuration)
 genai_client = GenAIClient()
@@ -0,0 +1,245 @@
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+
+class GatewayError(Exception):
+    """Base class for calls the gateway refused or gave up on."""
+
+
+class GatewayTimeout(GatewayError):
+    pass
+
+
+class GatewayBusy(GatewayError):
+    pass
+
+
+# Transient SDK / transport failures worth another attempt. Matched by class
+# name so the google.api_core exceptions need not be imported here.
+RETRYABLE_ERROR_NAMES = {
+    'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+    'DeadlineExceeded', 'InternalServerError', 'GatewayTimeout', 'Aborted'
+}
+
+
+def is_retryable(exc):
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(exc).__mro__)
+
+
+class GenAIGateway:
+    """
+    Runs blocking LLM calls on a small dedicated thread pool so they cannot
+    tie up the request threads that serve /predict.
+
+    - At most max_workers calls run at once; up to max_pending more may wait
+      for a slot, beyond that call() fails fast with GatewayBusy.
+    - Every call has a deadline. The caller gets GatewayTimeout when it
+      passes; the attempt is handed the remaining time as `timeout` so the
+      SDK can abort the HTTP request too.
+    - Transient failures are retried with full-jitter exponential backoff
+      while time remains.
+    - Calls made with the same key while one is in flight share its result
+      instead of issuing a duplicate request.
+
+    stream() applies the same limits to streaming calls and hands chunks to
+    the caller as they arrive.
+    """
+
+    def __init__(self, max_workers=4, max_pending=16, timeout=30.0, retries=2,
+                 backoff_base=0.5, backoff_max=4.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='genai')
+        # Admission: running + queued calls
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # key -> Future, for coalescing
+        self._active = 0  # submitted calls not yet finished
+        self._stats = {
+            "calls": 0, "completed": 0, "failed": 0, "timeouts": 0,
+            "retries": 0, "coalesced": 0, "rejected": 0, "total_ms": 0.0,
+            "streams": 0, "cancelled": 0, "first_chunks": 0, "first_chunk_ms": 0.0
+        }
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._stats[name] += value
+
+    def call(self, fn, *args, key=None, timeout=None, **kwargs):
+        """
+        Runs fn(*args, timeout=<seconds left>, **kwargs) on the pool and
+        returns its result, raising GatewayTimeout, GatewayBusy or the
+        call's own exception.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        self._count("calls")
+
+        with self._lock:
+            future = self._in_flight.get(key) if key is not None else None
+            if future is not None:
+                self._stats["coalesced"] += 1
+        if future is None:
+            future = self._submit(fn, args, kwargs, key, deadline)
+
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            self._count("timeouts")
+            raise GatewayTimeout(f"GenAI call timed out after {timeout:.0f}s") from None
+
+    def _submit(self, fn, args, kwargs, key, deadline):
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise GatewayBusy("Too many GenAI requests in progress; try again shortly")
+
+        with self._lock:
+            # Another caller may have started the same call meanwhile
+            future = self._in_flight.get(key) if key is not None else None
+            if future is not None:
+                self._stats["coalesced"] += 1
+                self._slots.release()
+                return future
+            future = self._executor.submit(self._run, fn, args, kwargs, deadline)
+            self._active += 1
+            if key is not None:
+                self._in_flight[key] = future
+
+        def done(f):
+            self._slots.release()
+            with self._lock:
+                self._active -= 1
+                if key is not None and self._in_flight.get(key) is f:
+                    del self._in_flight[key]
+        future.add_done_callback(done)
+        return future
+
+    def _run(self, fn, args, kwargs, deadline):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count("failed")
+                raise GatewayTimeout("GenAI call deadline passed before it could run")
+            try:
+                result = fn(*args, timeout=remaining, **kwargs)
+                self._count("completed")
+                self._count("total_ms", (time.monotonic() - start) * 1000)
+                return result
+            except Exception as e:
+                # Full jitter keeps retrying callers from bunching up
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                if attempt >= self.retries or not is_retryable(e) or time.monotonic() + delay >= deadline:
+                    self._count("failed")
+                    raise
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+
+    def stream(self, fn, *args, timeout=None, **kwargs):
+        """
+        Runs fn(*args, timeout=<seconds>, **kwargs), which returns an
+        iterable of text chunks, on the pool and yields the chunks as they
+        arrive.
+
+        timeout bounds the wait for each chunk rather than the whole call,
+        so a long answer that keeps arriving is not cut off. Transient
+        failures are retried only until the first chunk has been handed
+        out. Closing the generator early (the client went away) stops the
+        producer at its next chunk and frees its slot.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        self._count("calls")
+        self._count("streams")
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise GatewayBusy("Too many GenAI requests in progress; try again shortly")
+
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+        with self._lock:
+            self._active += 1
+        future = self._executor.submit(self._produce, fn, args, kwargs, timeout, chunks, cancelled)
+
+        def done(f):
+            self._slots.release()
+            with self._lock:
+                self._active -= 1
+        future.add_done_callback(done)
+
+        try:
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=timeout)
+                except queue.Empty:
+                    self._count("timeouts")
+                    raise GatewayTimeout(f"GenAI stream stalled for {timeout:.0f}s") from None
+                if kind == 'chunk':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    return
+        finally:
+            cancelled.set()
+
+    def _produce(self, fn, args, kwargs, timeout, chunks, cancelled):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            sent = False
+            try:
+                iterator = iter(fn(*args, timeout=timeout, **kwargs))
+                try:
+                    for text in iterator:
+                        if cancelled.is_set():
+                            self._count("cancelled")
+                            return
+                        if not text:
+                            continue
+                        if not sent:
+                            self._count("first_chunks")
+                            self._count("first_chunk_ms", (time.monotonic() - start) * 1000)
+                            sent = True
+                        chunks.put(('chunk', text))
+                finally:
+                    close = getattr(iterator, 'close', None)
+                    if close:
+                        close()
+                self._count("completed")
+                self._count("total_ms", (time.monotonic() - start) * 1000)
+                chunks.put(('end', None))
+                return
+            except Exception as e:
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                # Once text has gone out a retry would repeat it
+                if sent or cancelled.is_set() or attempt >= self.retries or not is_retryable(e):
+                    self._count("failed")
+                    chunks.put(('error', e))
+                    return
+                attempt += 1
+                self._count("retries")
+                time.sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._active
+        total_ms = stats.pop("total_ms")
+        first_chunks, first_chunk_ms = stats.pop("first_chunks"), stats.pop("first_chunk_ms")
+        stats["avg_ms"] = round(total_ms / stats["completed"], 1) if stats["completed"] else 0.0
+        stats["avg_first_chunk_ms"] = round(first_chunk_ms / first_chunks, 1) if first_chunks else 0.0
+        stats["max_workers"] = self.max_workers
+        return stats
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
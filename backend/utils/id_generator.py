@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+# Crockford base32, as used by ULID (no I, L, O, U)
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_RANDOM_BITS = 80
+_RANDOM_MAX = (1 << _RANDOM_BITS) - 1
+
+
+class ULIDGenerator:
+    """
+    Generates ULIDs: 26-character, lexicographically sortable, unique IDs.
+
+    48 bits of millisecond timestamp followed by 80 random bits. Within the
+    same millisecond the random part is incremented instead of redrawn, so
+    IDs from one process are strictly increasing even under heavy load or if
+    the wall clock steps backwards. Different processes draw independent
+    random parts, so they can generate concurrently without coordination
+    or a database round trip. The state is reset in forked children so a
+    worker never continues its parent's sequence.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self):
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms <= self._last_ms:
+                # Same millisecond (or clock went back): keep ordering
+                now_ms = self._last_ms
+                rand = self._last_random + 1
+                if rand > _RANDOM_MAX:
+                    now_ms += 1
+                    rand = int.from_bytes(os.urandom(10), 'big')
+            else:
+                rand = int.from_bytes(os.urandom(10), 'big')
+            self._last_ms = now_ms
+            self._last_random = rand
+
+        return _encode((now_ms << _RANDOM_BITS) | rand)
+
+
+def _encode(value):
+    chars = []
+    for _ in range(26):
+        chars.append(_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def ulid_timestamp_ms(ulid):
+    """Milliseconds since the epoch encoded in a ULID string."""
+    value = 0
+    for ch in ulid[:10]:
+        value = (value << 5) | _ALPHABET.index(ch)
+    return value
+
+
+_default = ULIDGenerator()
+
+
+def new_id(prefix=''):
+    """Returns prefix + a new ULID from the process-wide generator."""
+    return f"{prefix}{_default.new()}"
@@ -1,12 +1,15 @@
 import numpy as np
 
-def map_risk_to_visuals(prediction_result, age=45, features=None):
+def map_risk_to_visuals(prediction_result, age=45, features=None, jitter=True, rng=None):
     """
     Maps ML prediction to visual heart parameters.
     Uses actual patient features if available, otherwise estimates.
+    Pass jitter=False for deterministic output, or a np.random.Generator
+    as rng to make the jitter reproducible.
     """
     if features is None:
         features = {}
+    uniform = (rng if rng is not None else np.random).uniform if jitter else (lambda low, high: 0.0)
 
     risk_class = prediction_result.get('class', 'Safe')
     confidence = prediction_result.get('confidence', 0.0)
@@ -32,13 +35,13 @@ def map_risk_to_visuals(prediction_result, age=45, features=None):
         heart_rate = features['resting_heart_rate_bpm']
         # Add some random variation for "live" feel if desired, or keep static
         # Let's keep it static + small jitter
-        heart_rate = float(heart_rate) + np.random.uniform(-2, 2)
+        heart_rate = float(heart_rate) + uniform(-2, 2)
     else:
         # Fallback estimation
         base_hr = 70
         if mapped_risk == 'Medium': base_hr = 85
         if mapped_risk == 'High': base_hr = 100
-        heart_rate = base_hr + np.random.uniform(-5, 5)
+        heart_rate = base_hr + uniform(-5, 5)
     
     # 2. COLOR MAPPING
     color_map = {
@@ -87,3 +90,107 @@ def map_risk_to_visuals(prediction_result, age=45, features=None):
         'qtc': float(qtc),
         'lvef': float(lvef)
     }
+
+
+# Array version of the tables above, indexed by level: 0 Low, 1 Medium, 2 High
+_LEVELS = np.array(['Low', 'Medium', 'High'], dtype=object)
+_LEVEL_INDEX = {'Safe': 0, 'Warning': 1, 'Critical': 2, 'Low Start': 0, 'Low': 0, 'High': 2}
+_COLORS = np.array(['#4CAF50', '#FFC107', '#FF4444'], dtype=object)
+_BASE_HR = np.array([70.0, 85.0, 100.0])
+_RHYTHMS = np.array(['Normal Sinus Rhythm', 'Sinus Tachycardia', 'Prolonged QTc / Arrhythmia'], dtype=object)
+
+VISUAL_COLUMNS = ['resting_heart_rate_bpm', 'qtc_interval_ms', 'baseline_lvef_percent', 'heart_rate_variability_rmssd']
+
+
+def map_risk_to_visuals_batch(classes, confidences, resting_hr=None, qtc=None, lvef=None, hrv=None,
+                              jitter=True, rng=None):
+    """
+    Vectorized map_risk_to_visuals over columns of patients.
+
+    classes are class labels ('Safe', 'Warning', 'Critical'), the other
+    arguments are equal-length numeric arrays where NaN means the feature is
+    missing (a column left as None is all missing). Returns a dict of NumPy
+    arrays with the same keys as the scalar function.
+
+    With jitter=False the result matches the scalar function exactly. With a
+    seeded rng the jitter is reproducible, and draws the same values as
+    calling the scalar function row by row with the same Generator.
+    """
+    n = len(classes)
+    confidences = np.asarray(confidences, dtype=float)
+
+    def column(values):
+        return np.full(n, np.nan) if values is None else np.asarray(values, dtype=float)
+
+    resting_hr, qtc, lvef, hrv = column(resting_hr), column(qtc), column(lvef), column(hrv)
+
+    level = np.fromiter((_LEVEL_INDEX.get(c, 0) for c in classes), dtype=np.intp, count=n)
+
+    # 1. Heart rate: measured HR +/-2, else level baseline +/-5 (NaN > 0 is False)
+    has_hr = resting_hr > 0
+    if jitter:
+        u = (rng if rng is not None else np.random.default_rng()).random(n)
+        offset = np.where(has_hr, -2.0 + 4.0 * u, -5.0 + 10.0 * u)
+    else:
+        offset = 0.0
+    heart_rate = np.where(has_hr, resting_hr, _BASE_HR[level]) + offset
+
+    # 3. Arrhythmia from level, escalated by long QTc
+    qtc = np.where(np.isnan(qtc), 400.0, qtc)
+    rhythm = np.where(qtc > 500, 2, np.where(level == 1, 1, 0))
+    rhythm = np.where(level == 2, 2, rhythm)
+
+    # 4. Contraction intensity from LVEF
+    lvef = np.where(np.isnan(lvef), 60.0, lvef)
+    intensity = np.maximum(0.5, lvef / 60.0)
+
+    # 5. HRV: measured, else derived from confidence for non-Low levels
+    estimated_hrv = np.where(level != 0, 60 - confidences * 40, 60.0)
+    hrv = np.where(hrv > 0, hrv, estimated_hrv)
+
+    return {
+        'heart_rate': np.trunc(heart_rate).astype(np.int64),
+        'color': _COLORS[level],
+        'arrhythmia_type': _RHYTHMS[rhythm],
+        'contraction_intensity': intensity,
+        'hrv': np.trunc(hrv).astype(np.int64),
+        'risk_score': confidences,
+        'risk_level': _LEVELS[level],
+        'qtc': qtc,
+        'lvef': lvef
+    }
+
+
+def visuals_to_records(visuals):
+    """Splits the arrays from map_risk_to_visuals_batch into per-patient dicts of plain Python values."""
+    keys = list(visuals)
+    return [dict(zip(keys, values)) for values in zip(*(visuals[k].tolist() for k in keys))]
+
+
+def map_predictions_to_visuals(predictions, features_list, jitter=True, rng=None):
+    """
+    map_risk_to_visuals for a list of predict_batch results and their
+    feature dicts, in one vectorized pass. Returns one visuals dict per row.
+    """
+    columns = {name: np.full(len(features_list), np.nan) for name in VISUAL_COLUMNS}
+    for i, features in enumerate(features_list):
+        for name in VISUAL_COLUMNS:
+            value = features.get(name)
+            if value is None:
+                continue
+            try:
+                columns[name][i] = float(value)
+            except (TypeError, ValueError):
+                pass
+
+    visuals = map_risk_to_visuals_batch(
+        [p.get('class', 'Safe') for p in predictions],
+        [p.get('confidence', 0.0) for p in predictions],
+        resting_hr=columns['resting_heart_rate_bpm'],
+        qtc=columns['qtc_interval_ms'],
+        lvef=columns['baseline_lvef_percent'],
+        hrv=columns['heart_rate_variability_rmssd'],
+        jitter=jitter,
+        rng=rng
+    )
+    return visuals_to_records(visuals)
@@ -0,0 +1,219 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; spans a cached prediction (~50us) to a slow LLM call
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class _HistogramChild:
+    __slots__ = ('_upper', '_counts', '_sum', '_lock')
+
+    def __init__(self, upper):
+        self._upper = upper
+        self._counts = [0] * (len(upper) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self._upper, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def snapshot(self):
+        with self._lock:
+            return self._value
+
+
+class _Family:
+    """A named metric with one child per label-value combination."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """
+        The child for these label values. Hot paths should look it up once
+        and keep it; the lookup costs more than an observation.
+        """
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Histogram(_Family):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value, **labels):
+        self.labels(**labels).observe(value)
+
+    def collect(self):
+        bounds = self.buckets + (float('inf'),)
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f'{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}'
+            labels = _label_text(self.labelnames, values)
+            yield f'{self.name}_sum{labels} {_number(total)}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class Counter(_Family):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1, **labels):
+        self.labels(**labels).inc(amount)
+
+    def collect(self):
+        for values, child in self._items():
+            yield f'{self.name}{_label_text(self.labelnames, values)} {_number(child.snapshot())}'
+
+
+class GaugeFunction:
+    """A gauge read at scrape time: fn() returns [(labels_dict, value), ...]."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, fn):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+
+    def collect(self):
+        try:
+            samples = list(self.fn())
+        except Exception as e:
+            print(f"Metrics: gauge {self.name} failed: {e}")
+            return
+        for labels, value in samples:
+            names = sorted(labels)
+            yield f'{self.name}{_label_text(names, [labels[n] for n in names])} {_number(value)}'
+
+
+class MetricsRegistry:
+    """
+    In-process metrics with Prometheus text output.
+
+    Families are created on first use and shared by name, so a module can
+    fetch one another module also records into. Observations take one
+    bisect and one uncontended lock. Values are per process; under several
+    workers each one reports its own.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = cls(name, *args, **kwargs)
+            elif not isinstance(family, cls):
+                raise ValueError(f"Metric {name} is already registered as a {family.kind}")
+            return family
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge_function(self, name, documentation, fn):
+        return self._get_or_create(GaugeFunction, name, documentation, fn)
+
+    def render(self):
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+        lines = []
+        for family in families:
+            help_text = family.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f'# HELP {family.name} {help_text}')
+            lines.append(f'# TYPE {family.name} {family.kind}')
+            lines.extend(family.collect())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+PREDICT_STAGE_SECONDS = registry.histogram(
+    'cardiotwin_predict_stage_seconds',
+    'Time spent in each stage of a single-patient prediction',
+    ['stage']
+)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+ARTIFACT_NAME = 'model.pkl'
+MANIFEST_NAME = 'manifest.json'
+FLAT_DIR_NAME = 'flat'
+ACTIVE_FILE = 'ACTIVE'
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Directory of versioned model artifacts.
+
+        <root>/<version>/model.pkl
+        <root>/<version>/flat/           optional FlatTreeModel export of model.pkl
+        <root>/<version>/manifest.json   version, sha256, size, created_at, source, notes,
+                                         flat_sha256 (file name -> sha256 under flat/)
+        <root>/ACTIVE                    name of the version to serve
+
+    Artifacts are never modified after registration; the checksums in the
+    manifest (pickle and every flat/ file) are verified before a version is
+    loaded. ACTIVE is replaced
+    atomically so a crash never leaves it half-written.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _version_dir(self, version):
+        if not version or os.sep in version or version.startswith('.') or (os.altsep and os.altsep in version):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.root, version)
+
+    def artifact_path(self, version):
+        return os.path.join(self._version_dir(version), ARTIFACT_NAME)
+
+    def flat_dir(self, version):
+        return os.path.join(self._version_dir(version), FLAT_DIR_NAME)
+
+    def manifest(self, version):
+        try:
+            with open(os.path.join(self._version_dir(version), MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_versions(self):
+        """Manifests of every registered version, newest first."""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [m for m in (self.manifest(name) for name in os.listdir(self.root)
+                                 if os.path.isdir(os.path.join(self.root, name))) if m]
+        return sorted(manifests, key=lambda m: m.get('created_at', 0), reverse=True)
+
+    def register(self, source_path, version=None, notes='', flat_model=None):
+        """
+        Copies a model file into the registry and writes its manifest.
+        flat_model, if given, is saved alongside for memory-mapped serving.
+        Returns the manifest.
+        """
+        version = version or time.strftime('v%Y%m%d-%H%M%S')
+        version_dir = self._version_dir(version)
+        with self._lock:
+            if os.path.exists(version_dir):
+                raise ValueError(f"Model version {version} already exists")
+            os.makedirs(self.root, exist_ok=True)
+            # Build in a scratch directory, then rename into place
+            tmp_dir = version_dir + '.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            shutil.copyfile(source_path, os.path.join(tmp_dir, ARTIFACT_NAME))
+            if flat_model is not None:
+                flat_model.save(os.path.join(tmp_dir, FLAT_DIR_NAME))
+            manifest = {
+                "version": version,
+                "sha256": sha256_file(os.path.join(tmp_dir, ARTIFACT_NAME)),
+                "size": os.path.getsize(source_path),
+                "created_at": time.time(),
+                "source": os.path.abspath(source_path),
+                "flat": flat_model is not None,
+                "notes": notes
+            }
+            if flat_model is not None:
+                manifest["flat_sha256"] = self._flat_checksums(os.path.join(tmp_dir, FLAT_DIR_NAME))
+            with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.rename(tmp_dir, version_dir)
+        return manifest
+
+    def verify(self, version):
+        """Raises ValueError unless the artifact exists and matches its manifest checksum."""
+        manifest = self.manifest(version)
+        if manifest is None:
+            raise ValueError(f"Unknown model version: {version}")
+        path = self.artifact_path(version)
+        if not os.path.exists(path):
+            raise ValueError(f"Artifact missing for model version {version}")
+        digest = sha256_file(path)
+        if digest != manifest.get('sha256'):
+            raise ValueError(f"Checksum mismatch for model version {version}")
+        if manifest.get('flat'):
+            self._verify_flat(version, manifest)
+        return manifest
+
+    @staticmethod
+    def _flat_checksums(flat_dir):
+        return {name: sha256_file(os.path.join(flat_dir, name)) for name in sorted(os.listdir(flat_dir))}
+
+    def _verify_flat(self, version, manifest):
+        # The flat export is memory-mapped as is, so every file must match,
+        # and no file may be added: optional lookup arrays load if present
+        expected = manifest.get('flat_sha256')
+        if not expected:
+            raise ValueError(f"Model version {version} has no flat export checksums; register it again")
+        flat_dir = self.flat_dir(version)
+        if not os.path.isdir(flat_dir):
+            raise ValueError(f"Flat export missing for model version {version}")
+        if self._flat_checksums(flat_dir) != expected:
+            raise ValueError(f"Flat export checksum mismatch for model version {version}")
+
+    def active_path(self):
+        return os.path.join(self.root, ACTIVE_FILE)
+
+    def active_version(self):
+        try:
+            with open(self.active_path()) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def set_active(self, version):
+        if self.manifest(version) is None:
+            raise ValueError(f"Unknown model version: {version}")
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, ACTIVE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, self.active_path())
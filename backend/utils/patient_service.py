@@ -1,11 +1,24 @@
-import pandas as pd
 import os
 import json
+import base64
+import threading
 from datetime import datetime
 from .db_manager import DBManager
+from .assessment_writer import AssessmentWriter, INSERT_ASSESSMENT
+from .id_generator import new_id
+from .stats_aggregator import DashboardStats
+
+# Largest page /api/history will return
+MAX_HISTORY_PAGE = 500
+
+# Columns returned when the JSON payloads are left out
+HISTORY_SUMMARY_COLUMNS = ['assessment_id', 'timestamp', 'patient_id', 'risk_level', 'risk_score']
+# Listed rather than SELECT *, so columns added for indexing (such as the
+# generated assessment_date) stay out of the API
+HISTORY_COLUMNS = HISTORY_SUMMARY_COLUMNS + ['input_data', 'prediction_details']
 
 class PatientService:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, write_behind=True, stats_refresh_seconds=0):
         # Default to database folder in root
         if db_path is None:
             BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -14,6 +27,20 @@ class PatientService:
             self.db_path = db_path
             
         self.db = DBManager(self.db_path)
+        # In-memory dashboard aggregates, updated as writes are committed.
+        # They only see this process's writes, so with several server
+        # workers stats_refresh_seconds > 0 rebuilds them from the database
+        # that often, on a background thread.
+        self.stats = DashboardStats()
+        self.stats_refresh_seconds = stats_refresh_seconds
+        self._refresher_pid = None
+        self._refresher_lock = threading.Lock()
+        self._closed = threading.Event()
+        # History rows are committed in batches by a background thread;
+        # write_behind=False keeps the synchronous INSERT per assessment.
+        self.writer = AssessmentWriter(
+            self.db, on_written=self._record_assessments, commit_lock=self.stats.write_lock
+        ) if write_behind else None
         self.load_data()
 
     def load_data(self):
@@ -23,6 +50,7 @@ class PatientService:
             # Just verify we can connect/query
             self.db.execute_query("SELECT 1")
             print(f"PatientService: Connected to database at {self.db_path}")
+            self.stats.rebuild(self.db)
         except Exception as e:
             print(f"PatientService: Error connecting to database: {e}")
 
@@ -61,7 +89,8 @@ class PatientService:
 
     def save_assessment(self, patient_data, prediction, visuals):
         """Saves an assessment to the history table in SQL."""
-        assessment_id = f"AST-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # ULID: unique across threads/processes and sorts by creation time
+        assessment_id = new_id("AST-")
         timestamp = datetime.now().isoformat()
         patient_id = patient_data.get('Patient_ID', patient_data.get('patient_id', 'UNKNOWN'))
         risk_level = prediction.get('class', 'Safe')
@@ -71,18 +100,17 @@ class PatientService:
         input_data_json = json.dumps(patient_data)
         prediction_details_json = json.dumps(prediction)
         
-        query = """
-            INSERT INTO assessments (
-                assessment_id, timestamp, patient_id, risk_level, 
-                risk_score, input_data, prediction_details
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """
         params = (
             assessment_id, timestamp, patient_id, risk_level,
             risk_score, input_data_json, prediction_details_json
         )
         
-        self.db.execute_query(query, params, commit=True)
+        if self.writer is not None:
+            self.writer.submit(params)
+        else:
+            with self.stats.write_lock:
+                if self.db.execute_query(INSERT_ASSESSMENT, params, commit=True) is not None:
+                    self.stats.record_assessment(timestamp, risk_level, risk_score)
         
         return {
             "assessment_id": assessment_id,
@@ -92,58 +120,122 @@ class PatientService:
             "risk_score": risk_score
         }
 
+    def _record_assessments(self, rows):
+        # Writer callback: rows are INSERT_ASSESSMENT parameter tuples that were just committed
+        for params in rows:
+            self.stats.record_assessment(params[1], params[3], params[4])
+
+    def flush(self, timeout=None):
+        """Waits for queued assessments to be committed."""
+        if self.writer is not None:
+            self.writer.flush(timeout)
+
+    def close(self):
+        """Drains the write-behind queue and closes pooled connections."""
+        self._closed.set()
+        if self.writer is not None:
+            self.writer.close()
+        self.db.close()
+
     def get_history(self, limit=50):
         """Retrieves past assessments from SQLite."""
-        query = "SELECT * FROM assessments ORDER BY timestamp DESC LIMIT ?"
-        results = self.db.execute_query(query, (limit,))
-        
-        if not results:
-            return []
-            
+        return self.get_history_page(limit=limit)['items']
+
+    def get_history_page(self, limit=50, cursor=None, patient_id=None, risk_level=None,
+                         start=None, end=None, include_payload=True):
+        """
+        One page of assessments, newest first, with keyset pagination.
+
+        cursor is the opaque next_cursor of the previous page; it encodes the
+        (timestamp, assessment_id) of the last row so the next page is an
+        index range scan rather than an OFFSET. start/end bound the timestamp
+        (a date-only end includes that whole day). include_payload=False
+        leaves out the input_data / prediction_details JSON columns.
+        Raises ValueError for a malformed cursor.
+        """
+        limit = max(1, min(int(limit), MAX_HISTORY_PAGE))
+        columns = ', '.join(HISTORY_COLUMNS if include_payload else HISTORY_SUMMARY_COLUMNS)
+        where, params = [], []
+
+        if cursor:
+            last_timestamp, last_id = self._decode_cursor(cursor)
+            where.append("(timestamp, assessment_id) < (?, ?)")
+            params += [last_timestamp, last_id]
+        if patient_id:
+            where.append("patient_id = ?")
+            params.append(patient_id)
+        if risk_level:
+            # Unary + keeps the planner on the timestamp index: risk_level has
+            # only three values, so filtering in timestamp order beats sorting
+            where.append("+risk_level = ?")
+            params.append(risk_level)
+        if start:
+            where.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            if len(end) == 10:
+                where.append("timestamp < date(?, '+1 day')")
+            else:
+                where.append("timestamp <= ?")
+            params.append(end)
+
+        query = f"SELECT {columns} FROM assessments"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        # One extra row tells us whether there is a next page
+        query += " ORDER BY timestamp DESC, assessment_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        results = self.db.execute_query(query, tuple(params)) or []
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            next_cursor = self._encode_cursor(last['timestamp'], last['assessment_id'])
+
         # Optional: parse JSON strings back to dicts if frontend needs them
         # For now, keeping as is to match CSV behavior (where they were JSON strings in CSV)
-        return results
+        return {"items": results, "next_cursor": next_cursor}
 
-    def get_stats(self):
-        """Returns summary statistics from the database."""
+    @staticmethod
+    def _encode_cursor(timestamp, assessment_id):
+        raw = json.dumps([timestamp, assessment_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(cursor):
         try:
-            # 1. Total Patients
-            total_res = self.db.execute_query("SELECT COUNT(*) as count FROM patients")
-            total_patients = total_res[0]['count'] if total_res else 0
-            
-            # 2. High Risk count
-            high_res = self.db.execute_query("SELECT COUNT(*) as count FROM assessments WHERE risk_level = 'Critical'")
-            high_risk = high_res[0]['count'] if high_res else 0
-            
-            # 3. Avg Risk Score
-            avg_res = self.db.execute_query("SELECT AVG(risk_score) as avg_score FROM assessments")
-            avg_risk = avg_res[0]['avg_score'] if avg_res and avg_res[0]['avg_score'] is not None else 0
-            
-            # 4. Recent Trend (last 7 days of activity)
-            trend_query = """
-                SELECT strftime('%m-%d', timestamp) as date, COUNT(*) as count 
-                FROM assessments 
-                GROUP BY date 
-                ORDER BY date DESC 
-                LIMIT 7
-            """
-            trend_res = self.db.execute_query(trend_query)
-            trend = sorted(trend_res, key=lambda x: x['date']) if trend_res else []
-            
-            return {
-                "total_patients": total_patients,
-                "high_risk": high_risk,
-                "avg_risk": round(avg_risk * 100, 1),
-                "recent_trend": trend
-            }
-        except Exception as e:
-            print(f"PatientService: Error calculating stats: {e}")
-            return {
-                "total_patients": 0,
-                "high_risk": 0,
-                "avg_risk": 0,
-                "recent_trend": []
-            }
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            timestamp, assessment_id = json.loads(raw)
+            return str(timestamp), str(assessment_id)
+        except Exception:
+            raise ValueError("Invalid history cursor")
+
+    def get_stats(self):
+        """Returns summary statistics from the in-memory aggregates (O(1) in history size)."""
+        self.start_stats_refresher()
+        return self.stats.snapshot()
+
+    def start_stats_refresher(self):
+        """
+        Starts the background rebuild (when stats_refresh_seconds > 0) in
+        this process. Threads don't survive fork(), so server workers call
+        it after forking; get_stats() also starts it on first use.
+        """
+        if not self.stats_refresh_seconds or self._refresher_pid == os.getpid():
+            return
+        with self._refresher_lock:
+            if self._refresher_pid == os.getpid():
+                return
+            self._refresher_pid = os.getpid()
+            threading.Thread(target=self._refresh_stats, name='stats-refresh', daemon=True).start()
+
+    def _refresh_stats(self):
+        # The first rebuild catches up on writes since this process forked
+        while True:
+            self.stats.rebuild(self.db)
+            if self._closed.wait(self.stats_refresh_seconds):
+                return
 
     def register_patient(self, patient_data):
         """Adds a new patient to the SQLite database."""
@@ -170,7 +262,9 @@ class PatientService:
             query = f"INSERT INTO patients ({', '.join(cols)}) VALUES ({placeholders})"
             params = tuple(mapping.values())
             
-            self.db.execute_query(query, params, commit=True)
+            with self.stats.write_lock:
+                if self.db.execute_query(query, params, commit=True) is not None:
+                    self.stats.record_patient()
             return True
         except Exception as e:
             print(f"PatientService: Error registering patient: {e}")
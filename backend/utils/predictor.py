@@ -1,10 +1,36 @@
-import joblib
-import pandas as pd
 import numpy as np
 import os
+import threading
+import time
+from collections import namedtuple
+from .prediction_cache import PredictionCache
+from .feature_schema import FEATURE_NAMES
+from .model_registry import ModelRegistry, sha256_file
+from .flat_model import FlatTreeModel
+from .metrics import PREDICT_STAGE_SECONDS
+
+# Everything a prediction needs, swapped as one object on reload
+ModelState = namedtuple('ModelState', ['model', 'proba_fn', 'fingerprint', 'version'])
+
+# Rows a new model must score sensibly before it is swapped in
+WARMUP_SAMPLES = [
+    {},
+    {'age_years': 30, 'sex_binary': 0, 'resting_heart_rate_bpm': 65, 'systolic_bp_mmHg': 110,
+     'diastolic_bp_mmHg': 70, 'heart_rate_variability_rmssd': 80, 'qtc_interval_ms': 400,
+     'baseline_lvef_percent': 65, 'chemo_cycles_count': 0, 'dose_per_cycle_mg_per_m2': 0,
+     'cumulative_dose_mg_per_m2': 0},
+    {'age_years': 65, 'sex_binary': 1, 'resting_heart_rate_bpm': 95, 'systolic_bp_mmHg': 160,
+     'diastolic_bp_mmHg': 95, 'heart_rate_variability_rmssd': 15, 'qtc_interval_ms': 500,
+     'baseline_lvef_percent': 40, 'chemo_cycles_count': 6, 'dose_per_cycle_mg_per_m2': 60,
+     'cumulative_dose_mg_per_m2': 360},
+]
+
+# Bound once: label lookups cost more than the observation itself
+_COERCE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='coerce')
+_INFERENCE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage='inference')
 
 class Predictor:
-    def __init__(self):
+    def __init__(self, fast_path=True, registry=None, model_format=None, background_load=False):
         # Model path relative to backend/utils/predictor.py
         # backend/utils/../model/cardiotoxicity_model.pkl -> backend/model/...
         # But the model is in ROOT according to plan.md override (or user provided path)
@@ -13,35 +39,312 @@ class Predictor:
         
         self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.model_path = os.path.join(self.base_dir, 'cardiotoxicity_model.pkl')
+        # Output of backend/export_flat_model.py for the model above
+        self.flat_model_dir = os.path.join(self.base_dir, 'backend', 'model', 'flat')
+        
+        # 'pickle' unpickles the trained estimator; 'flat' memory-maps the
+        # flattened arrays instead, so worker processes share one read-only
+        # copy and never import LightGBM/sklearn. Falls back to the pickle
+        # when no flat export exists.
+        self.model_format = model_format or os.environ.get('CARDIOTWIN_MODEL_FORMAT', 'pickle')
+        
+        # Versioned models; the ACTIVE version wins over model_path when set
+        self.registry = registry or ModelRegistry(
+            os.environ.get('CARDIOTWIN_MODEL_REGISTRY', os.path.join(self.base_dir, 'model_registry'))
+        )
         
-        self.model = None
-        self.load_model()
+        # fast_path: score from a preallocated NumPy row with a single
+        # probability call; False keeps the original DataFrame path.
+        self.fast_path = fast_path
+        self._local = threading.local()
+        
+        # Results cache in front of predict(); size 0 disables it
+        self.cache = PredictionCache(
+            max_size=int(os.environ.get('CARDIOTWIN_PREDICTION_CACHE_SIZE', 4096)),
+            ttl_seconds=float(os.environ.get('CARDIOTWIN_PREDICTION_CACHE_TTL', 300))
+        )
         
         # Define expected features based on plan.md
-        self.feature_names = [
-            'age_years', 'sex_binary', 'resting_heart_rate_bpm', 
-            'systolic_bp_mmHg', 'diastolic_bp_mmHg', 'heart_rate_variability_rmssd', 
-            'qtc_interval_ms', 'baseline_lvef_percent', 'chemo_cycles_count', 
-            'dose_per_cycle_mg_per_m2', 'cumulative_dose_mg_per_m2'
-        ]
+        self.feature_names = list(FEATURE_NAMES)
+        
+        self._state = ModelState(None, None, None, None)
+        self._reload_lock = threading.Lock()
+        self.reload_status = {"state": "idle"}
+        
+        # ACTIVE can change under us: another server worker activated a
+        # version, or register_model.py --activate ran. Every
+        # active_check_seconds a prediction stats the file and loads the
+        # version it names (0 disables the check).
+        self.active_check_seconds = float(os.environ.get('CARDIOTWIN_MODEL_CHECK_SECONDS', 5))
+        self._active_seen = None
+        self._active_checked_at = 0.0
+        
+        # Set once the first load attempt finishes; calls made before then
+        # wait up to load_wait_seconds for it
+        self._loaded = threading.Event()
+        self.load_wait_seconds = float(os.environ.get('CARDIOTWIN_MODEL_LOAD_WAIT', 30))
+        if background_load:
+            # Lets the app (and /health) come up while the model loads
+            threading.Thread(target=self.load_model, name='model-load', daemon=True).start()
+        else:
+            self.load_model()
+
+    # Read-only views of the current model state
+    @property
+    def model(self):
+        return self._state.model
+
+    @property
+    def model_fingerprint(self):
+        return self._state.fingerprint
+
+    @property
+    def model_version(self):
+        return self._state.version
+
+    @property
+    def _proba_fn(self):
+        return self._state.proba_fn
+
+    @property
+    def model_status(self):
+        """'ready', 'loading' (first load still running) or 'unavailable'."""
+        if self._state.model is not None:
+            return "ready"
+        return "unavailable" if self._loaded.is_set() else "loading"
+
+    def _current_state(self):
+        """The model state, waiting for the initial load if it is still running."""
+        if self.active_check_seconds and time.monotonic() - self._active_checked_at > self.active_check_seconds:
+            self.sync_active()
+        state = self._state
+        if state.model is None and not self._loaded.is_set():
+            self._loaded.wait(self.load_wait_seconds)
+            state = self._state
+        return state
+
+    def _active_stamp(self):
+        # os.replace gives ACTIVE a new inode, so this changes on every write
+        try:
+            st = os.stat(self.registry.active_path())
+            return st.st_ino, st.st_mtime_ns
+        except OSError:
+            return None
+
+    def sync_active(self, wait=False):
+        """
+        Starts loading the version ACTIVE names if this process serves a
+        different one. Returns reload_status if a reload was started
+        (after the swap when wait=True), else None.
+        """
+        self._active_checked_at = time.monotonic()
+        stamp = self._active_stamp()
+        if stamp == self._active_seen:
+            return None
+        version = self.registry.active_version()
+        if not version or version == self._state.version:
+            self._active_seen = stamp
+            return None
+        if not self._reload_lock.acquire(blocking=False):
+            # A load is running; look again on the next check
+            return None
+        # Recorded before loading so a version that fails is not retried
+        # until ACTIVE changes again
+        self._active_seen = stamp
+        return self._start_activation(version, wait, persist=False)
 
     def load_model(self):
-        print(f"Loading model from {self.model_path}...")
+        """Loads the registry's active version, or model_path if none is active. Blocks."""
+        # Serialized with activate() so a slow initial load can't overwrite a newer model
+        with self._reload_lock:
+            self._load_model()
+
+    def _load_model(self):
+        self._active_seen = self._active_stamp()
+        self._active_checked_at = time.monotonic()
+        version = self.registry.active_version()
         try:
-            if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
-                print("Model loaded successfully.")
+            if version:
+                manifest = self.registry.verify(version)
+                path, fingerprint = self._artifact_for(version), manifest['sha256']
             else:
-                print(f"Error: Model file not found at {self.model_path}")
-                self.model = None
+                path, fingerprint = self._artifact_for(None), None
+        except ValueError as e:
+            print(f"Error loading model version {version}: {e}; falling back to {self.model_path}")
+            version, path, fingerprint = None, self._artifact_for(None), None
+
+        print(f"Loading model from {path}...")
+        try:
+            if os.path.exists(path):
+                state = self._build_state(path, version, fingerprint)
+                print(f"Model loaded successfully (version {state.version}).")
+            else:
+                print(f"Error: Model file not found at {path}")
+                state = ModelState(None, None, None, None)
         except Exception as e:
             print(f"Error loading model: {e}")
-            self.model = None
+            state = ModelState(None, None, None, None)
+        self._swap(state)
+        self._loaded.set()
+
+    def _artifact_for(self, version):
+        """Flat export directory or pickle path to load for a version (None = unregistered model)."""
+        pickle_path = self.registry.artifact_path(version) if version else self.model_path
+        if self.model_format == 'flat':
+            flat_dir = self.registry.flat_dir(version) if version else self.flat_model_dir
+            if os.path.isdir(flat_dir):
+                return flat_dir
+            print(f"No flat export at {flat_dir}; loading {pickle_path}")
+        return pickle_path
+
+    def _build_state(self, path, version=None, fingerprint=None):
+        if os.path.isdir(path):
+            model = FlatTreeModel.load(path, mmap_mode='r')
+            fingerprint = fingerprint or model.meta.get('source_sha256') or sha256_file(os.path.join(path, 'meta.json'))
+        else:
+            # Imported here so the flat format never pulls in joblib/sklearn
+            import joblib
+            model = joblib.load(path)
+            fingerprint = fingerprint or sha256_file(path)
+        # Unregistered files are told apart by checksum
+        version = version or f"legacy-{fingerprint[:12]}"
+        return ModelState(model, self._resolve_proba_fn(model), fingerprint, version)
+
+    def _swap(self, state):
+        # A single attribute store: requests see the old or the new model, never a mix
+        self._state = state
+        # Results from the previous model must not be served again
+        self.cache.clear()
+
+    def _warm_up(self, state):
+        """Scores WARMUP_SAMPLES with a candidate model; raises ValueError if the output is unusable."""
+        if state.model is None or state.proba_fn is None:
+            raise ValueError("Model has no predict_proba")
+        X = np.zeros((len(WARMUP_SAMPLES), len(FEATURE_NAMES)), dtype=np.float64)
+        for i, features in enumerate(WARMUP_SAMPLES):
+            self._fill_row(X[i], features)
+        probas = np.asarray(state.proba_fn(X))
+        if probas.shape != (len(X), len(state.model.classes_)):
+            raise ValueError(f"Unexpected probability shape {probas.shape}")
+        if not np.all(np.isfinite(probas)) or not np.allclose(probas.sum(axis=1), 1.0, atol=1e-6):
+            raise ValueError("Model returned invalid probabilities")
+
+    def activate(self, version, wait=False):
+        """
+        Loads a registered version in a background thread, warms it up and
+        swaps it in; requests keep using the current model until then. On
+        any failure the current model stays active. Returns reload_status
+        (after the swap when wait=True).
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return dict(self.reload_status, error="Another model reload is in progress")
+        return self._start_activation(version, wait, persist=True)
+
+    def _start_activation(self, version, wait, persist):
+        # Called with _reload_lock held; _activate releases it
+        self.reload_status = {"state": "loading", "version": version}
+        thread = threading.Thread(target=self._activate, args=(version, persist), name='model-reload', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return dict(self.reload_status)
+
+    def _activate(self, version, persist=True):
+        try:
+            manifest = self.registry.verify(version)
+            state = self._build_state(self._artifact_for(version), version, manifest['sha256'])
+            self._warm_up(state)
+            self._swap(state)
+            if persist:
+                # Other processes follow the new ACTIVE on their next check
+                self.registry.set_active(version)
+                self._active_seen = self._active_stamp()
+            print(f"Model version {version} activated.")
+            self.reload_status = {"state": "ready", "version": version}
+        except Exception as e:
+            print(f"Error activating model version {version}: {e}")
+            self.reload_status = {"state": "failed", "version": version, "error": str(e)}
+        finally:
+            self._reload_lock.release()
+
+    @staticmethod
+    def _resolve_proba_fn(model):
+        """
+        Picks the cheapest way to get class probabilities from a NumPy matrix.
+        For LightGBM the booster is called directly, which skips the sklearn
+        wrapper's input validation; other models go through predict_proba.
+        """
+        if model is None or not hasattr(model, "predict_proba"):
+            return None
+
+        booster = getattr(model, "_Booster", None)
+        n_classes = getattr(model, "n_classes_", None)
+        if booster is not None and n_classes:
+            if n_classes > 2:
+                return booster.predict
+
+            def binary_proba(X):
+                p = booster.predict(X)
+                return np.column_stack((1.0 - p, p))
+            return binary_proba
+
+        return model.predict_proba
 
     def predict(self, features):
-        if not self.model:
+        # One snapshot per call so a concurrent reload can't mix two models
+        state = self._current_state()
+        if not state.model:
             return {"error": "Model not loaded"}
 
+        # Per-thread buffer: Flask serves requests on several threads
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        start = time.perf_counter()
+        self._fill_row(row[0], features)
+        _COERCE_SECONDS.observe(time.perf_counter() - start)
+
+        key = None
+        if self.cache.enabled:
+            key = PredictionCache.make_key(row[0], state.fingerprint or '')
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        if not self.fast_path or state.proba_fn is None:
+            result = self._predict_frame(features, state)
+        else:
+            result = self._predict_row(row, state)
+        _INFERENCE_SECONDS.observe(time.perf_counter() - start)
+
+        if key is not None and "error" not in result:
+            self.cache.put(key, result)
+        return result
+
+    def _predict_row(self, row, state):
+        """Fast path: one probability call on the packed (1, n_features) row."""
+        try:
+            probas = state.proba_fn(row)[0]
+            prediction = state.model.classes_[int(np.argmax(probas))]
+
+            return {
+                "class": self._label_for(prediction),
+                "confidence": float(np.max(probas)),
+                "risk_score": float(self._risk_score(probas)),
+                "model_version": state.version
+            }
+
+        except Exception as e:
+            print(f"Prediction error: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"error": str(e)}
+
+    def _predict_frame(self, features, state=None):
+        """Original pandas path: one-row DataFrame, predict + predict_proba."""
+        state = state or self._state
+        model = state.model
         try:
             # Prepare input vector
             data = {}
@@ -55,50 +358,29 @@ class Predictor:
                     val = 0
                 data[col] = val
                 
-            # Create DataFrame
+            # Create DataFrame (pandas is only needed on this legacy path)
+            import pandas as pd
             df = pd.DataFrame([data], columns=self.feature_names)
             
             # Predict
             # LightGBM predict returns array
-            prediction = self.model.predict(df)[0]
+            prediction = model.predict(df)[0]
             
             # Get output probability if available, else just rely on class
             confidence = 0.95 # Default high confidence if not available
             risk_score = 0.0  # Default low risk
 
-            if hasattr(self.model, "predict_proba"):
-                probas = self.model.predict_proba(df)[0]
+            if hasattr(model, "predict_proba"):
+                probas = model.predict_proba(df)[0]
                 confidence = np.max(probas)
                 
-                # Calculate Risk Score (Severity)
-                # 0=Safe, 1=Warning, 2=Critical
-                # Risk Score = P(Warning)*0.5 + P(Critical)*1.0
-                # This ensures:
-                # - 100% Safe -> Risk Score 0.0
-                # - 100% Warning -> Risk Score 0.5
-                # - 100% Critical -> Risk Score 1.0
-                if len(probas) >= 3:
-                    p_warning = probas[1]
-                    p_critical = probas[2]
-                    risk_score = (p_warning * 0.5) + (p_critical * 1.0)
-                elif len(probas) == 2: # Binary case fallback (Safe vs Critical?)
-                    # Assuming 0=Safe, 1=Critical if binary
-                    risk_score = probas[1] 
+                risk_score = self._risk_score(probas)
             
-            # Map Class to Label
-            # 0=Low Risk (Safe), 1=Moderate Risk (Warning), 2=High Risk (Critical)
-            risk_map = {0: "Safe", 1: "Warning", 2: "Critical"}
-            
-            risk_label = "Unknown"
-            if isinstance(prediction, (int, np.integer, float, np.floating)):
-                risk_label = risk_map.get(int(prediction), "Unknown")
-            else:
-                risk_label = str(prediction)
-                
             return {
-                "class": risk_label,
+                "class": self._label_for(prediction),
                 "confidence": float(confidence),
-                "risk_score": float(risk_score)
+                "risk_score": float(risk_score),
+                "model_version": state.version
             }
 
         except Exception as e:
@@ -107,3 +389,82 @@ class Predictor:
             import traceback
             traceback.print_exc()
             return {"error": str(e)}
+
+    def predict_batch(self, features_list):
+        """
+        Scores many feature dicts in one pass.
+        Rows are packed into a single float64 matrix and run through one
+        predict_proba call; the class is the argmax of each row, so the model
+        is only evaluated once per batch.
+        Returns a list of result dicts in input order, or {"error": ...}.
+        """
+        state = self._current_state()
+        if not state.model:
+            return {"error": "Model not loaded"}
+
+        if not features_list:
+            return []
+
+        try:
+            X = np.zeros((len(features_list), len(self.feature_names)), dtype=np.float64)
+            for i, features in enumerate(features_list):
+                self._fill_row(X[i], features)
+
+            probas = (state.proba_fn or state.model.predict_proba)(X)
+            classes = state.model.classes_
+            predictions = classes[np.argmax(probas, axis=1)]
+            confidences = np.max(probas, axis=1)
+            risk_scores = self._risk_score(probas.T)
+
+            return [
+                {
+                    "class": self._label_for(prediction),
+                    "confidence": float(confidence),
+                    "risk_score": float(risk_score),
+                    "model_version": state.version
+                }
+                for prediction, confidence, risk_score in zip(predictions, confidences, risk_scores)
+            ]
+
+        except Exception as e:
+            print(f"Batch prediction error: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"error": str(e)}
+
+    def _fill_row(self, row, features):
+        """Writes features into a preallocated row in feature_names order (missing/bad -> 0)."""
+        for j, col in enumerate(self.feature_names):
+            try:
+                row[j] = float(features.get(col, 0))
+            except (TypeError, ValueError):
+                row[j] = 0.0
+        return row
+
+    @staticmethod
+    def _risk_score(probas):
+        """
+        Calculate Risk Score (Severity) from class probabilities.
+        Accepts one row of probas, or the transposed matrix for a batch.
+        0=Safe, 1=Warning, 2=Critical
+        Risk Score = P(Warning)*0.5 + P(Critical)*1.0
+        This ensures:
+        - 100% Safe -> Risk Score 0.0
+        - 100% Warning -> Risk Score 0.5
+        - 100% Critical -> Risk Score 1.0
+        """
+        if len(probas) >= 3:
+            return (probas[1] * 0.5) + (probas[2] * 1.0)
+        if len(probas) == 2: # Binary case fallback (Safe vs Critical?)
+            # Assuming 0=Safe, 1=Critical if binary
+            return probas[1]
+        return np.zeros_like(probas[0]) if len(probas) else 0.0
+
+    def _label_for(self, prediction):
+        # Map Class to Label
+        # 0=Low Risk (Safe), 1=Moderate Risk (Warning), 2=High Risk (Critical)
+        risk_map = {0: "Safe", 1: "Warning", 2: "Critical"}
+
+        if isinstance(prediction, (int, np.integer, float, np.floating)):
+            return risk_map.get(int(prediction), "Unknown")
+        return str(prediction)
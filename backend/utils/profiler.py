@@ -0,0 +1,131 @@
+import cProfile
+import itertools
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (file, function) pairs reported on their own in every profile, whatever
+# the top-N cut keeps
+FOCUS_FUNCTIONS = {
+    ('predictor.py', 'predict'): 'Predictor.predict',
+    ('mapper.py', 'map_risk_to_visuals'): 'map_risk_to_visuals',
+    ('patient_service.py', 'save_assessment'): 'PatientService.save_assessment',
+}
+
+
+def _short_path(filename):
+    if filename.startswith(BACKEND_DIR):
+        return os.path.relpath(filename, BACKEND_DIR)
+    # Library code: package/module.py is enough to recognise it
+    return '/'.join(filename.replace('\\', '/').split('/')[-2:])
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile capture of single requests.
+
+    A request is profiled when the caller asks for it (the app checks the
+    header) or, with sample_rate > 0, at random. Only one request is
+    profiled at a time, because cProfile hooks the interpreter; requests
+    arriving meanwhile run unprofiled. Each profile is reduced to the
+    top_n functions by cumulative and by self time, plus the time spent in
+    FOCUS_FUNCTIONS, and kept in a ring buffer of ring_size entries.
+    """
+
+    def __init__(self, sample_rate=0.0, ring_size=50, top_n=25):
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self._profiles = deque(maxlen=ring_size)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.captured = 0
+        self.skipped = 0
+
+    def start(self, requested=False):
+        """Returns a handle for stop() if this request is being profiled, else None."""
+        trigger = 'header' if requested else 'sampled'
+        if not requested and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self.skipped += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (a debugger, say) owns the hook
+            self._active.release()
+            return None
+        return profile, time.perf_counter(), trigger
+
+    def stop(self, handle, **details):
+        """Stops the profile, stores its summary with details and returns its id."""
+        profile, start, trigger = handle
+        try:
+            profile.disable()
+        finally:
+            self._active.release()
+        elapsed = time.perf_counter() - start
+
+        entry = {
+            "id": next(self._ids),
+            "timestamp": datetime.now().isoformat(),
+            "trigger": trigger,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            **details,
+            **self._summarize(profile)
+        }
+        with self._lock:
+            self._profiles.append(entry)
+            self.captured += 1
+        return entry["id"]
+
+    def _summarize(self, profile):
+        rows = []
+        focus = {}
+        for (filename, lineno, name), (_, calls, self_s, cumulative_s, _) in pstats.Stats(profile).stats.items():
+            row = {
+                # cProfile files C functions under '~'
+                "function": name if filename == '~' else f"{name} ({_short_path(filename)}:{lineno})",
+                "calls": calls,
+                "self_ms": round(self_s * 1000, 3),
+                "cumulative_ms": round(cumulative_s * 1000, 3)
+            }
+            rows.append(row)
+            label = FOCUS_FUNCTIONS.get((os.path.basename(filename), name))
+            if label:
+                focus[label] = {"calls": calls, "cumulative_ms": row["cumulative_ms"]}
+        return {
+            "focus": focus,
+            "top_cumulative": sorted(rows, key=lambda r: r["cumulative_ms"], reverse=True)[:self.top_n],
+            "top_self": sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:self.top_n]
+        }
+
+    def list(self):
+        """Newest first, without the function tables."""
+        with self._lock:
+            entries = list(self._profiles)
+        skip = ("top_cumulative", "top_self")
+        return [{k: v for k, v in e.items() if k not in skip} for e in reversed(entries)]
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((e for e in self._profiles if e["id"] == profile_id), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "stored": len(self._profiles),
+                "ring_size": self._profiles.maxlen,
+                "captured": self.captured,
+                "skipped": self.skipped
+            }
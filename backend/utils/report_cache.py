@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+from .feature_schema import normalize_record
+
+LOOKUP_QUERY = "SELECT report FROM report_cache WHERE cache_key = ?"
+
+# Applied in batches; a later flush never moves last_used_at backwards
+TOUCH_QUERY = "UPDATE report_cache SET last_used_at = MAX(last_used_at, ?), hits = hits + ? WHERE cache_key = ?"
+
+STORE_QUERY = """
+    INSERT OR REPLACE INTO report_cache
+        (cache_key, template_version, report, size_bytes, created_at, last_used_at, hits)
+    VALUES (?, ?, ?, ?, ?, ?, 0)
+"""
+
+# Keeps the most recently used reports whose sizes add up to max_bytes
+EVICT_QUERY = """
+    DELETE FROM report_cache WHERE cache_key IN (
+        SELECT cache_key FROM (
+            SELECT cache_key, SUM(size_bytes) OVER (ORDER BY last_used_at DESC, cache_key) AS running
+            FROM report_cache
+        ) WHERE running > ?
+    )
+"""
+
+SIZE_QUERY = "SELECT COUNT(*) AS entries, COALESCE(SUM(size_bytes), 0) AS bytes FROM report_cache"
+
+
+class ReportCache:
+    """
+    Generated reports stored in SQLite, addressed by the content that
+    produced them.
+
+    The key hashes the normalized patient data (database column names,
+    numeric features as floats, empty values dropped), the predicted class,
+    rounded risk score and confidence, and the prompt template version, so
+    a report is reused whenever the same inputs would build the same
+    prompt. Least recently used reports are evicted once the stored text
+    exceeds max_bytes. The table is shared by every worker process; the
+    hit/miss counters are per process.
+
+    A hit is a single read. Its last_used_at/hits update is held in memory
+    and written in one batch every touch_interval seconds, and before each
+    put so eviction sees current recency. The entry and byte totals are
+    re-read only on put, inside the store transaction, so stats() never
+    touches the database.
+    """
+
+    def __init__(self, db, max_bytes=50 * 1024 * 1024, touch_interval=30.0):
+        self.db = db
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._touches = {}  # key -> [last_used_at, hits] not yet written
+        self._touched_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        size = (db.execute_query(SIZE_QUERY) or [{"entries": 0, "bytes": 0}])[0]
+        self.entries = size['entries']
+        self.bytes = size['bytes']
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(patient_data, prediction, template_version):
+        patient = {
+            k: round(v, 6) if isinstance(v, float) else v
+            for k, v in normalize_record(patient_data).items()
+            if v not in (None, '')
+        }
+        outcome = {
+            "class": prediction.get('class'),
+            "risk_score": round(float(prediction.get('risk_score') or 0.0), 4),
+            "confidence": round(float(prediction.get('confidence') or 0.0), 4)
+        }
+        payload = json.dumps([template_version, patient, outcome], sort_keys=True, default=str)
+        return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        rows = self.db.execute_query(LOOKUP_QUERY, (key,))
+        with self._lock:
+            if not rows:
+                self.misses += 1
+                return None
+            self.hits += 1
+            touch = self._touches.setdefault(key, [None, 0])
+            touch[0] = datetime.now().isoformat()
+            touch[1] += 1
+            due = time.monotonic() - self._touched_at >= self.touch_interval
+        if due:
+            self.flush_touches()
+        return rows[0]['report']
+
+    def flush_touches(self):
+        """Writes the recency and hit counts of reports served since the last flush."""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+            self._touched_at = time.monotonic()
+        if touches:
+            self.db.execute_many(TOUCH_QUERY, [(used, hits, key) for key, (used, hits) in touches.items()])
+
+    def put(self, key, report, template_version):
+        if not self.enabled:
+            return
+        self.flush_touches()
+        now = datetime.now().isoformat()
+        with self.db.connection() as conn:
+            try:
+                conn.execute(STORE_QUERY, (key, template_version, report, len(report.encode()), now, now))
+                evicted = conn.execute(EVICT_QUERY, (self.max_bytes,)).rowcount
+                # Includes what other workers stored since our last put
+                size = conn.execute(SIZE_QUERY).fetchone()
+                conn.commit()
+            except Exception as e:
+                print(f"Report cache error: {e}")
+                return
+        with self._lock:
+            self.stores += 1
+            self.evictions += max(evicted, 0)
+            self.entries = size['entries']
+            self.bytes = size['bytes']
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self.entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions
+            }
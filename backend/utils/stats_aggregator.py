@@ -0,0 +1,124 @@
+import heapq
+import threading
+
+REBUILD_SUMMARY_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM patients) AS total_patients,
+        SUM(risk_level = 'Critical') AS high_risk,
+        SUM(risk_score) AS score_sum,
+        COUNT(risk_score) AS score_count
+    FROM assessments
+"""
+
+REBUILD_DAYS_QUERY = """
+    SELECT assessment_date AS day, COUNT(*) AS count
+    FROM assessments
+    WHERE assessment_date IS NOT NULL
+    GROUP BY assessment_date
+"""
+
+
+class DashboardStats:
+    """
+    Running aggregates behind /api/stats.
+
+    Counts, the score sum and per-day assessment buckets are rebuilt from
+    SQLite, then updated by PatientService as assessments and patients are
+    committed, so snapshot() costs the same at any history size.
+
+    A rebuild can run while writes continue. Writers hold write_lock from
+    their commit through the matching record_* call; rebuild() takes it
+    only to pin its read snapshot. Every write is therefore either in the
+    snapshot or recorded after it, and those later records are replayed
+    onto the rebuilt totals instead of being lost.
+    """
+
+    TREND_DAYS = 7
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        # Records made since a running rebuild pinned its snapshot
+        self._replay = None
+        self._reset()
+
+    def _reset(self):
+        self.total_patients = 0
+        self.high_risk = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.day_counts = {}  # 'YYYY-MM-DD' -> assessments that day
+
+    def rebuild(self, db):
+        """Reloads every aggregate from the database."""
+        try:
+            with db.connection() as conn:
+                with self.write_lock:
+                    # In WAL mode the first read fixes what the transaction sees
+                    conn.execute("BEGIN")
+                    conn.execute("SELECT 1 FROM assessments LIMIT 1").fetchall()
+                    with self._lock:
+                        self._replay = []
+                try:
+                    row = dict(conn.execute(REBUILD_SUMMARY_QUERY).fetchone() or {})
+                    days = conn.execute(REBUILD_DAYS_QUERY).fetchall()
+                finally:
+                    conn.rollback()
+        except Exception as e:
+            with self._lock:
+                self._replay = None
+            print(f"DashboardStats: could not rebuild from database: {e}")
+            return False
+
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._reset()
+            self.total_patients = row.get('total_patients') or 0
+            self.high_risk = row.get('high_risk') or 0
+            self.score_sum = float(row.get('score_sum') or 0.0)
+            self.score_count = row.get('score_count') or 0
+            self.day_counts = {d['day']: d['count'] for d in days}
+            for record in replay:
+                self._apply(*record)
+        return True
+
+    def record_assessment(self, timestamp, risk_level, risk_score):
+        """Counts one committed assessment. Call with write_lock held since the commit."""
+        self._record(('assessment', timestamp, risk_level, risk_score))
+
+    def record_patient(self):
+        """Counts one committed patient. Call with write_lock held since the commit."""
+        self._record(('patient',))
+
+    def _record(self, record):
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(record)
+            self._apply(*record)
+
+    def _apply(self, kind, timestamp=None, risk_level=None, risk_score=None):
+        # Called with _lock held
+        if kind == 'patient':
+            self.total_patients += 1
+            return
+        day = timestamp[:10] if timestamp else None
+        if risk_level == 'Critical':
+            self.high_risk += 1
+        if risk_score is not None:
+            self.score_sum += float(risk_score)
+            self.score_count += 1
+        if day:
+            self.day_counts[day] = self.day_counts.get(day, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            avg_risk = self.score_sum / self.score_count if self.score_count else 0
+            # Last 7 days with activity, oldest first, labelled MM-DD
+            recent = sorted(heapq.nlargest(self.TREND_DAYS, self.day_counts))
+            trend = [{"date": day[5:10], "count": self.day_counts[day]} for day in recent]
+            return {
+                "total_patients": self.total_patients,
+                "high_risk": self.high_risk,
+                "avg_risk": round(avg_risk * 100, 1),
+                "recent_trend": trend
+            }
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app          (Linux / macOS)
+    waitress-serve --port 5000 --threads 8 wsgi:app  (Windows)
+
+Importing it builds the app: the model is loaded and the database schema
+applied before the first request is accepted.
+"""
+from app import app
+
+application = app
@@ -1,103 +1,145 @@
-import pandas as pd
+import argparse
+import csv
 import os
-import json
-import sqlite3
 import sys
+import time
+from datetime import datetime
+from itertools import islice
 
 # Add backend to path so we can import utils
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(BASE_DIR, 'backend'))
 from utils.db_manager import DBManager
+from utils.feature_schema import CSV_COLUMN_MAP, RISK_LABEL_MAP
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(os.path.dirname(__file__), 'heart_viz.db')
 PATIENT_CSV = os.path.join(BASE_DIR, 'sample_patient_data_20_labeled.csv')
 HISTORY_CSV = os.path.join(BASE_DIR, 'assessment_history.csv')
 
-def migrate(db=None, db_path=DB_PATH):
+# Rows per transaction; each commit also records the checkpoint
+DEFAULT_CHUNK_SIZE = 5000
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+
+PATIENT_COLUMNS = [
+    'patient_id', 'age_years', 'sex_binary', 'resting_heart_rate_bpm',
+    'systolic_bp_mmHg', 'diastolic_bp_mmHg', 'heart_rate_variability_rmssd',
+    'qtc_interval_ms', 'baseline_lvef_percent', 'chemo_cycles_count',
+    'dose_per_cycle_mg_per_m2', 'cumulative_dose_mg_per_m2', 'status_label'
+]
+
+HISTORY_COLUMNS = [
+    'assessment_id', 'timestamp', 'patient_id', 'risk_level',
+    'risk_score', 'input_data', 'prediction_details'
+]
+
+CHECKPOINT_QUERY = """
+    SELECT file_size, file_mtime, rows_done, completed
+    FROM migration_checkpoints WHERE source = ?
+"""
+
+SAVE_CHECKPOINT = """
+    INSERT OR REPLACE INTO migration_checkpoints
+        (source, file_size, file_mtime, rows_done, completed, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def patient_row(record, index):
+    """Raw or database-named patient CSV row -> tuple in PATIENT_COLUMNS order."""
+    raw_labels = 'risk_label' in record
+    row = {CSV_COLUMN_MAP.get(k, k): v for k, v in record.items()}
+    # Exports without IDs get P001, P002, ... by file position
+    if raw_labels and not row.get('patient_id'):
+        row['patient_id'] = f'P{index + 1:03d}'
+    if raw_labels:
+        row['status_label'] = RISK_LABEL_MAP.get(row.get('status_label'), 'Safe')
+    # '' -> NULL; numeric text is stored as a number by the columns' affinity
+    return tuple(row.get(c) if row.get(c) != '' else None for c in PATIENT_COLUMNS)
+
+
+def history_row(record, index):
+    return tuple(record.get(c) if record.get(c) != '' else None for c in HISTORY_COLUMNS)
+
+
+def load_csv(db, csv_path, table, columns, to_row, chunk_size=DEFAULT_CHUNK_SIZE, resume=True):
+    """
+    Streams csv_path into table in transactions of chunk_size rows and
+    returns the number of rows loaded by this call.
+
+    Rows are upserted (INSERT OR REPLACE on the primary key), so loading a
+    file twice leaves the same data. After every transaction the number of
+    rows done is checkpointed in the same commit; a later run on the same
+    unchanged file (size and mtime) skips those rows, and a completed file
+    is skipped entirely. resume=False ignores the checkpoint.
+    """
+    source = os.path.abspath(csv_path)
+    stat = os.stat(csv_path)
+    identity = (stat.st_size, stat.st_mtime)
+
+    skip = 0
+    checkpoint = db.execute_query(CHECKPOINT_QUERY, (source,))
+    if resume and checkpoint and (checkpoint[0]['file_size'], checkpoint[0]['file_mtime']) == identity:
+        if checkpoint[0]['completed']:
+            print(f"{table}: {csv_path} already loaded ({checkpoint[0]['rows_done']} rows), skipping")
+            return 0
+        skip = checkpoint[0]['rows_done']
+        print(f"{table}: resuming {csv_path} after row {skip}")
+
+    placeholders = ', '.join(['?'] * len(columns))
+    query = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    start = last_report = time.perf_counter()
+    done = skip
+    with open(csv_path, newline='') as f, db.connection() as conn:
+        # Parse-only fast-forward past rows committed by an earlier run
+        records = islice(enumerate(csv.DictReader(f)), skip, None)
+        while True:
+            chunk = [to_row(record, i) for i, record in islice(records, chunk_size)]
+            if not chunk:
+                break
+            conn.executemany(query, chunk)
+            done += len(chunk)
+            conn.execute(SAVE_CHECKPOINT, (source, *identity, done, 0, datetime.now().isoformat()))
+            conn.commit()
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                print(f"  {table}: {done} rows ({(done - skip) / (now - start):,.0f} rows/s)")
+                last_report = now
+
+        conn.execute(SAVE_CHECKPOINT, (source, *identity, done, 1, datetime.now().isoformat()))
+        conn.commit()
+
+    elapsed = time.perf_counter() - start
+    loaded = done - skip
+    rate = f" ({loaded / elapsed:,.0f} rows/s)" if elapsed > 0 and loaded else ""
+    print(f"Successfully migrated {loaded} rows into {table} in {elapsed:.1f}s{rate}.")
+    return loaded
+
+
+def migrate(db=None, db_path=DB_PATH, patient_csv=PATIENT_CSV, history_csv=HISTORY_CSV,
+            chunk_size=DEFAULT_CHUNK_SIZE, resume=True):
     if db is None:
         db = DBManager(db_path)
-    
+
     # 1. Migrate Patients
-    if os.path.exists(PATIENT_CSV):
-        print(f"Migrating patients from {PATIENT_CSV}...")
-        df_p = pd.read_csv(PATIENT_CSV)
-        
-        # Standardize columns (same logic as PatientService)
-        if 'risk_label' in df_p.columns:
-            if 'Patient_ID' not in df_p.columns:
-                df_p.insert(0, 'Patient_ID', [f'P{i+1:03d}' for i in range(len(df_p))])
-            
-            demo_map = {
-                'Patient_ID': 'patient_id',
-                'age': 'age_years',
-                'sex': 'sex_binary', 
-                'resting_hr': 'resting_heart_rate_bpm',
-                'systolic_bp': 'systolic_bp_mmHg',
-                'diastolic_bp': 'diastolic_bp_mmHg',
-                'hrv_rmssd': 'heart_rate_variability_rmssd',
-                'qtc_baseline': 'qtc_interval_ms',
-                'baseline_lvef': 'baseline_lvef_percent',
-                'num_cycles': 'chemo_cycles_count',
-                'dose_per_cycle': 'dose_per_cycle_mg_per_m2',
-                'cumulative_dose': 'cumulative_dose_mg_per_m2',
-                'risk_label': 'status_label'
-            }
-            df_p = df_p.rename(columns=demo_map)
-            
-            # Map Risk Label to Status_Label
-            risk_map = {
-                'Low': 'Safe',
-                'Moderate': 'Warning',
-                'High': 'Critical'
-            }
-            df_p['status_label'] = df_p['status_label'].map(risk_map).fillna('Safe')
-        
-        # Ensure we only have columns that exist in the DB
-        db_cols = [
-            'patient_id', 'age_years', 'sex_binary', 'resting_heart_rate_bpm',
-            'systolic_bp_mmHg', 'diastolic_bp_mmHg', 'heart_rate_variability_rmssd',
-            'qtc_interval_ms', 'baseline_lvef_percent', 'chemo_cycles_count',
-            'dose_per_cycle_mg_per_m2', 'cumulative_dose_mg_per_m2', 'status_label'
-        ]
-        
-        # Filter and fillna
-        df_p = df_p[[c for c in db_cols if c in df_p.columns]]
-        for col in db_cols:
-            if col not in df_p.columns:
-                df_p[col] = None 
-
-        patients_data = [tuple(x) for x in df_p[db_cols].values]
-        
-        placeholders = ', '.join(['?'] * len(db_cols))
-        query = f"INSERT OR REPLACE INTO patients ({', '.join(db_cols)}) VALUES ({placeholders})"
-        db.execute_many(query, patients_data)
-        print(f"Successfully migrated {len(patients_data)} patients.")
+    if patient_csv and os.path.exists(patient_csv):
+        print(f"Migrating patients from {patient_csv}...")
+        load_csv(db, patient_csv, 'patients', PATIENT_COLUMNS, patient_row, chunk_size, resume)
 
     # 2. Migrate History
-    if os.path.exists(HISTORY_CSV):
-        print(f"Migrating history from {HISTORY_CSV}...")
-        df_h = pd.read_csv(HISTORY_CSV)
-        
-        df_h = df_h.rename(columns={'patient_id': 'patient_id'}) # Ensure lowercase if needed
-        
-        db_cols_h = [
-            'assessment_id', 'timestamp', 'patient_id', 'risk_level',
-            'risk_score', 'input_data', 'prediction_details'
-        ]
-        
-        # Filter and fillna
-        df_h = df_h[[c for c in db_cols_h if c in df_h.columns]]
-        for col in db_cols_h:
-            if col not in df_h.columns:
-                df_h[col] = None
-                
-        history_data = [tuple(x) for x in df_h[db_cols_h].values]
-        
-        placeholders_h = ', '.join(['?'] * len(db_cols_h))
-        query_h = f"INSERT OR REPLACE INTO assessments ({', '.join(db_cols_h)}) VALUES ({placeholders_h})"
-        db.execute_many(query_h, history_data)
-        print(f"Successfully migrated {len(history_data)} history records.")
+    if history_csv and os.path.exists(history_csv):
+        print(f"Migrating history from {history_csv}...")
+        load_csv(db, history_csv, 'assessments', HISTORY_COLUMNS, history_row, chunk_size, resume)
+
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description="Load patient and assessment-history CSVs into SQLite.")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--patients', default=PATIENT_CSV, help="Patient CSV (raw export or database column names)")
+    parser.add_argument('--history', default=HISTORY_CSV, help="Assessment history CSV")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per transaction")
+    parser.add_argument('--restart', action='store_true', help="Ignore checkpoints and reload from the first row")
+    args = parser.parse_args()
+    migrate(db_path=args.db, patient_csv=args.patients, history_csv=args.history,
+            chunk_size=max(1, args.chunk_size), resume=not args.restart)
@@ -24,5 +24,49 @@ CREATE TABLE IF NOT EXISTS assessments (
     risk_score REAL,
     input_data TEXT, -- JSON string
     prediction_details TEXT, -- JSON string
+    -- Calendar day of the ISO timestamp, for per-day stats
+    assessment_date TEXT GENERATED ALWAYS AS (substr(timestamp, 1, 10)) VIRTUAL,
     FOREIGN KEY (patient_id) REFERENCES patients(patient_id)
 );
+
+-- History listing, newest first (assessment_id breaks timestamp ties)
+CREATE INDEX IF NOT EXISTS idx_assessments_timestamp ON assessments(timestamp, assessment_id);
+-- Per-patient history
+CREATE INDEX IF NOT EXISTS idx_assessments_patient ON assessments(patient_id, timestamp, assessment_id);
+-- Covers the risk-level count and average score without reading JSON rows
+CREATE INDEX IF NOT EXISTS idx_assessments_risk ON assessments(risk_level, risk_score);
+-- Per-day trend
+CREATE INDEX IF NOT EXISTS idx_assessments_date ON assessments(assessment_date);
+
+-- Progress of CSV bulk loads (database/migrate_data.py), for resuming
+CREATE TABLE IF NOT EXISTS migration_checkpoints (
+    source TEXT PRIMARY KEY, -- absolute CSV path
+    file_size INTEGER,
+    file_mtime REAL,
+    rows_done INTEGER,
+    completed INTEGER DEFAULT 0,
+    updated_at TEXT
+);
+
+-- Generated clinical reports, keyed by a hash of their inputs (utils/report_cache.py)
+CREATE TABLE IF NOT EXISTS report_cache (
+    cache_key TEXT PRIMARY KEY,
+    template_version TEXT,
+    report TEXT,
+    size_bytes INTEGER,
+    created_at TEXT,
+    last_used_at TEXT,
+    hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_report_cache_last_used ON report_cache(last_used_at);
+
+-- Server-side chat sessions shared by every worker (utils/chat_sessions.py)
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT PRIMARY KEY,
+    mode TEXT,
+    patient_context TEXT,
+    history TEXT,           -- JSON list of {role, parts}
+    revision INTEGER,       -- bumped on every save
+    expires_at REAL         -- Unix time
+);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_expires ON chat_sessions(expires_at);
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 import { X, Download, FileText, Loader, AlertTriangle } from 'lucide-react';
-import axios from 'axios';
+import { postEventStream } from '../utils/eventStream';
 import { jsPDF } from "jspdf";
 import html2canvas from 'html2canvas';
 
@@ -9,32 +9,40 @@ export function AIReportModal({ onClose, patientData, prediction }) {
     const reportRef = React.useRef(null);
     const [report, setReport] = useState('');
     const [loading, setLoading] = useState(true);
+    const [streaming, setStreaming] = useState(true);
     const [error, setError] = useState(null);
 
     useEffect(() => {
+        const controller = new AbortController();
         const fetchReport = async () => {
             try {
                 setError(null);
-                const response = await axios.post('http://localhost:5000/api/generate-report', {
+                setReport('');
+                setStreaming(true);
+                // Render the report as it is generated instead of after the last token
+                await postEventStream('http://localhost:5000/api/generate-report/stream', {
                     patient_data: patientData,
                     prediction: prediction
+                }, {
+                    signal: controller.signal,
+                    onChunk: (text) => {
+                        setLoading(false);
+                        setReport(prev => prev + text);
+                    }
                 });
-
-                if (response.data.error) {
-                    throw new Error(response.data.error);
-                }
-
-                setReport(response.data.report);
             } catch (err) {
+                if (err.name === 'AbortError') return;
                 console.error(err);
-                const msg = err.response?.data?.error || err.message || "Unknown error";
+                const msg = err.message || "Unknown error";
                 setError(`Error generating report: ${msg}. Please check your API Key configuration.`);
                 setReport('');
             } finally {
                 setLoading(false);
+                setStreaming(false);
             }
         };
         fetchReport();
+        return () => controller.abort();
     }, [patientData, prediction]);
 
     const handleDownloadPDF = async () => {
@@ -99,7 +107,7 @@ export function AIReportModal({ onClose, patientData, prediction }) {
                     <div className="flex items-center gap-2">
                         <button
                             onClick={handleDownloadPDF}
-                            disabled={loading || error}
+                            disabled={streaming || error}
                             className="p-2 hover:bg-white/10 rounded-lg transition-colors text-gray-400 hover:text-white"
                             title="Download PDF"
                         >
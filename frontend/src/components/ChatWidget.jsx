@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { MessageSquare, Send, X, User as UserIcon, Bot, Stethoscope, HeartHandshake, ChevronRight } from 'lucide-react';
-import axios from 'axios';
+import { postEventStream } from '../utils/eventStream';
 import { motion, AnimatePresence } from 'framer-motion';
 import ReactMarkdown from 'react-markdown';
 
@@ -13,6 +13,15 @@ export function ChatWidget({ patientContext, isOpen, onClose }) {
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
     const scrollRef = useRef(null);
+    const abortRef = useRef(null);
+    // Server-side chat session: { id, context } once the first reply arrived
+    const sessionRef = useRef(null);
+
+    // Stop a reply in progress when the panel closes or unmounts
+    useEffect(() => {
+        if (!isOpen) abortRef.current?.abort();
+    }, [isOpen]);
+    useEffect(() => () => abortRef.current?.abort(), []);
 
     // Auto-scroll to bottom
     useEffect(() => {
@@ -39,23 +48,54 @@ export function ChatWidget({ patientContext, isOpen, onClose }) {
         setIsLoading(true);
 
         try {
-            // Filter history to strictly relevant? Or keep all? 
-            // Gemini handles history best if it's consistent. We'll pass all for continuity.
-            const history = messages.map(m => ({
-                role: m.role,
-                parts: [{ text: m.text }]
-            }));
-
-            const response = await axios.post('http://localhost:5000/api/chat', {
-                message: input,
-                history: history,
-                patient_context: JSON.stringify(patientContext),
-                mode: mode
-            });
-
-            const aiMsg = { role: 'model', text: response.data.response, mode: mode };
-            setMessages(prev => [...prev, aiMsg]);
+            const message = input;
+            const context = JSON.stringify(patientContext);
+            const controller = new AbortController();
+            abortRef.current = controller;
+            let started = false;
+
+            // The reply is shown as it streams in: the first chunk adds the
+            // message, later chunks extend it
+            const options = {
+                signal: controller.signal,
+                onChunk: (text) => {
+                    if (!started) {
+                        started = true;
+                        setIsLoading(false);
+                        setMessages(prev => [...prev, { role: 'model', text, mode: mode }]);
+                        return;
+                    }
+                    setMessages(prev => {
+                        const last = prev[prev.length - 1];
+                        return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+                    });
+                }
+            };
+
+            // The server keeps the conversation; send only the new message,
+            // plus the patient context on the first turn or when it changed
+            const session = sessionRef.current;
+            const body = { message, mode };
+            if (session) body.session_id = session.id;
+            if (!session || session.context !== context) body.patient_context = context;
+
+            const url = 'http://localhost:5000/api/chat/stream';
+            let done;
+            try {
+                done = await postEventStream(url, body, options);
+            } catch (err) {
+                if (!err.data?.session_expired) throw err;
+                // The session timed out on the server: start a new one,
+                // seeded with the conversation so far (minus the greeting)
+                const history = messages.slice(1).map(m => ({
+                    role: m.role,
+                    parts: [{ text: m.text }]
+                }));
+                done = await postEventStream(url, { message, mode, patient_context: context, history }, options);
+            }
+            sessionRef.current = { id: done.session_id, context };
         } catch (err) {
+            if (err.name === 'AbortError') return;
             console.error(err);
             setMessages(prev => [...prev, { role: 'model', text: "Connection error. Please try again.", mode: mode }]);
         } finally {
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
 import axios from 'axios';
 import { Search, Filter, Download, ExternalLink, Loader2 } from 'lucide-react';
 
@@ -6,12 +6,26 @@ export const HistoryPage = () => {
     const [history, setHistory] = useState([]);
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
+    const [riskFilter, setRiskFilter] = useState('');
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Summary rows only (no JSON payloads); the server returns the next page's
+    // cursor in the X-Next-Cursor header.
+    const fetchPage = useCallback(async (cursor) => {
+        const params = { limit: 50, include_payload: false };
+        if (cursor) params.cursor = cursor;
+        if (riskFilter) params.risk_level = riskFilter;
+        const res = await axios.get('http://localhost:5000/api/history', { params });
+        setNextCursor(res.headers['x-next-cursor'] || null);
+        return res.data;
+    }, [riskFilter]);
 
     useEffect(() => {
         const fetchHistory = async () => {
+            setLoading(true);
             try {
-                const res = await axios.get('http://localhost:5000/api/history');
-                setHistory(res.data);
+                setHistory(await fetchPage(null));
             } catch (err) {
                 console.error("Failed to fetch history", err);
             } finally {
@@ -19,7 +33,20 @@ export const HistoryPage = () => {
             }
         };
         fetchHistory();
-    }, []);
+    }, [fetchPage]);
+
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const page = await fetchPage(nextCursor);
+            setHistory(prev => [...prev, ...page]);
+        } catch (err) {
+            console.error("Failed to fetch more history", err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     const filteredHistory = history.filter(item =>
         item.patient_id.toLowerCase().includes(searchTerm.toLowerCase()) ||
@@ -63,10 +90,19 @@ export const HistoryPage = () => {
                         className="w-full bg-white/5 border border-white/5 rounded-2xl py-3 pl-12 pr-4 text-white focus:outline-none focus:border-purple-500/50 transition-all"
                     />
                 </div>
-                <button className="px-4 py-3 bg-white/5 border border-white/5 rounded-2xl text-gray-400 hover:text-white transition-all flex items-center gap-2">
+                <label className="px-4 py-3 bg-white/5 border border-white/5 rounded-2xl text-gray-400 hover:text-white transition-all flex items-center gap-2">
                     <Filter size={20} />
-                    <span>Filter</span>
-                </button>
+                    <select
+                        value={riskFilter}
+                        onChange={(e) => setRiskFilter(e.target.value)}
+                        className="bg-transparent text-white focus:outline-none"
+                    >
+                        <option value="" className="bg-bg-secondary">All Risk Levels</option>
+                        <option value="Safe" className="bg-bg-secondary">Safe</option>
+                        <option value="Warning" className="bg-bg-secondary">Warning</option>
+                        <option value="Critical" className="bg-bg-secondary">Critical</option>
+                    </select>
+                </label>
             </div>
 
             <div className="bg-bg-secondary/50 border border-white/5 rounded-3xl overflow-hidden backdrop-blur-sm">
@@ -112,6 +148,19 @@ export const HistoryPage = () => {
                     </tbody>
                 </table>
             </div>
+
+            {nextCursor && (
+                <div className="flex justify-center mt-6">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="flex items-center gap-2 px-6 py-2 bg-white/5 border border-white/10 rounded-xl text-white hover:bg-white/10 transition-all disabled:opacity-50"
+                    >
+                        {loadingMore && <Loader2 className="animate-spin" size={16} />}
+                        <span>Load more</span>
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
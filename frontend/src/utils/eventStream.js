@@ -0,0 +1,46 @@
+// POSTs JSON to a Server-Sent Events endpoint and calls onChunk with each
+// piece of text as it arrives. Resolves with the `done` event's data and
+// rejects on an `error` event. Abort through `signal` to stop the request;
+// the server then cancels the model call.
+export async function postEventStream(url, body, { onChunk, signal } = {}) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+        signal
+    });
+    if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        const err = new Error(data.error || `Request failed (${response.status})`);
+        err.status = response.status;
+        err.data = data;
+        throw err;
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let event = 'message';
+            let data = '';
+            for (const line of raw.split('\n')) {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            }
+            const payload = data ? JSON.parse(data) : {};
+            if (event === 'chunk') onChunk?.(payload.text);
+            else if (event === 'error') throw new Error(payload.error);
+            else if (event === 'done') return payload;
+        }
+    }
+    throw new Error('Stream ended unexpectedly');
+}
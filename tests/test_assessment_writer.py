@@ -0,0 +1,110 @@
+import sys
+import os
+import gc
+import tempfile
+import threading
+import time
+import unittest
+import weakref
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.db_manager import DBManager
+from utils.assessment_writer import AssessmentWriter
+
+def make_row(i):
+    return (f"AST-TEST-{i:06d}", "2026-01-01T00:00:00", "P001", "Safe", 0.1, "{}", "{}")
+
+class ParentGate:
+    """commit_lock stand-in that blocks commits in the creating process until opened."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.open = threading.Event()
+
+    def __enter__(self):
+        if os.getpid() == self.pid:
+            self.open.wait(10)
+
+    def __exit__(self, *exc):
+        return False
+
+class TestAssessmentWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def count(self):
+        return self.db.execute_query("SELECT COUNT(*) AS n FROM assessments")[0]['n']
+
+    def test_batches_and_flush(self):
+        writer = AssessmentWriter(self.db, batch_size=100, flush_interval=5.0)
+        for i in range(1000):
+            writer.submit(make_row(i))
+        writer.flush(timeout=10)
+
+        self.assertEqual(self.count(), 1000)
+        stats = writer.stats()
+        self.assertEqual(stats['written'], 1000)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertLessEqual(stats['batches'], 11)
+        writer.close()
+
+    def test_flush_interval_commits_partial_batch(self):
+        writer = AssessmentWriter(self.db, batch_size=1000, flush_interval=0.05)
+        writer.submit(make_row(1))
+        time.sleep(0.5)
+        self.assertEqual(self.count(), 1)
+        writer.close()
+
+    def test_bad_row_does_not_drop_batch(self):
+        writer = AssessmentWriter(self.db, batch_size=10, flush_interval=5.0)
+        rows = [make_row(i) for i in range(5)] + [make_row(0)]
+        for row in rows:
+            writer.submit(row)
+        writer.flush(timeout=10)
+
+        self.assertEqual(self.count(), 5)
+        self.assertEqual(writer.stats()['failed'], 1)
+        writer.close()
+
+    def test_close_drains_queue(self):
+        writer = AssessmentWriter(self.db, batch_size=1000, flush_interval=60)
+        for i in range(50):
+            writer.submit(make_row(i))
+        writer.close()
+        self.assertEqual(self.count(), 50)
+
+    def test_unclosed_writer_can_be_collected(self):
+        writer = AssessmentWriter(self.db)
+        ref = weakref.ref(writer)
+        del writer
+        gc.collect()
+        self.assertIsNone(ref())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "needs fork()")
+    def test_forked_child_does_not_commit_parent_rows(self):
+        # The gate parks the parent's writer thread on its first row, so the
+        # rest are still queued when the process forks
+        gate = ParentGate()
+        writer = AssessmentWriter(self.db, batch_size=1, commit_lock=gate)
+        for i in range(5):
+            writer.submit(make_row(i))
+        pid = os.fork()
+        if pid == 0:
+            # What the child's exit handler does
+            writer.close(timeout=1.0)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        gate.open.set()
+        writer.close()
+        self.assertEqual(self.count(), 5)
+        self.assertEqual(writer.stats()['failed'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
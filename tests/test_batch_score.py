@@ -0,0 +1,80 @@
+import sys
+import os
+import csv
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+# Add backend to path so we can import batch_score
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+import batch_score
+
+ROOT_MODEL = os.path.abspath(os.path.join(os.path.dirname(__file__), '../cardiotoxicity_model.pkl'))
+
+SCORE_COLUMNS = ['prediction', 'confidence', 'risk_score', 'model_version', 'error'] + \
+    [f'visual_{f}' for f in batch_score.VISUAL_FIELDS]
+
+class TestBatchScore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not os.path.exists(ROOT_MODEL):
+            raise unittest.SkipTest("Model not available")
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.input = os.path.join(cls.tmp.name, 'cohort.csv')
+        with open(cls.input, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Patient_ID', 'age', 'baseline_lvef', 'cumulative_dose'])
+            for i in range(25):
+                writer.writerow([f'P{i:03d}', 40 + i, 65 - i, i * 20])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def score(self, output, **kwargs):
+        path = os.path.join(self.tmp.name, output)
+        rows = batch_score.run(batch_score.read_csv(self.input, 4), path, 2, **kwargs)
+        self.assertEqual(rows, 25)
+        return path
+
+    def test_csv_output(self):
+        with open(self.score('scored.csv'), newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([r['Patient_ID'] for r in rows], [f'P{i:03d}' for i in range(25)])
+        self.assertEqual(list(rows[0])[:4], ['Patient_ID', 'age', 'baseline_lvef', 'cumulative_dose'])
+        for column in SCORE_COLUMNS:
+            self.assertIn(column, rows[0])
+        self.assertTrue(all(r['prediction'] and not r['error'] for r in rows))
+
+    def test_ndjson_output(self):
+        with open(self.score('scored.ndjson')) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r['Patient_ID'] for r in rows], [f'P{i:03d}' for i in range(25)])
+        self.assertTrue(set(SCORE_COLUMNS) <= set(rows[0]))
+        self.assertIsInstance(rows[0]['risk_score'], float)
+
+    def test_input_read_ahead_is_bounded(self):
+        read = []
+
+        def chunks():
+            for chunk in batch_score.read_csv(self.input, 2):
+                read.append(chunk)
+                yield chunk
+
+        lead = []
+        original = batch_score.OutputWriter.write
+
+        def write(writer, rows):
+            lead.append(len(read))
+            original(writer, rows)
+
+        with mock.patch.object(batch_score.OutputWriter, 'write', write):
+            batch_score.run(chunks(), os.path.join(self.tmp.name, 'bounded.csv'), 2, max_pending=3)
+        # The first chunk is written after at most max_pending were read
+        self.assertLessEqual(lead[0], 3)
+        self.assertEqual(len(read), 13)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import os
+import io
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.feature_schema import normalize_record
+from utils import bulk_scoring
+from utils.predictor import Predictor
+
+class TestNormalizeRecord(unittest.TestCase):
+    def test_renames_and_coerces(self):
+        record = normalize_record({'Patient_ID': 'P001', 'age': '60', 'resting_hr': '72.5', 'risk_label': 'High'})
+        self.assertEqual(record['patient_id'], 'P001')
+        self.assertEqual(record['age_years'], 60.0)
+        self.assertEqual(record['resting_heart_rate_bpm'], 72.5)
+        self.assertEqual(record['status_label'], 'High')
+        self.assertNotIn('age', record)
+
+    def test_long_name_wins_and_bad_values_dropped(self):
+        record = normalize_record({'age': '30', 'age_years': '65', 'baseline_lvef': 'n/a'})
+        self.assertEqual(record['age_years'], 65.0)
+        self.assertNotIn('baseline_lvef_percent', record)
+
+class TestBulkScoring(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = Predictor()
+        if cls.predictor.model is None:
+            raise unittest.SkipTest("Model not available")
+
+    def test_csv_chunks_match_single_predictions(self):
+        csv_text = "age,sex,baseline_lvef,cumulative_dose\n60,1,40,450\n30,0,65,0\n45,1,55,200\n"
+        lines = bulk_scoring.iter_text_lines(io.BytesIO(csv_text.encode()))
+        records = bulk_scoring.iter_csv_records(lines)
+        results = []
+        for chunk in bulk_scoring.iter_chunks(records, 2):
+            results += bulk_scoring.score_chunk(self.predictor, chunk, start_index=len(results))
+
+        self.assertEqual([r['row'] for r in results], [0, 1, 2])
+        expected = self.predictor.predict(normalize_record({'age': '60', 'sex': '1', 'baseline_lvef': '40', 'cumulative_dose': '450'}))
+        self.assertEqual(results[0]['prediction']['class'], expected['class'])
+        self.assertAlmostEqual(results[0]['prediction']['risk_score'], expected['risk_score'], places=9)
+
+    def test_ndjson_bad_lines_reported(self):
+        lines = ['{"age": 50}', 'not json', '[1, 2]', '', '{"features": {"age_years": 70}}']
+        records = list(bulk_scoring.iter_ndjson_records(lines))
+        results = bulk_scoring.score_chunk(self.predictor, records)
+        self.assertEqual(len(results), 4)
+        self.assertIn('error', results[1])
+        self.assertIn('error', results[2])
+        self.assertIn('prediction', results[3])
+
+if __name__ == '__main__':
+    unittest.main()
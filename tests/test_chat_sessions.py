@@ -0,0 +1,145 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.chat_sessions import ChatSession, ChatSessionStore, SessionNotFound
+from utils.db_manager import DBManager
+from utils.genai_client import GenAIClient
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubChat:
+    """Stands in for the SDK ChatSession: records what each turn sent."""
+
+    def __init__(self, history):
+        self.history = list(history)
+        self.sent = []
+
+    def send_message(self, content, stream=False, request_options=None):
+        self.sent.append(content)
+        reply = {"role": "model", "parts": [f"reply {len(self.sent)}"]}
+        self.history += [{"role": "user", "parts": [content]}, reply]
+        if stream:
+            return iter([StubResponse("reply "), StubResponse(str(len(self.sent)))])
+        return StubResponse(reply["parts"][0])
+
+class StubModel:
+    def __init__(self):
+        self.chats = []
+
+    def start_chat(self, history=None):
+        self.chats.append(StubChat(history or []))
+        return self.chats[-1]
+
+class TestChatSessionStore(unittest.TestCase):
+    def test_lru_and_ttl(self):
+        store = ChatSessionStore(max_sessions=2, ttl_seconds=0.05)
+        for i in range(3):
+            store.put(ChatSession(f"s{i}", StubChat([]), 'patient', None))
+        self.assertIsNone(store.get("s0"))
+        self.assertIsNotNone(store.get("s2"))
+        time.sleep(0.06)
+        self.assertIsNone(store.get("s2"))
+        stats = store.stats()
+        self.assertEqual((stats['evictions'], stats['expirations']), (1, 1))
+
+class TestClientSessions(unittest.TestCase):
+    def setUp(self):
+        self.client = GenAIClient(api_key="dummy")
+        self.client.model = StubModel()
+        self.client.sessions = ChatSessionStore(max_turns=2)
+
+    def test_instruction_sent_once_and_history_bounded(self):
+        session_id, reply = self.client.chat_turn("first", patient_context="LVEF 45%")
+        self.assertEqual(reply, "reply 1")
+        for i in range(5):
+            same_id, _ = self.client.chat_turn(f"turn {i}", session_id=session_id)
+            self.assertEqual(same_id, session_id)
+
+        chat = self.client.model.chats[0]
+        self.assertEqual(len(self.client.model.chats), 1)
+        # Each turn sends only the message; the instruction is pinned first
+        self.assertEqual(chat.sent[-1], "turn 4")
+        self.assertIn("LVEF 45%", chat.history[0]["parts"][0])
+        self.assertEqual(len(chat.history), 2 + 2 * 2)
+        self.assertEqual(chat.history[-2]["parts"], ["turn 4"])
+
+    def test_mode_switch_rewrites_instruction(self):
+        session_id, _ = self.client.chat_turn("hi", patient_context="ctx", mode='patient')
+        self.client.chat_turn("details?", session_id=session_id, mode='doctor')
+        chat = self.client.model.chats[0]
+        self.assertIn("MODE: DOCTOR", chat.history[0]["parts"][0])
+        self.assertEqual(chat.history[2]["parts"], ["hi"])
+
+    def test_unknown_session_needs_context(self):
+        with self.assertRaises(SessionNotFound):
+            self.client.chat_turn("hello", session_id="gone")
+        session_id, _ = self.client.chat_turn("hello", session_id="gone", patient_context="ctx")
+        self.assertNotEqual(session_id, "gone")
+
+    def test_stream_uses_session(self):
+        session_id, chunks = self.client.stream_chat("hi", patient_context="ctx")
+        self.assertEqual("".join(chunks), "reply 1")
+        _, chunks = self.client.stream_chat("again", session_id=session_id)
+        self.assertEqual("".join(chunks), "reply 2")
+        self.assertEqual(self.client.model.chats[0].sent, ["hi", "again"])
+
+class TestSharedSessions(unittest.TestCase):
+    """Two clients on one database stand in for two server workers."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.tmp.name, 'chat.db'))
+        self.workers = []
+        for _ in range(2):
+            client = GenAIClient(api_key="dummy")
+            client.model = StubModel()
+            client.sessions = ChatSessionStore(max_turns=2, db=self.db)
+            self.workers.append(client)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_turns_alternate_between_workers(self):
+        a, b = self.workers
+        session_id, _ = a.chat_turn("first", patient_context="LVEF 45%")
+        self.assertEqual(b.chat_turn("second", session_id=session_id)[0], session_id)
+        a.chat_turn("third", session_id=session_id)
+
+        # a rebuilt its chat from what b saved, so it saw the second turn
+        chat = a.model.chats[-1]
+        self.assertEqual(len(a.model.chats), 2)
+        self.assertIn("LVEF 45%", chat.history[0]["parts"][0])
+        self.assertEqual([h["parts"] for h in chat.history[2::2]], [["second"], ["third"]])
+
+    def test_object_context_is_stored(self):
+        a, b = self.workers
+        context = {"name": "Test", "lvef": 45}
+        session_id, _ = a.chat_turn("first", patient_context=context)
+        # Same context with keys in another order: not a change
+        same_id, _ = b.chat_turn("second", session_id=session_id, patient_context={"lvef": 45, "name": "Test"})
+        self.assertEqual(same_id, session_id)
+
+        chat = b.model.chats[-1]
+        self.assertIn('"lvef": 45', chat.history[0]["parts"][0])
+        self.assertEqual([h["parts"] for h in chat.history[2::2]], [["first"], ["second"]])
+        session = b.sessions.get(session_id)
+        self.assertEqual(session.patient_context, '{"lvef": 45, "name": "Test"}')
+
+    def test_expired_in_database(self):
+        a, b = self.workers
+        a.sessions.ttl_seconds = -1
+        session_id, _ = a.chat_turn("first", patient_context="ctx")
+        with self.assertRaises(SessionNotFound):
+            b.chat_turn("again", session_id=session_id)
+
+if __name__ == '__main__':
+    unittest.main()
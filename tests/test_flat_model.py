@@ -0,0 +1,56 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+import joblib
+from utils.flat_model import FlatTreeModel, flatten_model, check_parity
+from export_flat_model import MODEL_PATH, PARITY_CSVS, BASE_DIR, load_csv_matrix
+
+class TestFlatModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not os.path.exists(MODEL_PATH):
+            raise unittest.SkipTest("Model not available")
+        cls.model = joblib.load(MODEL_PATH)
+        cls.flat = flatten_model(cls.model)
+
+    def test_parity_on_risk_csvs(self):
+        for name in PARITY_CSVS:
+            X = load_csv_matrix(os.path.join(BASE_DIR, name))
+            _, agreement = check_parity(self.model, self.flat, X)
+            self.assertEqual(agreement, 1.0, name)
+
+    def test_parity_with_missing_values(self):
+        X = load_csv_matrix(os.path.join(BASE_DIR, PARITY_CSVS[0]))[:100].copy()
+        X[::3, 7] = np.nan
+        X[::4, 1] = 0.0
+        check_parity(self.model, self.flat, X)
+
+    def test_save_load_round_trip(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            self.flat.save(tmp)
+            loaded = FlatTreeModel.load(tmp)
+        X = load_csv_matrix(os.path.join(BASE_DIR, PARITY_CSVS[1]))[:50]
+        np.testing.assert_array_equal(loaded.predict_proba(X), self.flat.predict_proba(X))
+        np.testing.assert_array_equal(loaded.classes_, self.model.classes_)
+
+    def test_memory_mapped_load(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            self.flat.save(tmp)
+            mapped = FlatTreeModel.load(tmp, mmap_mode='r')
+            self.assertIsInstance(mapped.value, np.memmap)
+            # Derived lookups come from disk too, not private copies
+            self.assertIsInstance(mapped._children, np.memmap)
+            X = load_csv_matrix(os.path.join(BASE_DIR, PARITY_CSVS[2]))[:50]
+            np.testing.assert_array_equal(mapped.predict_proba(X), self.flat.predict_proba(X))
+            del mapped
+
+if __name__ == '__main__':
+    unittest.main()
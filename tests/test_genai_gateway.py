@@ -0,0 +1,176 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.genai_gateway import GenAIGateway, GatewayTimeout, GatewayBusy
+from utils.genai_client import GenAIClient
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubModel:
+    """Stands in for genai.GenerativeModel: configurable latency and failures."""
+
+    def __init__(self, delay=0.0, failures=0, error=ConnectionError):
+        self.delay = delay
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        if stream:
+            return self._stream(prompt)
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.timeouts.append((request_options or {}).get('timeout'))
+            fail = self.calls <= self.failures
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise self.error("stub failure")
+            return StubResponse(f"report for {prompt[:10]}")
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _stream(self, prompt):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.failures
+        if fail:
+            raise self.error("stub failure")
+        self.streamed = 0
+        for word in ["report", "for", prompt[:10]]:
+            time.sleep(self.delay)
+            self.streamed += 1
+            yield StubResponse(word + " ")
+
+def generate(model):
+    return lambda prompt, timeout: model.generate_content(prompt, request_options={"timeout": timeout}).text
+
+def run_concurrently(n, fn):
+    results, errors = [], []
+    def target(i):
+        try:
+            results.append(fn(i))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+class TestGenAIGateway(unittest.TestCase):
+    def test_concurrency_is_bounded(self):
+        model = StubModel(delay=0.05)
+        gateway = GenAIGateway(max_workers=2, max_pending=10, timeout=5)
+        results, errors = run_concurrently(8, lambda i: gateway.call(generate(model), f"prompt {i}"))
+        self.assertEqual((len(results), errors), (8, []))
+        self.assertEqual(model.max_running, 2)
+
+    def test_deadline(self):
+        model = StubModel(delay=0.5)
+        gateway = GenAIGateway(max_workers=1, timeout=0.1)
+        start = time.monotonic()
+        with self.assertRaises(GatewayTimeout):
+            gateway.call(generate(model), "slow")
+        self.assertLess(time.monotonic() - start, 0.4)
+        # The SDK was told how long it had
+        self.assertLessEqual(model.timeouts[0], 0.1)
+        self.assertEqual(gateway.stats()['timeouts'], 1)
+
+    def test_retries_transient_errors_only(self):
+        model = StubModel(failures=2)
+        gateway = GenAIGateway(timeout=5, retries=2, backoff_base=0.01)
+        self.assertTrue(gateway.call(generate(model), "flaky").startswith("report"))
+        self.assertEqual((model.calls, gateway.stats()['retries']), (3, 2))
+
+        model = StubModel(failures=1, error=ValueError)
+        with self.assertRaises(ValueError):
+            gateway.call(generate(model), "bad request")
+        self.assertEqual(model.calls, 1)
+
+    def test_coalesces_identical_calls(self):
+        model = StubModel(delay=0.1)
+        gateway = GenAIGateway(max_workers=4, timeout=5)
+        results, errors = run_concurrently(5, lambda i: gateway.call(generate(model), "same", key="k"))
+        self.assertEqual((len(results), errors), (5, []))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(gateway.stats()['coalesced'], 4)
+
+    def test_rejects_when_full(self):
+        model = StubModel(delay=0.2)
+        gateway = GenAIGateway(max_workers=1, max_pending=1, timeout=5)
+        results, errors = run_concurrently(4, lambda i: gateway.call(generate(model), f"p{i}"))
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(isinstance(e, GatewayBusy) for e in errors))
+
+def stream(model):
+    def fn(prompt, timeout):
+        for chunk in model.generate_content(prompt, stream=True, request_options={"timeout": timeout}):
+            yield chunk.text
+    return fn
+
+class TestGatewayStream(unittest.TestCase):
+    def test_chunks_arrive_before_completion(self):
+        model = StubModel(delay=0.1)
+        gateway = GenAIGateway(timeout=5)
+        chunks = gateway.stream(stream(model), "prompt")
+        start = time.monotonic()
+        self.assertEqual(next(chunks), "report ")
+        self.assertLess(time.monotonic() - start, 0.2)
+        self.assertEqual(list(chunks), ["for ", "prompt "])
+        stats = gateway.stats()
+        self.assertEqual((stats['streams'], stats['completed'], stats['in_flight']), (1, 1, 0))
+
+    def test_close_cancels_producer(self):
+        model = StubModel(delay=0.05)
+        gateway = GenAIGateway(max_workers=1, max_pending=0, timeout=5)
+        chunks = gateway.stream(stream(model), "prompt")
+        next(chunks)
+        chunks.close()
+        time.sleep(0.2)
+        self.assertLess(model.streamed, 3)
+        self.assertEqual((gateway.stats()['cancelled'], gateway.stats()['in_flight']), (1, 0))
+        # The slot is free again
+        self.assertEqual(len(list(gateway.stream(stream(StubModel()), "again"))), 3)
+
+    def test_retries_before_first_chunk(self):
+        model = StubModel(failures=1)
+        gateway = GenAIGateway(timeout=5, retries=2, backoff_base=0.01)
+        self.assertEqual(len(list(gateway.stream(stream(model), "flaky"))), 3)
+        self.assertEqual(gateway.stats()['retries'], 1)
+
+    def test_stalled_stream_times_out(self):
+        gateway = GenAIGateway(timeout=0.1)
+        with self.assertRaises(GatewayTimeout):
+            list(gateway.stream(stream(StubModel(delay=0.5)), "slow"))
+
+class TestClientUsesGateway(unittest.TestCase):
+    def test_slow_model_returns_error_text(self):
+        client = GenAIClient(api_key="dummy", gateway=GenAIGateway(timeout=0.1))
+        client.model = StubModel(delay=0.5)
+        report = client.generate_report({"age": 65}, {"class": "Critical", "risk_score": 0.9, "confidence": 0.9})
+        self.assertIn("timed out", report)
+
+        client.model = StubModel()
+        report = client.generate_report({"age": 66}, {"class": "Critical", "risk_score": 0.9, "confidence": 0.9})
+        self.assertTrue(report.startswith("report for"))
+
+if __name__ == '__main__':
+    unittest.main()
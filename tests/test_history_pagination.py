@@ -0,0 +1,76 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.patient_service import PatientService
+from utils.assessment_writer import INSERT_ASSESSMENT
+
+class TestHistoryPagination(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.service = PatientService(os.path.join(self.tmp.name, 'history.db'), write_behind=False)
+        rows = []
+        for i in range(25):
+            # Pairs of rows share a timestamp to exercise the assessment_id tie-break
+            ts = f"2026-03-{1 + i // 8:02d}T10:00:{i // 2:02d}"
+            level = ['Safe', 'Warning', 'Critical'][i % 3]
+            rows.append((f"AST-{i:04d}", ts, f"P{i % 2}", level, i / 25, '{"x": 1}', '{}'))
+        self.service.db.execute_many(INSERT_ASSESSMENT, rows)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp.cleanup()
+
+    def collect(self, **filters):
+        items, cursor = [], None
+        while True:
+            page = self.service.get_history_page(limit=10, cursor=cursor, **filters)
+            items += page['items']
+            cursor = page['next_cursor']
+            if not cursor:
+                return items
+
+    def test_pages_cover_everything_once_in_order(self):
+        items = self.collect()
+        ids = [r['assessment_id'] for r in items]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+        keys = [(r['timestamp'], r['assessment_id']) for r in items]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_filters(self):
+        critical = self.collect(risk_level='Critical')
+        self.assertTrue(critical and all(r['risk_level'] == 'Critical' for r in critical))
+        self.assertEqual(len(critical), len([i for i in range(25) if i % 3 == 2]))
+
+        p1 = self.collect(patient_id='P1')
+        self.assertEqual(len(p1), 12)
+
+        day = self.collect(start='2026-03-02', end='2026-03-02')
+        self.assertEqual(len(day), 8)
+        self.assertTrue(all(r['timestamp'].startswith('2026-03-02') for r in day))
+
+    def test_exclude_payload(self):
+        page = self.service.get_history_page(limit=5, include_payload=False)
+        self.assertNotIn('input_data', page['items'][0])
+        self.assertNotIn('prediction_details', page['items'][0])
+        self.assertIn('risk_score', page['items'][0])
+
+    def test_full_rows_keep_original_columns(self):
+        row = self.service.get_history_page(limit=1)['items'][0]
+        self.assertEqual(set(row), {'assessment_id', 'timestamp', 'patient_id', 'risk_level',
+                                    'risk_score', 'input_data', 'prediction_details'})
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.service.get_history_page(cursor='not-a-cursor')
+
+    def test_legacy_get_history(self):
+        self.assertEqual(len(self.service.get_history(50)), 25)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+import multiprocessing
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.id_generator import ULIDGenerator, new_id, ulid_timestamp_ms
+from utils.patient_service import PatientService
+
+def _generate(n):
+    return [new_id() for _ in range(n)]
+
+class TestULIDGenerator(unittest.TestCase):
+    def test_monotonic_and_unique(self):
+        gen = ULIDGenerator()
+        ids = [gen.new() for _ in range(50000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(i) == 26 for i in ids))
+
+    def test_timestamp_round_trip(self):
+        before = time.time_ns() // 1_000_000
+        ulid = ULIDGenerator().new()
+        after = time.time_ns() // 1_000_000
+        self.assertTrue(before <= ulid_timestamp_ms(ulid) <= after)
+
+    def test_unique_across_threads(self):
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            ids = [new_id() for _ in range(5000)]
+            with lock:
+                results.extend(ids)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(results)), 40000)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires fork")
+    def test_unique_across_forked_workers(self):
+        _generate(10)  # parent state must not leak into children
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(4) as pool:
+            batches = pool.map(_generate, [5000] * 4)
+        ids = [i for batch in batches for i in batch] + _generate(5000)
+        self.assertEqual(len(set(ids)), len(ids))
+
+class TestAssessmentStress(unittest.TestCase):
+    def test_10k_assessments_without_loss(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            service = PatientService(os.path.join(tmp, 'stress.db'))
+            prediction = {"class": "Safe", "confidence": 0.9, "risk_score": 0.1}
+            visuals = {"risk_score": 0.9}
+            per_thread = 2500
+
+            def worker(t):
+                for i in range(per_thread):
+                    service.save_assessment({"patient_id": f"P{t}", "n": i}, prediction, visuals)
+
+            threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            service.flush(timeout=60)
+
+            count = service.db.execute_query("SELECT COUNT(*) AS n FROM assessments")[0]['n']
+            stats = service.writer.stats()
+            service.close()
+
+        self.assertEqual(count, 4 * per_thread)
+        self.assertEqual(stats['failed'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
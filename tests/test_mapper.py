@@ -0,0 +1,61 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.mapper import map_risk_to_visuals, map_risk_to_visuals_batch, visuals_to_records, map_predictions_to_visuals
+
+CASES = [
+    ({'class': 'Safe', 'confidence': 0.9}, {'resting_heart_rate_bpm': 72.7, 'qtc_interval_ms': 410,
+                                            'baseline_lvef_percent': 65, 'heart_rate_variability_rmssd': 45.9}),
+    ({'class': 'Warning', 'confidence': 0.6}, {'qtc_interval_ms': 520, 'baseline_lvef_percent': 20}),
+    ({'class': 'Critical', 'confidence': 0.8}, {'resting_heart_rate_bpm': 0, 'heart_rate_variability_rmssd': -1}),
+    ({'class': 'Low Start', 'confidence': 0.3}, {'qtc_interval_ms': 0}),
+    ({'class': 'Unknown', 'confidence': 0.5}, {}),
+]
+
+
+def columns(cases):
+    def col(name):
+        return [f.get(name, np.nan) for _, f in cases]
+    return dict(
+        classes=[p['class'] for p, _ in cases],
+        confidences=[p['confidence'] for p, _ in cases],
+        resting_hr=col('resting_heart_rate_bpm'),
+        qtc=col('qtc_interval_ms'),
+        lvef=col('baseline_lvef_percent'),
+        hrv=col('heart_rate_variability_rmssd'),
+    )
+
+
+class TestBatchMapper(unittest.TestCase):
+    def test_matches_scalar_without_jitter(self):
+        batch = visuals_to_records(map_risk_to_visuals_batch(**columns(CASES), jitter=False))
+        for (prediction, features), visuals in zip(CASES, batch):
+            self.assertEqual(visuals, map_risk_to_visuals(prediction, 45, features, jitter=False))
+
+    def test_seeded_jitter_is_reproducible(self):
+        a = map_risk_to_visuals_batch(**columns(CASES), rng=np.random.default_rng(7))
+        b = map_risk_to_visuals_batch(**columns(CASES), rng=np.random.default_rng(7))
+        np.testing.assert_array_equal(a['heart_rate'], b['heart_rate'])
+
+        # Same draws as the scalar function called row by row
+        rng = np.random.default_rng(7)
+        scalar = [map_risk_to_visuals(p, 45, f, rng=rng)['heart_rate'] for p, f in CASES]
+        self.assertEqual(a['heart_rate'].tolist(), scalar)
+
+    def test_prediction_dicts(self):
+        features = [dict(f) for _, f in CASES]
+        features[0]['qtc_interval_ms'] = 'n/a'
+        visuals = map_predictions_to_visuals([p for p, _ in CASES], features, jitter=False)
+        self.assertEqual(visuals[0]['qtc'], 400.0)
+        self.assertEqual(visuals[1], map_risk_to_visuals(CASES[1][0], 45, CASES[1][1], jitter=False))
+        self.assertEqual(map_predictions_to_visuals([], []), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import sys
+import os
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.metrics import MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_exposition(self):
+        hist = self.registry.histogram('req_seconds', 'Request time', ['route'], buckets=(0.1, 1.0))
+        child = hist.labels(route='/predict')
+        for value in (0.05, 0.1, 0.5, 3.0):
+            child.observe(value)
+        text = self.registry.render()
+
+        self.assertIn('# TYPE req_seconds histogram', text)
+        self.assertIn('req_seconds_bucket{route="/predict",le="0.1"} 2', text)
+        self.assertIn('req_seconds_bucket{route="/predict",le="1.0"} 3', text)
+        self.assertIn('req_seconds_bucket{route="/predict",le="+Inf"} 4', text)
+        self.assertIn('req_seconds_count{route="/predict"} 4', text)
+        self.assertIn('req_seconds_sum{route="/predict"} 3.65', text)
+
+    def test_families_are_shared_by_name(self):
+        counter = self.registry.counter('errors_total', 'Errors', ['op'])
+        self.assertIs(self.registry.counter('errors_total', 'Errors', ['op']), counter)
+        counter.inc(op='SELECT')
+        counter.inc(2, op='SELECT')
+        self.assertIn('errors_total{op="SELECT"} 3.0', self.registry.render())
+        with self.assertRaises(ValueError):
+            self.registry.histogram('errors_total', 'Errors')
+
+    def test_gauge_function_and_escaping(self):
+        self.registry.gauge_function('stat', 'Stats', lambda: [({"name": 'a "b"\n'}, 1)])
+        self.assertIn('stat{name="a \\"b\\"\\n"} 1.0', self.registry.render())
+
+        def broken():
+            raise RuntimeError("boom")
+        self.registry.gauge_function('broken', 'Fails', broken)
+        # One failing gauge does not break the scrape
+        self.assertIn('# TYPE broken gauge', self.registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add backend and database to path so we can import utils and the loader
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(ROOT_DIR, 'backend'))
+sys.path.append(os.path.join(ROOT_DIR, 'database'))
+
+from utils.db_manager import DBManager
+import migrate_data
+
+HEADER = "assessment_id,timestamp,patient_id,risk_level,risk_score,input_data,prediction_details\n"
+
+class TestStreamingLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.tmp.name, 'test.db'))
+        self.csv_path = os.path.join(self.tmp.name, 'history.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write(HEADER)
+            for i in range(10):
+                f.write(f'AST-{i:03d},2026-01-0{i % 9 + 1}T10:00:00,P001,Safe,0.{i},"{{""a"": 1}}",\n')
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def count(self):
+        return self.db.execute_query("SELECT COUNT(*) AS n FROM assessments")[0]['n']
+
+    def load(self, to_row=migrate_data.history_row, resume=True):
+        return migrate_data.load_csv(self.db, self.csv_path, 'assessments', migrate_data.HISTORY_COLUMNS,
+                                     to_row, chunk_size=3, resume=resume)
+
+    def test_resumes_after_interruption(self):
+        def failing_row(record, index):
+            if index == 7:
+                raise KeyboardInterrupt
+            return migrate_data.history_row(record, index)
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.load(failing_row)
+        # Two full chunks committed; the third was rolled back
+        self.assertEqual(self.count(), 6)
+
+        self.assertEqual(self.load(), 4)
+        self.assertEqual(self.count(), 10)
+        # Completed files are skipped
+        self.assertEqual(self.load(), 0)
+
+    def test_reload_is_idempotent(self):
+        self.load()
+        self.assertEqual(self.load(resume=False), 10)
+        self.assertEqual(self.count(), 10)
+        row = self.db.execute_query("SELECT * FROM assessments WHERE assessment_id = 'AST-003'")[0]
+        self.assertEqual(row['risk_score'], 0.3)
+        self.assertIsNone(row['prediction_details'])
+
+    def test_patient_rows_from_raw_export(self):
+        record = {'age': '60', 'sex': '1', 'risk_label': 'High', 'baseline_lvef': ''}
+        row = dict(zip(migrate_data.PATIENT_COLUMNS, migrate_data.patient_row(record, 4)))
+        self.assertEqual(row['patient_id'], 'P005')
+        self.assertEqual(row['status_label'], 'Critical')
+        self.assertEqual(row['age_years'], '60')
+        self.assertIsNone(row['baseline_lvef_percent'])
+
+if __name__ == '__main__':
+    unittest.main()
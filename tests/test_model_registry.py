@@ -0,0 +1,158 @@
+import sys
+import os
+import multiprocessing
+import subprocess
+import tempfile
+import time
+import unittest
+
+import joblib
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.model_registry import ModelRegistry
+from utils.predictor import Predictor
+
+ROOT_MODEL = os.path.abspath(os.path.join(os.path.dirname(__file__), '../cardiotoxicity_model.pkl'))
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend'))
+
+# What a different server worker does on POST /api/admin/models/<v>/activate
+ACTIVATE_SCRIPT = """
+import sys
+from utils.model_registry import ModelRegistry
+from utils.predictor import Predictor
+status = Predictor(registry=ModelRegistry(sys.argv[1])).activate(sys.argv[2], wait=True)
+sys.exit(0 if status['state'] == 'ready' else 1)
+"""
+
+def _version_after_sync(predictor, conn):
+    # Runs in a forked child, as gunicorn's post_fork hook does
+    predictor.sync_active(wait=True)
+    conn.send(predictor.model_version)
+    conn.close()
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(os.path.join(self.tmp.name, 'registry'))
+        self.source = os.path.join(self.tmp.name, 'model.pkl')
+        joblib.dump({'weights': [1, 2, 3]}, self.source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_register_verify_and_activate(self):
+        manifest = self.registry.register(self.source, version='v1', notes='first')
+        self.assertEqual(self.registry.verify('v1')['sha256'], manifest['sha256'])
+        self.assertIsNone(self.registry.active_version())
+        self.registry.set_active('v1')
+        self.assertEqual(self.registry.active_version(), 'v1')
+        self.assertEqual([m['version'] for m in self.registry.list_versions()], ['v1'])
+
+        with self.assertRaises(ValueError):
+            self.registry.register(self.source, version='v1')
+        with self.assertRaises(ValueError):
+            self.registry.set_active('missing')
+        with self.assertRaises(ValueError):
+            self.registry.artifact_path('../escape')
+
+    def test_checksum_mismatch(self):
+        self.registry.register(self.source, version='v1')
+        with open(self.registry.artifact_path('v1'), 'ab') as f:
+            f.write(b'tampered')
+        with self.assertRaises(ValueError):
+            self.registry.verify('v1')
+
+class TestHotReload(unittest.TestCase):
+    def setUp(self):
+        if not os.path.exists(ROOT_MODEL):
+            raise unittest.SkipTest("Model not available")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp.name)
+        self.registry.register(ROOT_MODEL, version='v1')
+        bad = os.path.join(self.tmp.name, 'bad.pkl')
+        joblib.dump({'not': 'a model'}, bad)
+        self.registry.register(bad, version='broken')
+        self.predictor = Predictor(registry=self.registry)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_activate_swaps_and_tags_results(self):
+        self.assertTrue(self.predictor.model_version.startswith('legacy-'))
+        before = self.predictor.predict({'age_years': 50})
+
+        status = self.predictor.activate('v1', wait=True)
+        self.assertEqual(status['state'], 'ready')
+        self.assertEqual(self.predictor.model_version, 'v1')
+        self.assertEqual(self.registry.active_version(), 'v1')
+
+        after = self.predictor.predict({'age_years': 50})
+        self.assertEqual(after['model_version'], 'v1')
+        self.assertEqual(after['class'], before['class'])
+        self.assertEqual(self.predictor.predict_batch([{'age_years': 50}])[0]['model_version'], 'v1')
+
+    def test_failed_activation_keeps_current_model(self):
+        self.predictor.activate('v1', wait=True)
+        status = self.predictor.activate('broken', wait=True)
+        self.assertEqual(status['state'], 'failed')
+        self.assertEqual(self.predictor.model_version, 'v1')
+        self.assertEqual(self.registry.active_version(), 'v1')
+
+        # Restart picks up the persisted ACTIVE version
+        self.assertEqual(Predictor(registry=self.registry).model_version, 'v1')
+
+    def test_flat_format_serves_registered_export(self):
+        from utils.flat_model import FlatTreeModel, flatten_model
+        self.registry.register(ROOT_MODEL, version='v2', flat_model=flatten_model(self.predictor.model))
+        flat_predictor = Predictor(registry=self.registry, model_format='flat')
+        status = flat_predictor.activate('v2', wait=True)
+        self.assertEqual(status['state'], 'ready')
+        self.assertIsInstance(flat_predictor.model, FlatTreeModel)
+        self.assertIn('meta.json', self.registry.manifest('v2')['flat_sha256'])
+
+        self.predictor.activate('v2', wait=True)
+        expected = self.predictor.predict({'age_years': 65, 'baseline_lvef_percent': 40})
+        actual = flat_predictor.predict({'age_years': 65, 'baseline_lvef_percent': 40})
+        self.assertEqual(actual['class'], expected['class'])
+        self.assertAlmostEqual(actual['confidence'], expected['confidence'], places=9)
+
+    def test_activation_in_another_process_reaches_this_one(self):
+        self.predictor.active_check_seconds = 0.01
+        self.assertTrue(self.predictor.model_version.startswith('legacy-'))
+
+        subprocess.run([sys.executable, '-c', ACTIVATE_SCRIPT, self.tmp.name, 'v1'],
+                       cwd=BACKEND_DIR, check=True, capture_output=True)
+
+        # A worker forked from a master still holding the old model
+        ctx = multiprocessing.get_context('fork')
+        parent_conn, child_conn = ctx.Pipe()
+        child = ctx.Process(target=_version_after_sync, args=(self.predictor, child_conn))
+        child.start()
+        self.assertEqual(parent_conn.recv(), 'v1')
+        child.join()
+
+        # A running worker follows on a later prediction
+        deadline = time.monotonic() + 30
+        while self.predictor.predict({'age_years': 50})['model_version'] != 'v1':
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertEqual(self.predictor.reload_status['state'], 'ready')
+
+    def test_tampered_flat_export_is_rejected(self):
+        from utils.flat_model import flatten_model
+        self.registry.register(ROOT_MODEL, version='v2', flat_model=flatten_model(self.predictor.model))
+        flat_dir = self.registry.flat_dir('v2')
+        npy = sorted(n for n in os.listdir(flat_dir) if n.endswith('.npy'))[0]
+        with open(os.path.join(flat_dir, npy), 'r+b') as f:
+            f.truncate(os.path.getsize(f.name) - 8)
+        with self.assertRaises(ValueError):
+            self.registry.verify('v2')
+
+        flat_predictor = Predictor(registry=self.registry, model_format='flat')
+        status = flat_predictor.activate('v2', wait=True)
+        self.assertEqual(status['state'], 'failed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.prediction_cache import PredictionCache
+from utils.predictor import Predictor
+
+class TestPredictionCache(unittest.TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = PredictionCache(max_size=2, ttl_seconds=60)
+        keys = [PredictionCache.make_key(np.array([float(i)]), 'm1') for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, {"class": str(i)})
+
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2]), {"class": "2"})
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (1, 1, 1))
+
+    def test_ttl_expiry(self):
+        cache = PredictionCache(max_size=10, ttl_seconds=5)
+        key = PredictionCache.make_key(np.array([1.0]), 'm1')
+        with patch('utils.prediction_cache.time.monotonic', return_value=100.0):
+            cache.put(key, {"class": "Safe"})
+        with patch('utils.prediction_cache.time.monotonic', return_value=106.0):
+            self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_key_depends_on_fingerprint(self):
+        row = np.array([1.0, 2.0])
+        self.assertNotEqual(PredictionCache.make_key(row, 'a'), PredictionCache.make_key(row, 'b'))
+
+    def test_returns_copies(self):
+        cache = PredictionCache()
+        key = PredictionCache.make_key(np.array([1.0]), 'm1')
+        cache.put(key, {"class": "Safe"})
+        cache.get(key)["class"] = "Mutated"
+        self.assertEqual(cache.get(key), {"class": "Safe"})
+
+class TestPredictorCaching(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = Predictor()
+        if cls.predictor.model is None:
+            raise unittest.SkipTest("Model not available")
+
+    def test_normalized_inputs_share_entry_and_reload_invalidates(self):
+        self.predictor.cache.clear()
+        first = self.predictor.predict({'age_years': 50, 'baseline_lvef_percent': 60})
+        second = self.predictor.predict({'age_years': '50', 'baseline_lvef_percent': 60.0})
+        self.assertEqual(first, second)
+        self.assertEqual(self.predictor.cache.stats()['hits'], 1)
+
+        self.predictor.load_model()
+        self.assertEqual(self.predictor.cache.stats()['size'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import os
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.predictor import Predictor
+
+SAFE_PATIENT = {
+    'age_years': 30, 'sex_binary': 0, 'resting_heart_rate_bpm': 65,
+    'systolic_bp_mmHg': 110, 'diastolic_bp_mmHg': 70, 'heart_rate_variability_rmssd': 80,
+    'qtc_interval_ms': 400, 'baseline_lvef_percent': 65, 'chemo_cycles_count': 0,
+    'dose_per_cycle_mg_per_m2': 0, 'cumulative_dose_mg_per_m2': 0
+}
+
+CRITICAL_PATIENT = {
+    'age_years': 65, 'sex_binary': 1, 'resting_heart_rate_bpm': 95,
+    'systolic_bp_mmHg': 160, 'diastolic_bp_mmHg': 95, 'heart_rate_variability_rmssd': 15,
+    'qtc_interval_ms': 500, 'baseline_lvef_percent': 40, 'chemo_cycles_count': 6,
+    'dose_per_cycle_mg_per_m2': 60, 'cumulative_dose_mg_per_m2': 360
+}
+
+class TestPredictor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.predictor = Predictor()
+        if cls.predictor.model is None:
+            raise unittest.SkipTest("Model not available")
+
+    def test_batch_matches_single_row(self):
+        rows = [SAFE_PATIENT, CRITICAL_PATIENT, {'age_years': 'n/a'}, {}]
+        batch = self.predictor.predict_batch(rows)
+
+        self.assertEqual(len(batch), len(rows))
+        for row, result in zip(rows, batch):
+            single = self.predictor.predict(row)
+            self.assertEqual(result['class'], single['class'])
+            self.assertAlmostEqual(result['confidence'], single['confidence'], places=9)
+            self.assertAlmostEqual(result['risk_score'], single['risk_score'], places=9)
+
+    def test_fast_path_matches_dataframe_path(self):
+        for row in (SAFE_PATIENT, CRITICAL_PATIENT, {'qtc_interval_ms': None}):
+            fast = self.predictor.predict(row)
+            frame = self.predictor._predict_frame(row)
+            self.assertEqual(fast['class'], frame['class'])
+            self.assertAlmostEqual(fast['confidence'], frame['confidence'], places=9)
+            self.assertAlmostEqual(fast['risk_score'], frame['risk_score'], places=9)
+
+    def test_batch_empty(self):
+        self.assertEqual(self.predictor.predict_batch([]), [])
+
+class TestBackgroundLoad(unittest.TestCase):
+    def test_calls_wait_for_background_load(self):
+        predictor = Predictor(background_load=True)
+        self.assertIn(predictor.model_status, ('loading', 'ready'))
+        result = predictor.predict(SAFE_PATIENT)
+        if predictor.model is None:
+            self.skipTest("Model not available")
+        self.assertEqual(predictor.model_status, 'ready')
+        self.assertNotIn('error', result)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import sys
+import os
+import threading
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.profiler import RequestProfiler
+from utils.mapper import map_risk_to_visuals
+
+class TestRequestProfiler(unittest.TestCase):
+    def test_captures_focus_functions(self):
+        profiler = RequestProfiler(top_n=5)
+        handle = profiler.start(requested=True)
+        map_risk_to_visuals({"class": "Warning", "confidence": 0.7}, 50)
+        profile_id = profiler.stop(handle, route='/predict')
+
+        entry = profiler.get(profile_id)
+        self.assertEqual((entry["route"], entry["trigger"]), ('/predict', 'header'))
+        self.assertEqual(entry["focus"]["map_risk_to_visuals"]["calls"], 1)
+        self.assertLessEqual(len(entry["top_cumulative"]), 5)
+        self.assertNotIn("top_self", profiler.list()[0])
+
+    def test_off_unless_requested_or_sampled(self):
+        self.assertIsNone(RequestProfiler().start())
+        always = RequestProfiler(sample_rate=1.0)
+        handle = always.start()
+        self.assertIsNotNone(handle)
+        always.stop(handle)
+
+    def test_one_profile_at_a_time(self):
+        profiler = RequestProfiler()
+        handle = profiler.start(requested=True)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(profiler.start(requested=True)))
+        thread.start()
+        thread.join()
+        profiler.stop(handle)
+        self.assertEqual(other, [None])
+        self.assertEqual(profiler.stats()["skipped"], 1)
+
+    def test_ring_buffer(self):
+        profiler = RequestProfiler(ring_size=2)
+        ids = [profiler.stop(profiler.start(requested=True)) for _ in range(3)]
+        self.assertIsNone(profiler.get(ids[0]))
+        self.assertEqual([e["id"] for e in profiler.list()], [ids[2], ids[1]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+import time
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from utils.db_manager import DBManager
+from utils.report_cache import ReportCache
+
+PATIENT = {'age': '65', 'sex': 1, 'baseline_lvef': 40.0, 'name': 'Test'}
+PREDICTION = {'class': 'High Risk', 'risk_score': 0.81234, 'confidence': 0.9}
+
+class TestReportCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DBManager(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_key_ignores_spelling_and_order(self):
+        same = {'name': 'Test', 'baseline_lvef_percent': '40', 'sex_binary': 1.0, 'age_years': 65, 'notes': ''}
+        self.assertEqual(ReportCache.make_key(PATIENT, PREDICTION, 'v1'),
+                         ReportCache.make_key(same, dict(PREDICTION, risk_score=0.812341), 'v1'))
+        self.assertNotEqual(ReportCache.make_key(PATIENT, PREDICTION, 'v1'),
+                            ReportCache.make_key(PATIENT, PREDICTION, 'v2'))
+        self.assertNotEqual(ReportCache.make_key(PATIENT, PREDICTION, 'v1'),
+                            ReportCache.make_key(dict(PATIENT, baseline_lvef=35), PREDICTION, 'v1'))
+
+    def test_hit_and_miss(self):
+        cache = ReportCache(self.db)
+        key = ReportCache.make_key(PATIENT, PREDICTION, 'v1')
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "report text", 'v1')
+        self.assertEqual(cache.get(key), "report text")
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+        # Shared with other processes through the database
+        self.assertEqual(ReportCache(self.db).get(key), "report text")
+
+    def test_evicts_least_recently_used(self):
+        cache = ReportCache(self.db, max_bytes=25)
+        for key in ('a', 'b'):
+            cache.put(key, 'x' * 10, 'v1')
+            time.sleep(0.01)
+        cache.get('a')  # 'b' is now the oldest
+        time.sleep(0.01)
+        cache.put('c', 'x' * 10, 'v1')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        stats = cache.stats()
+        self.assertEqual((stats['evictions'], stats['bytes']), (1, 20))
+
+    def test_hits_are_written_in_batches(self):
+        cache = ReportCache(self.db)
+        cache.put('a', 'report', 'v1')
+        for _ in range(3):
+            cache.get('a')
+        hits = lambda: self.db.execute_query("SELECT hits FROM report_cache WHERE cache_key = 'a'")[0]['hits']
+        self.assertEqual(hits(), 0)
+        cache.flush_touches()
+        self.assertEqual(hits(), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+# Add backend to path so we can import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../backend')))
+
+from utils.patient_service import PatientService
+from utils.stats_aggregator import DashboardStats
+
+class TestDashboardStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.service = PatientService(os.path.join(self.tmp.name, 'stats.db'))
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp.cleanup()
+
+    def test_incremental_matches_rebuild(self):
+        before = self.service.get_stats()
+        for level, score in [('Critical', 0.9), ('Safe', 0.1), ('Warning', 0.5), ('Critical', 0.8)]:
+            self.service.save_assessment({'patient_id': 'P001'}, {'class': level}, {'risk_score': score})
+        self.service.register_patient({'Patient_ID': 'PTEST1', 'age_years': 50})
+
+        # Assessments are counted once the writer has committed them
+        self.service.flush(timeout=10)
+        live = self.service.get_stats()
+        self.assertEqual(live['high_risk'], before['high_risk'] + 2)
+        self.assertEqual(live['total_patients'], before['total_patients'] + 1)
+
+        rebuilt = DashboardStats()
+        rebuilt.rebuild(self.service.db)
+        self.assertEqual(rebuilt.snapshot(), live)
+
+    def test_duplicate_patient_not_counted(self):
+        self.service.register_patient({'Patient_ID': 'PDUP', 'age_years': 50})
+        count = self.service.get_stats()['total_patients']
+        self.service.register_patient({'Patient_ID': 'PDUP', 'age_years': 50})
+        self.assertEqual(self.service.get_stats()['total_patients'], count)
+
+    def test_refresh_picks_up_other_writers(self):
+        # A second service on the same file stands in for another server worker
+        other = PatientService(self.service.db_path, stats_refresh_seconds=0.01)
+        try:
+            before = other.get_stats()['high_risk']
+            self.service.save_assessment({'patient_id': 'P001'}, {'class': 'Critical'}, {'risk_score': 0.9})
+            self.service.flush(timeout=10)
+            # The rebuild runs on a background thread
+            deadline = time.monotonic() + 5
+            while other.get_stats()['high_risk'] != before + 1:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+        finally:
+            other.close()
+
+    def test_rebuild_during_writes_loses_nothing(self):
+        def write():
+            for i in range(300):
+                self.service.save_assessment({'patient_id': 'P001'}, {'class': 'Critical'}, {'risk_score': 0.5})
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while writer.is_alive():
+            self.service.stats.rebuild(self.service.db)
+        writer.join()
+        self.service.flush(timeout=10)
+
+        rebuilt = DashboardStats()
+        rebuilt.rebuild(self.service.db)
+        self.assertEqual(self.service.get_stats(), rebuilt.snapshot())
+
+    def test_failed_write_not_counted(self):
+        self.service.flush(timeout=10)
+        before = self.service.get_stats()['high_risk']
+        self.service.db.execute_query("DROP TABLE assessments", commit=True)
+        self.service.save_assessment({'patient_id': 'P001'}, {'class': 'Critical'}, {'risk_score': 0.9})
+        self.service.flush(timeout=10)
+        self.assertEqual(self.service.get_stats()['high_risk'], before)
+        self.assertEqual(self.service.writer.stats()['failed'], 1)
+
+    def test_trend_keeps_last_seven_days(self):
+        stats = DashboardStats()
+        for day in range(1, 11):
+            for _ in range(day):
+                stats.record_assessment(f"2026-03-{day:02d}T10:00:00", 'Safe', 0.1)
+        trend = stats.snapshot()['recent_trend']
+        self.assertEqual([t['date'] for t in trend], [f"03-{d:02d}" for d in range(4, 11)])
+        self.assertEqual(trend[-1]['count'], 10)
+
+if __name__ == '__main__':
+    unittest.main()